@@ -1,9 +1,10 @@
 """Search action — orchestrates product searches across retailers."""
+import asyncio
 import logging
 from typing import Optional
 
 from ..browser import BrowserManager
-from ..scrapers.base import BaseRetailerScraper, ProductListing, ProductDetails
+from ..scrapers.base import DETAIL_CONCURRENCY, BaseRetailerScraper, ProductListing, ProductDetails
 from ..scrapers.amazon import AmazonScraper
 
 logger = logging.getLogger(__name__)
@@ -31,6 +32,23 @@ class SearchAction:
             self._scrapers[retailer] = cls(self._browser)
         return self._scrapers[retailer]
 
+    @staticmethod
+    async def _search_retailer(
+        scraper: BaseRetailerScraper,
+        query: str,
+        max_results: int,
+    ) -> list[ProductListing]:
+        """Try the scraper's HTTP skill path first, falling back to the browser."""
+        try:
+            listings = await scraper.skill(query, max_results=max_results)
+        except Exception as e:
+            logger.warning("Skill path failed for %s: %s", scraper.retailer_name, e)
+            listings = None
+
+        if listings is not None:
+            return listings
+        return await scraper.search(query, max_results=max_results)
+
     async def search(
         self,
         query: str,
@@ -48,33 +66,40 @@ class SearchAction:
         """
         if not retailers or "all" in retailers:
             retailers = list(SCRAPER_CLASSES.keys())
+        else:
+            # One task per retailer: a repeat would replace a task that still runs unawaited
+            retailers = list(dict.fromkeys(retailers))
 
         all_results: list[dict] = []
         retailers_searched: list[str] = []
 
+        # Retailer searches are independent I/O — run them concurrently
+        tasks: dict[str, asyncio.Task] = {}
         for retailer in retailers:
             scraper = self._get_scraper(retailer)
             if scraper is None:
                 continue
+            tasks[retailer] = asyncio.create_task(self._search_retailer(scraper, query, max_results))
+
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
 
-            try:
-                listings = await scraper.search(query, max_results=max_results)
-                retailers_searched.append(retailer)
-
-                for listing in listings:
-                    all_results.append({
-                        "title": listing.title,
-                        "price": listing.price,
-                        "url": listing.url,
-                        "rating": listing.rating,
-                        "review_count": listing.review_count,
-                        "retailer": listing.retailer,
-                        "in_stock": listing.in_stock,
-                    })
-
-            except Exception as e:
-                logger.error("Search failed for %s: %s", retailer, e)
+        for retailer, outcome in zip(tasks.keys(), outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error("Search failed for %s: %s", retailer, outcome)
                 retailers_searched.append(f"{retailer} (error)")
+                continue
+
+            retailers_searched.append(retailer)
+            for listing in outcome:
+                all_results.append({
+                    "title": listing.title,
+                    "price": listing.price,
+                    "url": listing.url,
+                    "rating": listing.rating,
+                    "review_count": listing.review_count,
+                    "retailer": listing.retailer,
+                    "in_stock": listing.in_stock,
+                })
 
         return {
             "status": "ok",
@@ -84,32 +109,67 @@ class SearchAction:
             "total_results": len(all_results),
         }
 
-    async def get_details(self, url: str) -> dict:
-        """
-        Get product details from a URL.
-        Auto-detects retailer from URL.
-        """
+    def _scraper_for(self, url: str) -> tuple[Optional[BaseRetailerScraper], Optional[dict]]:
+        """Pick the scraper for a URL, or the error dict to return instead."""
         retailer = self._detect_retailer(url)
         if not retailer:
-            return {
+            return None, {
                 "status": "error",
                 "message": f"Unsupported retailer URL: {url}. Supported: {list(SCRAPER_CLASSES.keys())}",
             }
 
         scraper = self._get_scraper(retailer)
         if not scraper:
-            return {"status": "error", "message": f"No scraper for: {retailer}"}
+            return None, {"status": "error", "message": f"No scraper for: {retailer}"}
+        return scraper, None
 
-        try:
-            details = await scraper.get_details(url)
-            if details is None:
-                return {"status": "error", "message": "Could not extract product details from page."}
-            return {"status": "ok", "details": details.to_dict()}
+    @staticmethod
+    def _details_result(details: Optional[ProductDetails]) -> dict:
+        if details is None:
+            return {"status": "error", "message": "Could not extract product details from page."}
+        return {"status": "ok", "details": details.to_dict()}
+
+    async def get_details(self, url: str) -> dict:
+        """
+        Get product details from a URL.
+        Auto-detects retailer from URL.
+        """
+        scraper, error = self._scraper_for(url)
+        if error:
+            return error
 
+        try:
+            return self._details_result(await scraper.get_details(url))
         except Exception as e:
             logger.error("Get details failed for %s: %s", url, e)
             return {"status": "error", "message": str(e)}
 
+    async def get_all_details(self, urls: list[str], concurrency: int = DETAIL_CONCURRENCY) -> list[dict]:
+        """
+        Get product details for several URLs, in input order.
+
+        URLs are grouped by retailer and handed to the scraper's
+        get_details_many(), so each retailer loads at most `concurrency` pages
+        at a time. A page that fails yields an error dict for its URL only.
+        """
+        results: list[Optional[dict]] = [None] * len(urls)
+        groups: dict[BaseRetailerScraper, list[int]] = {}
+        for i, url in enumerate(urls):
+            scraper, error = self._scraper_for(url)
+            if error:
+                results[i] = error
+            else:
+                groups.setdefault(scraper, []).append(i)
+
+        batches = await asyncio.gather(*(
+            scraper.get_details_many([urls[i] for i in indices], max_concurrent=concurrency)
+            for scraper, indices in groups.items()
+        ))
+        for indices, details in zip(groups.values(), batches):
+            for i, detail in zip(indices, details):
+                results[i] = self._details_result(detail)
+        return results
+
     async def open_page(self, url: str) -> dict:
         """Open a product page in the browser."""
         try:
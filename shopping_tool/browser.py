@@ -5,15 +5,77 @@ Adapted from job-application-agent's BaseScraper and SkillContext.
 Single browser instance shared across all tool calls.
 """
 import asyncio
+import importlib.util
 import logging
 import os
 import random
+import time
+import weakref
+from pathlib import Path
 from typing import Optional
 
-from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+import httpx
+from playwright.async_api import async_playwright, Browser, BrowserContext, Locator, Page, Playwright
 
 logger = logging.getLogger(__name__)
 
+USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+# Connection pool for the shared HTTP client — sockets stay warm between skill calls
+HTTP_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=300)
+
+# HTTP/2 needs the h2 package (httpx[http2]); fall back to HTTP/1.1 without it
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Cap on page HTML handed to the selector resolver
+MAX_HTML_CHARS = 100_000
+
+# Human-like anti-bot waits are opt-in; off by default they only cost latency
+JITTER = os.environ.get("SHOPPING_JITTER", "0") == "1"
+
+# Upper bound (seconds) on the combined jitter of a single click/fill
+JITTER_BUDGET = 2.0
+
+# Settle time after a click when jitter is off, so the DOM can react
+CLICK_SETTLE = 0.1
+
+# URL patterns dropped via CDP when SHOPPING_BLOCK_MEDIA=1
+BLOCKED_URL_PATTERNS = [
+    "*.jpg", "*.jpeg", "*.png", "*.webp", "*.gif", "*.svg",
+    "*.mp4", "*.webm", "*.woff", "*.woff2", "*.ttf",
+    "*google-analytics*", "*googletagmanager*", "*doubleclick*", "*facebook.net*",
+]
+
+# Visibility check + scroll in one round trip for plain CSS. Visible means what Playwright's
+# is_visible() means: a non-empty box and visibility:visible (offsetParent would reject
+# position:fixed bars). Null when nothing matches or for display:contents, which has no
+# box of its own and is left to Playwright.
+_PREPARE_TARGET_JS = '''
+    (sel) => {
+        const el = document.querySelector(sel);
+        if (!el) return null;
+        const style = getComputedStyle(el);
+        if (style.display === 'contents') return null;
+        const rect = el.getBoundingClientRect();
+        const visible = rect.width > 0 && rect.height > 0 && style.visibility === 'visible';
+        if (visible) el.scrollIntoView({block: 'center', behavior: 'instant'});
+        return visible;
+    }
+'''
+
+
+# Chromium flags and context settings, shared by the persistent and the temporary launch
+_LAUNCH_ARGS = [
+    "--disable-blink-features=AutomationControlled",
+    "--disable-dev-shm-usage",
+    "--no-sandbox",
+]
+_CONTEXT_OPTIONS = {"viewport": {"width": 1920, "height": 1080}, "user_agent": USER_AGENT}
+
 
 class BrowserManager:
     """Manages a single Playwright browser instance across MCP tool calls."""
@@ -23,7 +85,16 @@ class BrowserManager:
         self._browser: Optional[Browser] = None
         self._context: Optional[BrowserContext] = None
         self._tabs: list[Page] = []  # ordered list of open tabs
+        self._blank_pages: list[Page] = []  # pages the browser opened by itself, not yet used
         self._active_tab_index: int = -1
+        self._http: Optional[httpx.AsyncClient] = None
+        # extract_page_elements results per page; dropped on navigation or interaction.
+        # Weak keys: a closed page's entry goes with it and can't alias a newer page.
+        self._element_cache: weakref.WeakKeyDictionary[Page, dict] = weakref.WeakKeyDictionary()
+        # Serializes launches so a background warmup and the first tool call share one browser
+        self._launch_lock = asyncio.Lock()
+        self._last_activity: float = time.monotonic()
+        self._idle_task: Optional[asyncio.Task] = None
 
     @property
     def active_page(self) -> Optional[Page]:
@@ -44,43 +115,129 @@ class BrowserManager:
     def headless(self) -> bool:
         return os.environ.get("SHOPPING_HEADLESS", "false").lower() == "true"
 
-    async def _ensure_browser(self) -> Browser:
-        """Launch browser if not already running."""
-        if self._browser and self._browser.is_connected():
-            return self._browser
+    @property
+    def block_media(self) -> bool:
+        return os.environ.get("SHOPPING_BLOCK_MEDIA", "0") == "1"
 
-        self._playwright = await async_playwright().start()
-        self._browser = await self._playwright.chromium.launch(
-            headless=self.headless,
-            args=[
-                "--disable-blink-features=AutomationControlled",
-                "--disable-dev-shm-usage",
-                "--no-sandbox",
-            ],
-        )
-        logger.info("Browser launched (headless=%s)", self.headless)
-        return self._browser
+    @property
+    def idle_timeout(self) -> float:
+        """Seconds without activity before the browser is closed (0 disables)."""
+        return float(os.environ.get("SHOPPING_IDLE_TIMEOUT", "0"))
+
+    @property
+    def user_data_dir(self) -> Path:
+        """Chromium profile dir — keeps the HTTP disk cache warm across sessions."""
+        return Path(os.environ.get(
+            "SHOPPING_USER_DATA_DIR",
+            "~/.cache/shopping_tool/profile",
+        )).expanduser()
 
     async def _ensure_context(self) -> BrowserContext:
-        """Get or create a browser context with realistic settings."""
+        """Launch a persistent browser context with realistic settings if not already running."""
+        self._touch()
         if self._context:
             return self._context
 
-        browser = await self._ensure_browser()
-        self._context = await browser.new_context(
-            viewport={"width": 1920, "height": 1080},
-            user_agent=(
-                "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120.0.0.0 Safari/537.36"
-            ),
-        )
+        async with self._launch_lock:
+            if not self._context:
+                await self._launch()
         return self._context
 
+    async def _launch(self) -> None:
+        """Start Playwright and open the persistent context, or a temporary one if the profile is taken."""
+        # Persistent context so cached JS/CSS/images survive across tool calls and restarts.
+        # Never install page.route() handlers — they disable Chromium's HTTP cache.
+        self.user_data_dir.mkdir(parents=True, exist_ok=True)
+        self._playwright = await async_playwright().start()
+        chromium = self._playwright.chromium
+        try:
+            try:
+                self._context = await chromium.launch_persistent_context(
+                    user_data_dir=str(self.user_data_dir),
+                    headless=self.headless,
+                    args=_LAUNCH_ARGS,
+                    **_CONTEXT_OPTIONS,
+                )
+                self._browser = self._context.browser
+                # The window opens on about:blank; new_page() uses that tab first
+                self._blank_pages = list(self._context.pages)
+                profile = self.user_data_dir
+            except Exception as e:
+                # Chromium locks a profile dir to one process, so a second server (another
+                # MCP client) can't share it — run that one on a throwaway context instead
+                logger.warning("Persistent profile %s unavailable (%s) — using a temporary profile",
+                               self.user_data_dir, e)
+                self._browser = await chromium.launch(headless=self.headless, args=_LAUNCH_ARGS)
+                self._context = await self._browser.new_context(**_CONTEXT_OPTIONS)
+                profile = None
+        except Exception:
+            # Don't leave the Playwright driver process running behind a failed launch
+            await self._playwright.stop()
+            self._playwright = None
+            self._browser = None
+            raise
+        logger.info("Browser launched (headless=%s, profile=%s)", self.headless, profile)
+
+        if self.idle_timeout > 0:
+            self._idle_task = asyncio.create_task(self._close_when_idle(self.idle_timeout))
+
+    async def warmup(self) -> None:
+        """Launch the browser ahead of the first tool call."""
+        try:
+            await self._ensure_context()
+        except Exception as e:
+            logger.warning("Browser warmup failed: %s", e)
+
+    def _touch(self) -> None:
+        """Record activity for the idle timer."""
+        self._last_activity = time.monotonic()
+
+    async def _close_when_idle(self, timeout: float) -> None:
+        """Close the browser once nothing has used it for `timeout` seconds."""
+        while self._context:
+            remaining = self._last_activity + timeout - time.monotonic()
+            if remaining <= 0:
+                logger.info("Browser idle for %.0fs — closing", timeout)
+                self._idle_task = None
+                # Skill-path requests don't need the browser; keep their warm connections
+                await self._close_browser()
+                return
+            await asyncio.sleep(remaining)
+
+    def http_client(self) -> httpx.AsyncClient:
+        """
+        Shared HTTP client for scraper skill paths that skip the browser.
+
+        One pooled client per manager; scrapers must use this rather than
+        opening their own so every request reuses warm connections.
+        """
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                headers={
+                    "User-Agent": USER_AGENT,
+                    "Accept-Language": "en-US,en;q=0.9",
+                },
+                follow_redirects=True,
+                timeout=10.0,
+                limits=HTTP_LIMITS,
+                http2=_HTTP2,
+            )
+        return self._http
+
+    async def prewarm(self, origin: str) -> None:
+        """Open a pooled connection to `origin` so the first skill request skips DNS/TLS setup."""
+        try:
+            await self.http_client().head(origin + "/")
+        except Exception as e:
+            logger.debug("Prewarm of %s failed: %s", origin, e)
+
     async def new_page(self, url: str) -> Page:
         """Open a URL in a new tab and make it active."""
         context = await self._ensure_context()
-        page = await context.new_page()
+        page = self._blank_pages.pop() if self._blank_pages else await context.new_page()
+        page.on("framenavigated", lambda frame: self._on_frame_navigated(page, frame))
+        if self.block_media:
+            await self._block_heavy_resources(context, page)
         await page.goto(url, wait_until="domcontentloaded", timeout=30000)
         await self._random_delay(500, 1500)
         self._tabs.append(page)
@@ -88,6 +245,20 @@ class BrowserManager:
         logger.info("Opened tab %d: %s", self._active_tab_index, url)
         return page
 
+    async def _block_heavy_resources(self, context: BrowserContext, page: Page) -> None:
+        """
+        Drop images, fonts, media and analytics for a page at the network layer.
+
+        Uses CDP Network.setBlockedURLs rather than page.route(), which would
+        disable the HTTP cache the persistent context exists for.
+        """
+        try:
+            cdp = await context.new_cdp_session(page)
+            await cdp.send("Network.enable", {})
+            await cdp.send("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        except Exception as e:
+            logger.warning("Could not block heavy resources: %s", e)
+
     async def open_in_new_tab(self, url: str) -> Page:
         """Open a URL in a new tab without closing the current one."""
         return await self.new_page(url)
@@ -103,13 +274,18 @@ class BrowserManager:
 
     async def get_tab_list(self) -> list[dict]:
         """Return info about all open tabs."""
+        # Titles are fetched concurrently: one CDP round trip instead of one per tab
+        titles = await asyncio.gather(
+            *(page.title() for page in self._tabs), return_exceptions=True,
+        )
         tabs = []
-        for i, page in enumerate(self._tabs):
+        for i, (page, title) in enumerate(zip(self._tabs, titles)):
             try:
                 url = page.url
-                title = await page.title()
             except Exception:
                 url = "(closed)"
+            if isinstance(title, BaseException):
+                url = "(closed)"
                 title = "(closed)"
             tabs.append({
                 "index": i,
@@ -129,15 +305,35 @@ class BrowserManager:
                 continue
         return None
 
-    async def extract_page_elements(self, page: Page) -> dict:
+    def _on_frame_navigated(self, page: Page, frame) -> None:
+        """Drop cached elements when the page's main frame navigates."""
+        if frame.parent_frame is None:
+            self.invalidate_elements(page)
+
+    def invalidate_elements(self, page: Page) -> None:
+        """Forget the cached extraction for a page."""
+        self._element_cache.pop(page, None)
+
+    def get_cached_elements(self, page: Page) -> Optional[dict]:
+        """Return the last extraction for a page if it is still current."""
+        return self._element_cache.get(page)
+
+    async def extract_page_elements(self, page: Page, use_cache: bool = True) -> dict:
         """
         Extract interactive elements from page via JS evaluation.
         Adapted from job-application-agent skill_executor._extract_page_elements().
+
+        Results are cached per page until it navigates or is interacted with
+        through this manager, so back-to-back tool calls share one extraction.
         """
-        page_html = await page.content()
+        self._touch()
+        if use_cache:
+            cached = self.get_cached_elements(page)
+            if cached is not None:
+                return cached
 
         elements = await page.evaluate('''
-            () => {
+            (maxHtmlChars) => {
                 const result = {
                     url: window.location.href,
                     title: document.title,
@@ -150,142 +346,183 @@ class BrowserManager:
 
                 // Buttons and clickable elements
                 const buttonSelectors = 'button, input[type="submit"], input[type="button"], [role="button"], a[onclick], a[class*="button"], a[class*="btn"], a[class*="add-to-cart"], [data-testid*="add-to-cart"], [id*="add-to-cart"]';
-                const buttons = document.querySelectorAll(buttonSelectors);
-                let btnIndex = 0;
-                buttons.forEach(btn => {
-                    if (btn.offsetParent === null) return;
-                    const text = (btn.innerText || btn.getAttribute('aria-label') || '').trim();
-                    result.buttons.push({
-                        index: btnIndex++,
-                        text: text,
-                        type: btn.tagName.toLowerCase(),
-                        id: btn.id || null,
-                        classes: (typeof btn.className === 'string' ? btn.className : ''),
-                    });
-                });
-
-                // Input fields
-                const inputs = document.querySelectorAll('input:not([type="hidden"]):not([type="submit"]), textarea');
-                let inputIndex = 0;
-                inputs.forEach(input => {
-                    if (input.offsetParent !== null) {
+
+                // Key text (prices, titles, headings, paragraphs, reviews)
+                const textSelectors = [
+                    'h1', 'h2', 'h3',
+                    '.a-price', '[data-testid*="price"]', '.price', '[class*="price"]',
+                    '[class*="error"]', '[class*="alert"]',
+                    '#feature-bullets li', '#productDescription p',
+                    '[data-hook="review-body"] span',
+                    '[data-hook="review-title"] span',
+                    '.a-profile-name',
+                    '#availability span',
+                    '.a-section p',
+                ].join(', ');
+
+                // label[for] lookup built once, instead of a querySelector per input
+                const labelsFor = new Map();
+                for (const labelEl of document.querySelectorAll('label[for]')) {
+                    const key = labelEl.getAttribute('for');
+                    if (!labelsFor.has(key)) labelsFor.set(key, labelEl);
+                }
+
+                const seenTexts = new Set();
+
+                // One walk over the DOM fills every result list, in document order
+                const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_ELEMENT);
+                let el;
+                while ((el = walker.nextNode())) {
+                    const tag = el.tagName;
+                    const isButton = el.matches(buttonSelectors);
+                    const isInput = tag === 'TEXTAREA' || (tag === 'INPUT' && el.type !== 'hidden' && el.type !== 'submit');
+                    const isSelect = tag === 'SELECT';
+                    const isLink = tag === 'A' && el.hasAttribute('href');
+
+                    // Text content is collected regardless of visibility
+                    if (el.matches(textSelectors)) {
+                        const text = (el.innerText || '').trim();
+                        if (text && text.length >= 3 && !seenTexts.has(text)) {
+                            seenTexts.add(text);
+                            result.text_content.push(text);
+                        }
+                    }
+
+                    if (!(isButton || isInput || isSelect || isLink)) continue;
+                    // Single layout read per candidate element
+                    if (el.offsetParent === null) continue;
+
+                    if (isButton) {
+                        const text = (el.innerText || el.getAttribute('aria-label') || '').trim();
+                        result.buttons.push({
+                            index: result.buttons.length,
+                            text: text,
+                            type: tag.toLowerCase(),
+                            id: el.id || null,
+                            classes: (typeof el.className === 'string' ? el.className : ''),
+                        });
+                    }
+
+                    if (isInput) {
                         let label = '';
-                        const labelEl = document.querySelector(`label[for="${input.id}"]`);
+                        const labelEl = labelsFor.get(el.id);
                         if (labelEl) {
                             label = labelEl.innerText.trim();
                         } else {
-                            const parent = input.closest('label, .form-group, .field');
+                            const parent = el.closest('label, .form-group, .field');
                             if (parent) {
                                 const labelText = parent.querySelector('label, .label, span');
                                 if (labelText) label = labelText.innerText.trim();
                             }
                         }
                         result.inputs.push({
-                            index: inputIndex++,
-                            id: input.id || '',
-                            type: input.type || 'text',
-                            name: input.name || '',
+                            index: result.inputs.length,
+                            id: el.id || '',
+                            type: el.type || 'text',
+                            name: el.name || '',
                             label: label,
-                            placeholder: (input.placeholder || ''),
-                            required: input.required,
+                            placeholder: (el.placeholder || ''),
+                            required: el.required,
                         });
                     }
-                });
-
-                // Select dropdowns
-                const selects = document.querySelectorAll('select');
-                let selectIndex = 0;
-                selects.forEach(select => {
-                    if (select.offsetParent !== null) {
-                        const options = Array.from(select.options).map(o => o.text);
+
+                    if (isSelect) {
                         result.selects.push({
-                            index: selectIndex++,
-                            name: select.name || '',
-                            id: select.id || '',
-                            options: options,
-                            selected: select.value,
+                            index: result.selects.length,
+                            name: el.name || '',
+                            id: el.id || '',
+                            options: Array.from(el.options).map(o => o.text),
+                            selected: el.value,
                         });
                     }
-                });
-
-                // Links
-                const links = document.querySelectorAll('a[href]');
-                let linkIndex = 0;
-                links.forEach(link => {
-                    if (link.offsetParent === null) return;
-                    const text = (link.innerText || link.getAttribute('aria-label') || '').trim();
-                    if (!text || text.length < 2) return;
-                    let href = link.getAttribute('href') || '';
-                    if (href.startsWith('/')) href = window.location.origin + href;
-                    if (!href.startsWith('http')) return;
-                    result.links.push({
-                        index: linkIndex++,
-                        text: text,
-                        href: href,
-                    });
-                });
 
-                // Key text (prices, titles, headings, paragraphs, reviews)
-                const textSelectors = [
-                    'h1', 'h2', 'h3',
-                    '.a-price', '[data-testid*="price"]', '.price', '[class*="price"]',
-                    '[class*="error"]', '[class*="alert"]',
-                    '#feature-bullets li', '#productDescription p',
-                    '[data-hook="review-body"] span',
-                    '[data-hook="review-title"] span',
-                    '.a-profile-name',
-                    '#availability span',
-                    '.a-section p',
-                ].join(', ');
-                const textElements = document.querySelectorAll(textSelectors);
-                const seenTexts = new Set();
-                textElements.forEach(el => {
-                    const text = (el.innerText || '').trim();
-                    if (text && text.length >= 3 && !seenTexts.has(text)) {
-                        seenTexts.add(text);
-                        result.text_content.push(text);
+                    if (isLink) {
+                        const text = (el.innerText || el.getAttribute('aria-label') || '').trim();
+                        if (!text || text.length < 2) continue;
+                        let href = el.getAttribute('href') || '';
+                        if (href.startsWith('/')) href = window.location.origin + href;
+                        if (!href.startsWith('http')) continue;
+                        result.links.push({
+                            index: result.links.length,
+                            text: text,
+                            href: href,
+                        });
                     }
-                });
+                }
+
+                // Body HTML for the selector resolver, pre-sliced to what it will use
+                const html = document.documentElement.outerHTML;
+                const bodyStart = html.indexOf('<body');
+                result.html = (bodyStart > 0 ? html.slice(bodyStart) : html).slice(0, maxHtmlChars);
 
                 return result;
             }
-        ''')
+        ''', MAX_HTML_CHARS)
 
-        elements['html'] = page_html
+        self._element_cache[page] = elements
         return elements
 
-    async def click(self, page: Page, selector: str) -> bool:
-        """Click an element with human-like behavior."""
+    async def selector_exists(self, page: Page, selector: str) -> bool:
+        """Check whether a selector matches anything on the page."""
         try:
-            await asyncio.sleep(random.uniform(0.5, 1.2))
-
             if ':has-text(' in selector or ':has(' in selector:
-                locator = page.locator(selector)
-                if await locator.count() == 0:
-                    logger.warning("No element found for locator: %s", selector)
-                    return False
-                element = await locator.first.element_handle()
-            else:
-                element = await page.query_selector(selector)
+                return await page.locator(selector).count() > 0
+            return await page.query_selector(selector) is not None
+        except Exception:
+            return False
 
-            if not element:
-                logger.warning("No element found: %s", selector)
-                return False
+    async def _visible_target(self, page: Page, selector: str) -> Optional[Locator]:
+        """
+        Locator for the first match of `selector`, scrolled into view, or None if absent or hidden.
 
-            if not await element.is_visible():
-                logger.warning("Element not visible: %s", selector)
+        Plain CSS is checked and scrolled in one evaluate. Whatever document.querySelector
+        rejects or misses (text=, xpath=, >>, :has-text), and display:contents elements,
+        go through Playwright's selector engine.
+        """
+        locator = page.locator(selector).first
+        if ':has-text(' not in selector and ':has(' not in selector:
+            try:
+                visible = await page.evaluate(_PREPARE_TARGET_JS, selector)
+            except Exception:
+                visible = None
+            if visible is not None:
+                if not visible:
+                    logger.warning("Element not visible: %s", selector)
+                    return None
+                return locator
+
+        if await locator.count() == 0:
+            logger.warning("No element found: %s", selector)
+            return None
+        if not await locator.is_visible():
+            logger.warning("Element not visible: %s", selector)
+            return None
+        await locator.scroll_into_view_if_needed()
+        return locator
+
+    async def click(self, page: Page, selector: str) -> bool:
+        """Click an element with human-like behavior."""
+        self._touch()
+        self.invalidate_elements(page)
+        try:
+            waits = _jitter_schedule((0.5, 1.2), (0.2, 0.2), (1.0, 1.0))
+            await _pause(waits[0])
+
+            target = await self._visible_target(page, selector)
+            if target is None:
                 return False
 
-            await element.scroll_into_view_if_needed()
-            await asyncio.sleep(0.2)
+            await _pause(waits[1])
 
             try:
-                await element.click(timeout=3000)
+                # Playwright's click waits for actionability and checks the hit target,
+                # so it won't land on an overlay covering the element
+                await target.click(timeout=3000)
             except Exception:
                 # Fallback to JS click
-                await element.evaluate('el => el.click()')
+                await target.evaluate('el => el.click()')
 
-            await asyncio.sleep(1)
+            await _pause(waits[2] if JITTER else CLICK_SETTLE)
             return True
 
         except Exception as e:
@@ -294,31 +531,29 @@ class BrowserManager:
 
     async def fill(self, page: Page, selector: str, value: str) -> bool:
         """Fill an input field with human-like typing."""
+        self._touch()
+        self.invalidate_elements(page)
         try:
-            await asyncio.sleep(random.uniform(0.5, 1.2))
-
-            element = await page.query_selector(selector)
-            if not element:
-                logger.warning("No element found: %s", selector)
-                return False
+            waits = _jitter_schedule((0.5, 1.2), (0.3, 0.7), (0.3, 0.3))
+            await _pause(waits[0])
 
-            if not await element.is_visible():
-                logger.warning("Element not visible: %s", selector)
+            target = await self._visible_target(page, selector)
+            if target is None:
                 return False
 
-            # JS scroll + click to focus (avoids viewport check issues)
-            await element.evaluate('el => { el.scrollIntoView({block: "center", behavior: "instant"}); }')
-            await asyncio.sleep(0.2)
-            await element.evaluate('el => el.click()')
-            await asyncio.sleep(random.uniform(0.3, 0.7))
+            await _pause(waits[1])
 
-            # Clear and type
-            await element.evaluate('el => el.value = ""')
-            await element.type(value, delay=random.randint(80, 160))
+            # fill() goes through the native value setter and fires input events, so
+            # React-controlled fields see the change; per-key typing only when jitter is on
+            if JITTER:
+                await target.fill("")
+                await target.press_sequentially(value, delay=random.randint(80, 160))
+            else:
+                await target.fill(value)
 
             # Dismiss autocomplete
-            await element.press("Escape")
-            await asyncio.sleep(0.3)
+            await target.press("Escape")
+            await _pause(waits[2])
 
             return True
 
@@ -328,6 +563,8 @@ class BrowserManager:
 
     async def scroll(self, page: Page, direction: str = "down") -> None:
         """Scroll the page up or down."""
+        self._touch()
+        self.invalidate_elements(page)
         pixels = 800 if direction == "down" else -800
         await page.evaluate(f'window.scrollBy(0, {pixels})')
         await asyncio.sleep(0.5)
@@ -335,6 +572,8 @@ class BrowserManager:
 
     async def go_back(self, page: Page) -> str:
         """Navigate back and return the new URL."""
+        self._touch()
+        self.invalidate_elements(page)
         await page.go_back(wait_until="domcontentloaded", timeout=15000)
         await self._random_delay(500, 1000)
         new_url = page.url
@@ -343,6 +582,8 @@ class BrowserManager:
 
     async def select_option(self, page: Page, selector: str, value: str) -> bool:
         """Select a dropdown option by label."""
+        self._touch()
+        self.invalidate_elements(page)
         try:
             element = await page.query_selector(selector)
             if not element:
@@ -355,15 +596,33 @@ class BrowserManager:
             return False
 
     async def close(self) -> None:
-        """Shut down browser and Playwright."""
+        """Shut down browser, Playwright, and the shared HTTP client."""
+        await self._close_browser()
+
+        if self._http:
+            try:
+                await self._http.aclose()
+            except Exception:
+                pass
+            self._http = None
+
+    async def _close_browser(self) -> None:
+        """Shut down browser and Playwright, leaving the HTTP client's pooled connections open."""
+        if self._idle_task and self._idle_task is not asyncio.current_task():
+            self._idle_task.cancel()
+        self._idle_task = None
+
         for page in self._tabs:
             try:
                 await page.close()
             except Exception:
                 pass
         self._tabs.clear()
+        self._blank_pages.clear()
         self._active_tab_index = -1
+        self._element_cache.clear()
 
+        # Closing the persistent context leaves user_data_dir (and its cache) on disk
         if self._context:
             try:
                 await self._context.close()
@@ -389,5 +648,29 @@ class BrowserManager:
 
     @staticmethod
     async def _random_delay(min_ms: int = 500, max_ms: int = 2000):
-        """Human-like delay."""
+        """Human-like delay (only when SHOPPING_JITTER=1)."""
+        if not JITTER:
+            return
         await asyncio.sleep(random.randint(min_ms, max_ms) / 1000)
+
+
+def _jitter_schedule(*ranges: tuple[float, float]) -> tuple[float, ...]:
+    """
+    Pre-sample every wait for one action from (low, high) second ranges.
+
+    Returns zeros when jitter is disabled; otherwise the draws are scaled
+    down so their sum never exceeds JITTER_BUDGET.
+    """
+    if not JITTER:
+        return (0.0,) * len(ranges)
+    waits = [random.uniform(low, high) for low, high in ranges]
+    total = sum(waits)
+    if total > JITTER_BUDGET:
+        waits = [w * JITTER_BUDGET / total for w in waits]
+    return tuple(waits)
+
+
+async def _pause(seconds: float) -> None:
+    """Sleep only for a positive duration, skipping the event-loop hop otherwise."""
+    if seconds > 0:
+        await asyncio.sleep(seconds)
@@ -6,8 +6,16 @@ Uses DeepSeek via OpenRouter to resolve human descriptions to CSS selectors.
 import asyncio
 import json
 import logging
+import os
+import re
+import tempfile
 import time
-from typing import Optional
+from functools import lru_cache
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+from urllib.parse import urlparse
+
+import msgspec
 
 from .llm.openrouter import get_provider
 
@@ -58,8 +66,9 @@ RETAILER_HINTS = {
 }
 
 
+@lru_cache(maxsize=256)
 def _detect_retailer(url: str) -> Optional[str]:
-    """Detect retailer from URL."""
+    """Detect retailer from URL. Memoized: one page's URL is checked several times per action."""
     url_lower = url.lower()
     for retailer, patterns in RETAILER_URL_PATTERNS.items():
         for pattern in patterns:
@@ -106,13 +115,161 @@ KNOWN_SELECTORS: dict[str, dict[str, str]] = {
 }
 
 
-def _fast_resolve(description: str, url: str) -> Optional[str]:
+# Words dropped before comparing a description against KNOWN_SELECTORS keys
+_FILLER_WORDS = {"the", "a", "an", "please", "click"}
+_STOP = _FILLER_WORDS | {"button", "field", "input"}
+
+
+def _normalize(text: str) -> list[str]:
+    """Lowercase, split on punctuation/whitespace, and strip plural 's'."""
+    tokens = re.sub(r"[^a-z0-9 ]+", " ", text.lower()).split()
+    return [t[:-1] if len(t) > 3 and t.endswith("s") and not t.endswith("ss") else t for t in tokens]
+
+
+def _index_known_selectors(table: dict[str, str]) -> tuple[dict, dict]:
+    """Precompute normalized lookups for one retailer's KNOWN_SELECTORS table."""
+    phrases: dict[tuple[str, ...], str] = {}
+    token_sets: dict[frozenset[str], frozenset[str]] = {}
+    for key, selector in table.items():
+        norm = _normalize(key)
+        phrases.setdefault(tuple(t for t in norm if t not in _FILLER_WORDS), selector)
+        key_tokens = frozenset(norm) - _STOP
+        token_sets[key_tokens] = token_sets.get(key_tokens, frozenset()) | {selector}
+    return phrases, token_sets
+
+
+# Built once at import: retailer -> (filler-free phrase -> selector, token set -> selectors)
+KNOWN_SELECTORS_NORM: dict[str, tuple[dict, dict]] = {
+    retailer: _index_known_selectors(table) for retailer, table in KNOWN_SELECTORS.items()
+}
+
+
+def fast_resolve(description: str, url: str) -> Optional[str]:
     """Try to resolve a description to a known selector without calling the LLM."""
     retailer = _detect_retailer(url)
     if not retailer or retailer not in KNOWN_SELECTORS:
         return None
-    desc_lower = description.lower().strip()
-    return KNOWN_SELECTORS[retailer].get(desc_lower)
+    return _fast_resolve_cached(description.lower().strip(), retailer)
+
+
+@lru_cache(maxsize=1024)
+def _fast_resolve_cached(description: str, retailer: str) -> Optional[str]:
+    """KNOWN_SELECTORS lookup for a lowercased description; agents repeat the same asks per site."""
+    table = KNOWN_SELECTORS[retailer]
+    phrases, token_sets = KNOWN_SELECTORS_NORM[retailer]
+
+    if description in table:
+        return table[description]
+
+    # Same phrase once punctuation, plurals, and filler words are ignored
+    desc_norm = _normalize(description)
+    selector = phrases.get(tuple(t for t in desc_norm if t not in _FILLER_WORDS))
+    if selector:
+        return selector
+
+    # Token-set match: equal sets, or a multi-word key contained in the description.
+    # Only answer when every matching key agrees on the selector.
+    tokens = frozenset(desc_norm) - _STOP
+    if not tokens:
+        return None
+    matches = set(token_sets.get(tokens, ()))
+    for key_tokens, selectors in token_sets.items():
+        if len(key_tokens) >= 2 and key_tokens < tokens:
+            matches |= selectors
+    return matches.pop() if len(matches) == 1 else None
+
+
+# Per-kind caps on elements sent to the LLM in the structured digest
+DIGEST_LIMITS = {"buttons": 80, "inputs": 40, "selects": 20, "links": 60}
+
+# Below this many description matches in the digest, fall back to raw HTML
+MIN_DIGEST_MATCHES = 1
+
+# Words too generic to count as a description match (they appear in tags/classes everywhere)
+_GENERIC_WORDS = {"the", "and", "for", "with", "button", "link", "field", "input", "click"}
+
+
+def _build_digest(page_elements: dict) -> dict[str, list[dict]]:
+    """Compact view of the page's interactive elements for the LLM prompt."""
+    return {
+        kind: page_elements.get(kind, [])[:limit]
+        for kind, limit in DIGEST_LIMITS.items()
+    }
+
+
+def _count_digest_matches(digest: dict[str, list[dict]], description: str) -> int:
+    """Count digest elements whose text/attributes mention a word from the description."""
+    words = [
+        w for w in re.findall(r"[a-z0-9]+", description.lower())
+        if len(w) > 2 and w not in _GENERIC_WORDS
+    ]
+    if not words:
+        return 0
+    matches = 0
+    for elements in digest.values():
+        for el in elements:
+            haystack = " ".join(str(v) for v in el.values() if v).lower()
+            if any(w in haystack for w in words):
+                matches += 1
+    return matches
+
+
+# Persistent cache of LLM resolutions: "site|normalized description|element_type" -> selector
+_selector_cache: dict[str, str] | None = None
+
+
+def _selector_cache_path() -> Path:
+    """On-disk location of the selector cache (override with SHOPPING_SELECTOR_CACHE)."""
+    return Path(os.environ.get(
+        "SHOPPING_SELECTOR_CACHE",
+        "~/.cache/shopping_tool/selectors.json",
+    )).expanduser()
+
+
+def _load_selector_cache() -> dict[str, str]:
+    """Load the on-disk selector cache once per process."""
+    global _selector_cache
+    if _selector_cache is None:
+        try:
+            _selector_cache = json.loads(_selector_cache_path().read_text())
+        except (OSError, json.JSONDecodeError):
+            _selector_cache = {}
+    return _selector_cache
+
+
+def _save_selector_cache() -> None:
+    """Atomically write the selector cache to disk."""
+    path = _selector_cache_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=path.parent, suffix=".tmp", delete=False) as f:
+            json.dump(_load_selector_cache(), f, indent=2)
+        os.replace(f.name, path)
+    except OSError as e:
+        logger.debug("Selector cache write failed: %s", e)
+
+
+def _selector_cache_key(description: str, element_type: str, url: str) -> Optional[str]:
+    """Cache key for a resolution, or None when the site can't be identified."""
+    site = _detect_retailer(url) or urlparse(url).netloc.lower()
+    if not site:
+        return None
+    return f"{site}|{' '.join(_normalize(description))}|{element_type}"
+
+
+# Body of the first ``` or ```json fence in a reply (closing fence optional: replies get cut off)
+_FENCE_RE = re.compile(r"```(?:json)?(.*?)(?:```|\Z)", re.DOTALL)
+
+
+def _parse_json_response(content: str) -> dict:
+    """Parse the resolver's JSON reply, tolerating markdown fences from models without JSON mode."""
+    try:
+        return msgspec.json.decode(content)
+    except msgspec.DecodeError:
+        match = _FENCE_RE.search(content)
+        if match:
+            content = match.group(1)
+        return msgspec.json.decode(content.strip())
 
 
 async def resolve_selector(
@@ -120,6 +277,7 @@ async def resolve_selector(
     element_type: str,
     page_elements: dict,
     model: str = "deepseek",
+    verify: Callable[[str], Awaitable[bool]] | None = None,
 ) -> Optional[str]:
     """
     Use DeepSeek to resolve a human description to a CSS selector.
@@ -129,17 +287,30 @@ async def resolve_selector(
         element_type: One of "button", "input", "select", "link"
         page_elements: Dict from BrowserManager.extract_page_elements() with 'html' key
         model: LLM model shortcut (default: "deepseek")
+        verify: Optional check that a cached selector still matches on the live page
 
     Returns:
         CSS selector string for Playwright, or None if not found
     """
     # Fast-path: check known selectors first (no LLM call needed)
     url = page_elements.get("url", "")
-    fast_result = _fast_resolve(description, url)
+    fast_result = fast_resolve(description, url)
     if fast_result:
         logger.info("Fast-resolved '%s' -> %s", description, fast_result)
         return fast_result
 
+    # Previously resolved by the LLM on this site
+    cache_key = _selector_cache_key(description, element_type, url)
+    cache = _load_selector_cache()
+    cached = cache.get(cache_key) if cache_key else None
+    if cached:
+        if verify is None or await verify(cached):
+            logger.info("Cache-resolved '%s' -> %s", description, cached)
+            return cached
+        logger.info("Cached selector for '%s' no longer matches — re-resolving", description)
+        del cache[cache_key]
+        _save_selector_cache()
+
     system = """You resolve element descriptions to CSS selectors for browser automation on e-commerce websites.
 
 ## OUTPUT FORMAT
@@ -163,7 +334,12 @@ Return ONLY a JSON object:
 3. Avoid selectors that match multiple elements — be specific
 4. If an element has a unique ID, use it (e.g., #add-to-cart-button)
 5. For price elements, prefer .a-offscreen or the innermost span containing the value
-6. Return ONLY the JSON object, no other text"""
+6. Return ONLY the JSON object, no other text
+
+## PAGE INPUT
+You get either PAGE ELEMENTS (JSON) — the page's visible buttons, inputs, selects, and links
+with their tag, id, classes, name, label, text, and href — or raw PAGE HTML. Build the
+selector from the attributes shown; use :has-text() when only the text is distinctive."""
 
     # Add retailer-specific hints
     retailer = _detect_retailer(url)
@@ -171,26 +347,31 @@ Return ONLY a JSON object:
     if hints:
         system += hints
 
-    # Get HTML, truncate if needed
-    page_html = page_elements.get("html", "")
-    max_length = 100_000
-    if len(page_html) > max_length:
-        body_start = page_html.find("<body")
-        if body_start > 0:
-            page_html = page_html[body_start : body_start + max_length]
-        else:
-            page_html = page_html[:max_length]
-        page_html += "\n<!-- HTML truncated -->"
+    # Prefer the structured element digest — far smaller than the page HTML
+    digest = _build_digest(page_elements)
+    if _count_digest_matches(digest, description) >= MIN_DIGEST_MATCHES:
+        page_context = json.dumps(digest, separators=(",", ":"))
+        page_section = f"PAGE ELEMENTS (JSON):\n```json\n{page_context}\n```"
+    else:
+        # Fall back to HTML — extract_page_elements already slices it to the body
+        # and MAX_HTML_CHARS, so this only truncates dicts built elsewhere
+        page_context = page_elements.get("html", "")
+        max_length = 100_000
+        if len(page_context) > max_length:
+            body_start = page_context.find("<body")
+            if body_start > 0:
+                page_context = page_context[body_start : body_start + max_length]
+            else:
+                page_context = page_context[:max_length]
+            page_context += "\n<!-- HTML truncated -->"
+        page_section = f"PAGE HTML:\n```html\n{page_context}\n```"
 
     prompt = f"""Find the element matching this description:
 "{description}"
 
 Element type hint: {element_type}
 
-PAGE HTML:
-```html
-{page_html}
-```
+{page_section}
 
 Return JSON with selector, found, and reason."""
 
@@ -200,13 +381,23 @@ Return JSON with selector, found, and reason."""
         logger.error("OPENROUTER_API_KEY not set — cannot resolve selectors")
         return None
 
-    logger.info("Resolving '%s' (type=%s, html=%d chars)", description, element_type, len(page_html))
+    logger.info("Resolving '%s' (type=%s, context=%d chars)", description, element_type, len(page_context))
     start = time.time()
 
     for attempt in range(3):
         try:
             response = await asyncio.wait_for(
-                provider.run(prompt, system=system, max_tokens=500),
+                provider.run(
+                    prompt,
+                    system=system,
+                    max_tokens=500,
+                    response_format={"type": "json_object"},
+                    # First try is deterministic (and cacheable); a retry samples at the
+                    # default temperature so it can't replay the reply that failed
+                    temperature=0 if attempt == 0 else None,
+                    # Only a reply that parses is cached for the next resolution
+                    validate=_parse_json_response,
+                ),
                 timeout=60.0,
             )
             content = response.content
@@ -219,17 +410,14 @@ Return JSON with selector, found, and reason."""
                 logger.warning("Empty response after 3 attempts")
                 return None
 
-            # Extract JSON from markdown fences if present
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
-
-            data = json.loads(content.strip())
+            data = _parse_json_response(content)
 
             if data.get("found", False):
                 selector = data.get("selector", "")
                 logger.info("Resolved '%s' -> %s (%s)", description, selector, data.get("reason", ""))
+                if selector and cache_key:
+                    cache[cache_key] = selector
+                    _save_selector_cache()
                 return selector
             else:
                 logger.info("Element not found: '%s' — %s", description, data.get("reason", ""))
@@ -241,10 +429,10 @@ Return JSON with selector, found, and reason."""
                 continue
             logger.error("Timeout after 3 attempts (%.1fs)", time.time() - start)
             return None
-        except json.JSONDecodeError as e:
+        except msgspec.DecodeError as e:
+            # No back-off — a bad parse is a model glitch, not a transport problem
             if attempt < 2:
                 logger.warning("JSON parse error (attempt %d/3): %s — retrying", attempt + 1, e)
-                await asyncio.sleep((attempt + 1) * 2)
                 continue
             logger.error("JSON parse error after 3 attempts: %s", e)
             return None
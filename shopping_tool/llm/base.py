@@ -1,10 +1,10 @@
 """Abstract base class for LLM providers."""
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import AsyncIterator, Any
+from typing import AsyncIterator, Any, Callable
 
 
-@dataclass
+@dataclass(slots=True)
 class LLMResponse:
     """Response from an LLM provider."""
     content: str
@@ -21,11 +21,31 @@ class LLMProvider(ABC):
         self.model = model
 
     @abstractmethod
-    async def run(self, query: str, **kwargs: Any) -> LLMResponse:
-        """Execute a query against the LLM."""
+    async def run(
+        self,
+        query: str,
+        response_format: dict[str, Any] | None = None,
+        cache: bool = True,
+        validate: Callable[[str], Any] | None = None,
+        **kwargs: Any,
+    ) -> LLMResponse:
+        """
+        Execute a query against the LLM.
+
+        response_format requests structured (e.g. JSON) output. Deterministic
+        (temperature=0) replies may be reused for identical queries; cache=False
+        forces a fresh completion regardless. validate is called on the reply's
+        content before it is kept for reuse: a reply it raises on is still
+        returned, but never served again.
+        """
         ...
 
     @abstractmethod
-    async def run_stream(self, query: str, **kwargs: Any) -> AsyncIterator[str]:
-        """Execute a streaming query against the LLM."""
+    async def run_stream(
+        self,
+        query: str,
+        sanitize: bool = False,
+        **kwargs: Any,
+    ) -> AsyncIterator[str]:
+        """Execute a streaming query against the LLM. sanitize redacts PII/credentials incrementally."""
         ...
@@ -1,14 +1,23 @@
 """OpenRouter LLM provider — unified access to DeepSeek, Grok, Claude, etc."""
+import asyncio
+import hashlib
+import importlib.util
 import os
-from typing import AsyncIterator, Any
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import AsyncIterator, Any, Awaitable, Callable, Iterable
 
+import httpx
+import msgspec
 from openai import AsyncOpenAI
 
+from ..output_sanitizer import StreamSanitizer
 from .base import LLMProvider, LLMResponse
 
 
-# Model shortcuts
-OPENROUTER_MODELS = {
+# Model shortcuts (read-only)
+OPENROUTER_MODELS = MappingProxyType({
     # DeepSeek (default for element resolution — cheap and fast)
     "deepseek": "deepseek/deepseek-chat",
     "deepseek-v3": "deepseek/deepseek-chat",
@@ -33,7 +42,125 @@ OPENROUTER_MODELS = {
     # Gemini
     "gemini-flash": "google/gemini-3-flash-preview",
     "gemini-pro": "google/gemini-3-pro-preview",
-}
+})
+
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Pool for the shared LLM client — keeps sockets open between resolver calls
+LLM_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=300)
+LLM_HTTP_TIMEOUT = httpx.Timeout(connect=5.0, read=120.0, write=60.0, pool=5.0)
+
+# HTTP/2 needs the h2 package (httpx[http2]); fall back to HTTP/1.1 without it
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Process-wide AsyncOpenAI clients keyed by (api_key, base_url, headers)
+_CLIENT_CACHE: dict[str, AsyncOpenAI] = {}
+
+
+def _shared_client(api_key: str, base_url: str, headers: dict[str, str]) -> AsyncOpenAI:
+    """Return the cached AsyncOpenAI client for these settings, creating it on first use."""
+    key = hashlib.sha256(repr((api_key, base_url, sorted(headers.items()))).encode()).hexdigest()
+    client = _CLIENT_CACHE.get(key)
+    if client is None or client.is_closed():
+        client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            default_headers=headers,
+            http_client=httpx.AsyncClient(
+                http2=_HTTP2,
+                limits=LLM_HTTP_LIMITS,
+                timeout=LLM_HTTP_TIMEOUT,
+            ),
+        )
+        _CLIENT_CACHE[key] = client
+    return client
+
+
+async def close_shared_clients() -> None:
+    """Close every cached client. Call on shutdown from the running event loop."""
+    clients = list(_CLIENT_CACHE.values())
+    _CLIENT_CACHE.clear()
+    for client in clients:
+        try:
+            await client.close()
+        except Exception:
+            pass
+
+
+def _request_key(model: str, messages: list[dict], params: dict[str, Any]) -> bytes:
+    """Identity of a completion request: same model, messages, and parameters."""
+    payload = msgspec.json.encode([model, messages, params], enc_hook=str, order="deterministic")
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+class RequestCoalescer:
+    """
+    Shares one in-flight completion among identical concurrent run() calls.
+
+    Distinct prompts still go out as separate requests (multiplexed over the
+    shared client); only exact duplicates collapse into a single round trip.
+    This stands in for multi-prompt batching: chat completions answer one
+    conversation per request, so packing unrelated prompts into one call
+    would change the replies.
+    """
+
+    def __init__(self):
+        self._inflight: dict[bytes, asyncio.Future] = {}
+
+    async def run(self, key: bytes, call: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one caller timing out doesn't cancel the request for the others
+        return await asyncio.shield(task)
+
+
+class ResponseCache:
+    """Small LRU cache of run() results with per-entry expiry."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 600.0):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._entries: OrderedDict[bytes, tuple[float, LLMResponse]] = OrderedDict()
+
+    def get(self, key: bytes) -> LLMResponse | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def put(self, key: bytes, response: LLMResponse) -> None:
+        self._entries[key] = (time.monotonic() + self._ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def _is_valid(validate: Callable[[str], Any] | None, content: str) -> bool:
+    """Whether the caller can use `content`; only such replies are worth caching."""
+    if validate is None:
+        return True
+    try:
+        validate(content)
+    except Exception:
+        return False
+    return True
+
+
+# Module-level: providers are cheap and created per call, so per-instance state wouldn't be shared
+_coalescer = RequestCoalescer()
+_response_cache = ResponseCache()
 
 
 def get_provider(
@@ -55,25 +182,48 @@ class OpenRouterProvider(LLMProvider):
         api_key: str,
         model: str = "deepseek",
         site_name: str = "Shopping Assistant",
+        http_client: httpx.AsyncClient | None = None,
+        skip_cache_models: Iterable[str] = (),
     ):
         resolved_model = OPENROUTER_MODELS.get(model, model)
         super().__init__(api_key, resolved_model)
+        # Models whose replies are never cached or shared, even at temperature 0
+        self._skip_cache_models = frozenset(OPENROUTER_MODELS.get(m, m) for m in skip_cache_models)
 
-        self._client = AsyncOpenAI(
-            api_key=api_key,
-            base_url="https://openrouter.ai/api/v1",
-            default_headers={"X-Title": site_name},
-        )
+        headers = {"X-Title": site_name}
+        if http_client is not None:
+            self._client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=OPENROUTER_BASE_URL,
+                default_headers=headers,
+                http_client=http_client,
+            )
+        else:
+            # Shared across instances so each call reuses a warm connection
+            self._client = _shared_client(api_key, OPENROUTER_BASE_URL, headers)
 
     def _resolve_model(self, kwargs: dict[str, Any]) -> str:
-        """Resolve model, supporting shortcuts."""
-        if "model" in kwargs:
-            model = kwargs.pop("model")
-            return OPENROUTER_MODELS.get(model, model)
-        return self.model
-
-    async def run(self, query: str, **kwargs: Any) -> LLMResponse:
-        """Execute a query against OpenRouter."""
+        """Resolve a per-call model override, supporting shortcuts; default resolved in __init__."""
+        if "model" not in kwargs:
+            return self.model
+        model = kwargs.pop("model")
+        return OPENROUTER_MODELS.get(model, model)
+
+    async def run(
+        self,
+        query: str,
+        response_format: dict[str, Any] | None = None,
+        cache: bool = True,
+        validate: Callable[[str], Any] | None = None,
+        **kwargs: Any,
+    ) -> LLMResponse:
+        """
+        Execute a query against OpenRouter.
+
+        Deterministic (temperature=0) queries identical to one in flight or answered
+        within the TTL share that reply; sampled ones always get their own completion.
+        A reply `validate` raises on isn't cached, so a retry can't be handed it again.
+        """
         model = self._resolve_model(kwargs)
 
         messages = []
@@ -81,13 +231,28 @@ class OpenRouterProvider(LLMProvider):
             messages.append({"role": "system", "content": kwargs.pop("system")})
         messages.append({"role": "user", "content": query})
 
-        response = await self._client.chat.completions.create(
-            model=model,
-            messages=messages,
-            max_tokens=kwargs.get("max_tokens", 4096),
-        )
+        params: dict[str, Any] = {"max_tokens": kwargs.get("max_tokens", 4096)}
+        if response_format:
+            params["response_format"] = response_format
+        temperature = kwargs.get("temperature")
+        if temperature is not None:
+            params["temperature"] = temperature
+
+        def create() -> Awaitable[Any]:
+            return self._client.chat.completions.create(model=model, messages=messages, **params)
+
+        # A sampled completion (temperature unset or above 0) belongs to its caller alone
+        cacheable = cache and temperature == 0 and model not in self._skip_cache_models
+        if cacheable:
+            key = _request_key(model, messages, params)
+            cached = _response_cache.get(key)
+            if cached is not None:
+                return cached
+            response = await _coalescer.run(key, create)
+        else:
+            response = await create()
 
-        return LLMResponse(
+        result = LLMResponse(
             content=response.choices[0].message.content or "",
             model=response.model,
             usage={
@@ -96,9 +261,17 @@ class OpenRouterProvider(LLMProvider):
             },
             raw_response=response.model_dump(),
         )
+        if cacheable and result.content and _is_valid(validate, result.content):
+            _response_cache.put(key, result)
+        return result
 
-    async def run_stream(self, query: str, **kwargs: Any) -> AsyncIterator[str]:
-        """Execute a streaming query against OpenRouter."""
+    async def run_stream(
+        self,
+        query: str,
+        sanitize: bool = False,
+        **kwargs: Any,
+    ) -> AsyncIterator[str]:
+        """Execute a streaming query against OpenRouter, optionally redacting chunks as they arrive."""
         model = self._resolve_model(kwargs)
 
         messages = []
@@ -113,6 +286,19 @@ class OpenRouterProvider(LLMProvider):
             stream=True,
         )
 
+        sanitizer = StreamSanitizer() if sanitize else None
         async for chunk in stream:
-            if chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+            content = chunk.choices[0].delta.content
+            if not content:
+                continue
+            if sanitizer is None:
+                yield content
+                continue
+            safe = sanitizer.feed(content)
+            if safe:
+                yield safe
+
+        if sanitizer is not None:
+            tail = sanitizer.flush()
+            if tail:
+                yield tail
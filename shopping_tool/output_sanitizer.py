@@ -1,29 +1,128 @@
 """Output sanitization — redact PII, credit cards, and credentials before returning to LLM."""
 import re
+from functools import lru_cache
 
-# Credential patterns (from email-agent)
-_CREDENTIAL_PATTERNS = [
-    re.compile(r"(?i)(api[_-]?key|secret|password|token)\s*[=:]\s*\S+"),
-    re.compile(r"sk-[a-zA-Z0-9]{20,}"),      # OpenAI/Stripe keys
-    re.compile(r"ghp_[a-zA-Z0-9]{36}"),       # GitHub tokens
-    re.compile(r"AKIA[A-Z0-9]{16}"),          # AWS keys
+try:
+    # RE2 matches in linear time, so the fused patterns below can't backtrack on large outputs
+    import re2 as _re
+except ImportError:
+    import re as _re
+
+# Redaction patterns, fused into one alternation per pass (see _PASSES).
+# Order matters: at a given position the first alternative that matches wins.
+# Digit and whitespace sets are named (%(d)s, %(s)s) rather than written \d and \s:
+# RE2's are ASCII-only while stdlib re's are Unicode-aware, see _CHAR_SETS.
+_PATTERNS = [
+    ("credential", r"(?i:api[_-]?key|secret|password|token)[%(s)s]*[=:][%(s)s]*[^%(s)s]+"),  # (from email-agent)
+    ("openai_key", r"sk-[a-zA-Z0-9]{20,}"),                            # OpenAI/Stripe keys
+    ("github_token", r"ghp_[a-zA-Z0-9]{36}"),                          # GitHub tokens
+    ("aws_key", r"AKIA[A-Z0-9]{16}"),                                  # AWS keys
+    ("card", r"\b(?:[%(d)s]{4}[-%(s)s]?){2,4}[%(d)s]{1,4}\b"),         # 13-19 digits, optionally separated
+    ("ssn", r"\b[%(d)s]{3}-[%(d)s]{2}-[%(d)s]{4}\b"),
 ]
 
-# Credit card number patterns (13-19 digits, optionally separated)
-_CARD_NUMBER_PATTERN = re.compile(
-    r"\b(?:\d{4}[-\s]?){2,4}\d{1,4}\b"
+# Passes run in this order, each over the previous one's output, as separate regexes did:
+# - "password=sk-..." keeps its value redacted whole only if credentials go before keys
+#   (a key match would otherwise swallow "password" and leave the value)
+# - a number glued to a secret ("4111111111111234password=x") only gets the \b its
+#   pattern needs from the "[REDACTED]" left by the earlier passes
+# Key prefixes can't occur inside one another's matches, nor card inside SSN, so
+# alternatives within a pass are safe to fuse.
+_PASSES = (
+    ("credential",),
+    ("openai_key", "github_token", "aws_key"),
+    ("card", "ssn"),
 )
 
-# SSN pattern
-_SSN_PATTERN = re.compile(r"\b\d{3}-\d{2}-\d{4}\b")
+# ASCII text goes to _re with these sets spelled out, which both engines read exactly as
+# stdlib's \d and \s on ASCII (\s there includes \v and \x1c-\x1f, RE2's does not).
+# Any other text goes to stdlib re with its Unicode-aware sets, whichever _re is.
+_CHAR_SETS = {
+    True: (_re, {"d": "0-9", "s": r"\t-\r\x1c- "}),
+    False: (re, {"d": r"\d", "s": r"\s"}),
+}
+
+# ANSI escape codes, stripped before any pattern is matched
+_ANSI_SEQUENCE = re.compile(r"\x1b\[[0-9;]*m")
+# The start of one that the next streamed chunk may still complete
+_ANSI_PREFIX = re.compile(r"\x1b(?:\[[0-9;]*)?")
+
+# Replacement per alternative; credentials not listed get "[REDACTED]"
+_REPLACEMENTS = {"card": "[CARD REDACTED]", "ssn": "[SSN REDACTED]"}
+
+
+def _replace(match) -> str:
+    return _REPLACEMENTS.get(match.lastgroup, "[REDACTED]")
+
+
+# Cheap substring sentinels: a pattern can only match if its sentinel is present
+_CREDENTIAL_WORDS = ("api", "secret", "password", "token")
+_KEY_PREFIXES = (("openai_key", "sk-"), ("github_token", "ghp_"), ("aws_key", "AKIA"))
+_ASCII_DIGITS = "0123456789"
+_MIN_PII_DIGITS = 9  # shortest card match (two groups of 4 + 1) and every SSN
+
+if _re.__name__ == "re2":
+    # Every card match starts with 4 digits in a row and every SSN ends with them.
+    # RE2 finds such a run in one linear pass, ~2x faster than counting each digit.
+    _DIGIT_RUN = _re.compile(r"[0-9]{4}")
+
+    def _may_contain_ascii_pii_digits(text: str) -> bool:
+        return _DIGIT_RUN.search(text) is not None
+else:
+    # The stdlib engine is slower at that search than ten C-level str.count passes
+    def _may_contain_ascii_pii_digits(text: str) -> bool:
+        return sum(map(text.count, _ASCII_DIGITS)) >= _MIN_PII_DIGITS
+
+# Non-ASCII text is matched with stdlib's \d, which takes fullwidth, Arabic-Indic, etc.
+# digits too, so its gate looks for the same four-digit run in any script
+_UNICODE_DIGIT_RUN = re.compile(r"\d{4}")
+
+
+def _may_contain_pii_digits(text: str) -> bool:
+    if text.isascii():
+        return _may_contain_ascii_pii_digits(text)
+    return _UNICODE_DIGIT_RUN.search(text) is not None
 
-# ANSI escape codes
-_ANSI_PATTERN = re.compile(r"\x1b\[[0-9;]*m")
+
+def _candidate_patterns(text: str) -> tuple[str, ...]:
+    """Names of the patterns in _PATTERNS that could match somewhere in text."""
+    found = set()
+    for name, prefix in _KEY_PREFIXES:
+        if prefix in text:
+            found.add(name)
+    if _may_contain_pii_digits(text):
+        found.add("card")
+        if "-" in text:
+            found.add("ssn")
+    # casefold, not lower: (?i:) also matches e.g. "\u017f" (long s) against "s"
+    lowered = text.lower() if text.isascii() else text.casefold()
+    if any(word in lowered for word in _CREDENTIAL_WORDS):
+        found.add("credential")
+    return tuple(name for name, _ in _PATTERNS if name in found)
+
+
+def _fused_source(names: tuple[str, ...], char_sets: dict[str, str]) -> str:
+    """One alternation over a subset of _PATTERNS, keeping their relative order."""
+    return "|".join(f"(?P<{name}>{pattern % char_sets})" for name, pattern in _PATTERNS if name in names)
+
+
+@lru_cache(maxsize=None)
+def _pattern_for(names: tuple[str, ...], is_ascii: bool = True):
+    """Compiled fused regex for `names`, on the engine that matches text of that kind."""
+    engine, char_sets = _CHAR_SETS[is_ascii]
+    return engine.compile(_fused_source(names, char_sets))
+
+
+# str.translate table deleting every ASCII non-digit
+_ASCII_NON_DIGITS = str.maketrans("", "", "".join(chr(c) for c in range(128) if not chr(c).isdigit()))
 
 
 def redact_card_number(number: str) -> str:
     """Mask a card number to show only last 4 digits."""
-    digits = re.sub(r"\D", "", number)
+    if number.isascii():
+        digits = number.translate(_ASCII_NON_DIGITS)
+    else:
+        digits = "".join(filter(str.isdecimal, number))
     if len(digits) < 4:
         return "****"
     return f"****-****-****-{digits[-4:]}"
@@ -37,6 +136,49 @@ def redact_email(email: str) -> str:
     return f"{local[0]}***@{domain}"
 
 
+def _redact(text: str) -> str:
+    # ANSI codes go in a pass of their own first: one inside a secret
+    # ("sk-\x1b[31mabc...") would otherwise keep the pattern from matching it
+    if "\x1b" in text:
+        text = _ANSI_SEQUENCE.sub("", text)
+    # Only run the alternatives whose sentinels appear; clean text skips the regex entirely
+    names = _candidate_patterns(text)
+    is_ascii = text.isascii()
+    for group in _PASSES:
+        wanted = tuple(name for name in names if name in group)
+        if wanted:
+            text = _pattern_for(wanted, is_ascii).sub(_replace, text)
+    return text
+
+
+# Sanitized output past max_chars that a head cut from a long input must have before it's
+# trusted: any partial match left unredacted at the cut (at most ~40 chars) falls in it
+_TRUNCATE_MARGIN = 64
+
+
+def _ansi_safe_cut(text: str, cut: int) -> int:
+    """Move `cut` past the end of an ANSI escape sequence it would split."""
+    start = text.rfind("\x1b", 0, cut)
+    if start != -1:
+        match = _ANSI_SEQUENCE.match(text, start)
+        if match and match.end() > cut:
+            return match.end()
+    return cut
+
+
+def _redacted_head(text: str, max_chars: int) -> str:
+    """_redact(text), or for text far over max_chars, a head of it that fills max_chars."""
+    # Redaction can shrink text (ANSI codes, long credentials), so grow the cut until
+    # the redacted head is long enough to truncate, exactly as the full text would be
+    cut = 2 * max_chars + _TRUNCATE_MARGIN
+    while cut < len(text):
+        head = _redact(text[:_ansi_safe_cut(text, cut)])
+        if len(head) > max_chars + _TRUNCATE_MARGIN:
+            return head
+        cut *= 2
+    return _redact(text)
+
+
 def sanitize_output(text: str, max_chars: int = 50000) -> str:
     """
     Sanitize text before returning to the LLM.
@@ -47,21 +189,94 @@ def sanitize_output(text: str, max_chars: int = 50000) -> str:
     - Redacts SSNs
     - Truncates to max_chars
     """
-    # Strip ANSI
-    text = _ANSI_PATTERN.sub("", text)
-
-    # Redact credentials
-    for pattern in _CREDENTIAL_PATTERNS:
-        text = pattern.sub("[REDACTED]", text)
-
-    # Redact credit card numbers
-    text = _CARD_NUMBER_PATTERN.sub("[CARD REDACTED]", text)
+    text = _redacted_head(text, max_chars)
 
-    # Redact SSNs
-    text = _SSN_PATTERN.sub("[SSN REDACTED]", text)
-
-    # Truncate
     if len(text) > max_chars:
         text = text[:max_chars] + f"\n\n[... truncated at {max_chars} chars]"
 
     return text
+
+
+class _StreamPass:
+    """One _PASSES group applied incrementally; see StreamSanitizer."""
+
+    def __init__(self, names: tuple[str, ...], window: int):
+        self._names = names
+        self._window = window
+        self._buf = ""
+        # Last character already released: \b at the start of the buffer must see it,
+        # or every chunk boundary would look like a word boundary
+        self._context = ""
+
+    def _release(self, text: str, final: bool) -> str:
+        start = len(self._context)
+        buf = self._context + self._buf + text
+        cut = len(buf) if final else len(buf) - self._window
+        if cut <= start:
+            self._buf = buf[start:]
+            return ""
+
+        pieces = []
+        pos = start
+        for match in _pattern_for(self._names, buf.isascii()).finditer(buf, start):
+            if match.end() > cut:
+                # Might still grow with the next chunk — hold it back
+                cut = min(cut, match.start())
+                break
+            pieces.append(buf[pos:match.start()])
+            pieces.append(_replace(match))
+            pos = match.end()
+        pieces.append(buf[pos:cut])
+
+        self._context = buf[max(cut - 1, 0):cut]
+        self._buf = buf[cut:]
+        return "".join(pieces)
+
+    def feed(self, text: str) -> str:
+        return self._release(text, final=False)
+
+    def flush(self, text: str) -> str:
+        released = self._release(text, final=True)
+        self._context = ""
+        return released
+
+
+class StreamSanitizer:
+    """
+    Incremental sanitize_output for streamed text (no truncation).
+
+    Each redaction pass holds back the last `window` characters it has seen,
+    so a secret split across chunk boundaries is still matched whole. Text is
+    released only up to a point no match straddles, and matching resumes with
+    the released text as left context, so the output doesn't depend on how
+    the stream was chunked.
+    """
+
+    def __init__(self, window: int = 64):
+        self._passes = [_StreamPass(names, window) for names in _PASSES]
+        self._escape = ""  # unfinished escape sequence at the end of the last chunk
+
+    def _strip(self, chunk: str) -> str:
+        """Strip ANSI codes from chunk, holding back a trailing unfinished one."""
+        text = self._escape + chunk
+        self._escape = ""
+        start = text.rfind("\x1b")
+        if start == -1:
+            return text
+        if _ANSI_PREFIX.fullmatch(text, start):
+            text, self._escape = text[:start], text[start:]
+        return _ANSI_SEQUENCE.sub("", text)
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk; return the sanitized text that is now safe to emit."""
+        text = self._strip(chunk)
+        for stage in self._passes:
+            text = stage.feed(text)
+        return text
+
+    def flush(self) -> str:
+        """Sanitize and return whatever is still held back."""
+        text, self._escape = self._escape, ""
+        for stage in self._passes:
+            text = stage.flush(text)
+        return text
@@ -1,13 +1,24 @@
-"""Fernet-based encryption for user profile data at rest."""
-import json
+"""AES-GCM encryption for user profile data at rest."""
+import base64
 import os
+from functools import cached_property
 from pathlib import Path
 
+import msgspec
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+# Blob layout: version byte + 12-byte nonce + ciphertext/tag.
+# Fernet tokens (written before v2) start with b"g", so the two never collide.
+_VERSION_AESGCM = b"\x02"
+_NONCE_SIZE = 12
+_AAD = b"profile-v2"
 
 
 class ProfileCrypto:
-    """Encrypts/decrypts user profile data using Fernet (AES-128-CBC + HMAC)."""
+    """Encrypts/decrypts user profile data using AES-256-GCM; reads legacy Fernet blobs."""
 
     def __init__(self, key_path: Path | None = None):
         self._key_path = key_path or Path.home() / ".shopping_assistant_key"
@@ -23,16 +34,36 @@ class ProfileCrypto:
         os.chmod(self._key_path, 0o600)
         return key
 
+    @cached_property
+    def _key(self) -> bytes:
+        """Key file contents, read (or created) on first use and kept for this instance."""
+        return self._get_or_create_key()
+
+    @cached_property
+    def _aead(self) -> AESGCM:
+        """AES-GCM cipher keyed from the stored Fernet key, so existing key files keep working."""
+        derived = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=_AAD).derive(
+            base64.urlsafe_b64decode(self._key)
+        )
+        return AESGCM(derived)
+
+    def encrypt_bytes(self, plaintext: bytes) -> bytes:
+        """Encrypt already-serialized bytes."""
+        nonce = os.urandom(_NONCE_SIZE)
+        return _VERSION_AESGCM + nonce + self._aead.encrypt(nonce, plaintext, _AAD)
+
+    def decrypt_bytes(self, encrypted: bytes) -> bytes:
+        """Decrypt to the serialized bytes, leaving parsing to the caller."""
+        if not encrypted.startswith(_VERSION_AESGCM):
+            # Written before the AES-GCM switch
+            return Fernet(self._key).decrypt(encrypted)
+        nonce = encrypted[1:1 + _NONCE_SIZE]
+        return self._aead.decrypt(nonce, encrypted[1 + _NONCE_SIZE:], _AAD)
+
     def encrypt(self, data: dict) -> bytes:
         """Encrypt a dict to bytes."""
-        key = self._get_or_create_key()
-        f = Fernet(key)
-        plaintext = json.dumps(data).encode()
-        return f.encrypt(plaintext)
+        return self.encrypt_bytes(msgspec.json.encode(data))
 
     def decrypt(self, encrypted: bytes) -> dict:
         """Decrypt bytes back to a dict."""
-        key = self._get_or_create_key()
-        f = Fernet(key)
-        plaintext = f.decrypt(encrypted)
-        return json.loads(plaintext.decode())
+        return msgspec.json.decode(self.decrypt_bytes(encrypted))
@@ -1,7 +1,10 @@
 """Profile manager — load, save, and redact user data."""
+import asyncio
 import logging
 from pathlib import Path
 
+import msgspec
+
 from .crypto import ProfileCrypto
 from .schema import UserProfile
 
@@ -18,6 +21,12 @@ class ProfileManager:
         self._path = profile_path or DEFAULT_PROFILE_PATH
         self._crypto = ProfileCrypto()
         self._cached: UserProfile | None = None
+        # st_mtime_ns of the file _cached came from; a mismatch means it was rewritten elsewhere
+        self._cached_mtime: int | None = None
+        # Derived views of _cached, built on first use and dropped whenever it changes
+        self._redacted_cache: dict | None = None
+        self._shipping_cache: dict | None = None
+        self._payment_cache: dict | None = None
 
     def exists(self) -> bool:
         """Check if a profile exists on disk."""
@@ -26,30 +35,66 @@ class ProfileManager:
     def save(self, profile: UserProfile) -> None:
         """Encrypt and save profile to disk."""
         self._path.parent.mkdir(parents=True, exist_ok=True)
-        encrypted = self._crypto.encrypt(profile.model_dump())
+        encrypted = self._crypto.encrypt_bytes(msgspec.json.encode(profile))
         self._path.write_bytes(encrypted)
+        self._drop_derived()
         self._cached = profile
+        self._cached_mtime = self._disk_mtime()
         logger.info("Profile saved to %s", self._path)
 
     def load(self) -> UserProfile:
-        """Load and decrypt profile from disk."""
-        if self._cached:
+        """Load and decrypt profile from disk; cached until the file's mtime changes."""
+        if self._cached and self._is_fresh():
             return self._cached
         if not self._path.exists():
             raise FileNotFoundError("No profile found. Use setup_profile to create one.")
+        mtime = self._disk_mtime()
         encrypted = self._path.read_bytes()
-        data = self._crypto.decrypt(encrypted)
-        self._cached = UserProfile(**data)
+        self._drop_derived()
+        self._cached = msgspec.json.decode(self._crypto.decrypt_bytes(encrypted), type=UserProfile)
+        self._cached_mtime = mtime
         return self._cached
 
+    def _disk_mtime(self) -> int | None:
+        try:
+            return self._path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _is_fresh(self) -> bool:
+        """True unless the profile file was rewritten since _cached was read (e.g. by another process)."""
+        mtime = self._disk_mtime()
+        # A missing file keeps the cached copy, as before
+        return mtime is None or mtime == self._cached_mtime
+
+    def _drop_derived(self) -> None:
+        """Forget summaries and form dicts built from the cached profile."""
+        self._redacted_cache = None
+        self._shipping_cache = None
+        self._payment_cache = None
+
+    async def save_async(self, profile: UserProfile) -> None:
+        """save() on a worker thread so encryption and disk I/O don't block the event loop."""
+        await asyncio.to_thread(self.save, profile)
+
+    async def load_async(self) -> UserProfile:
+        """load() on a worker thread; returns the cached profile without a thread hop."""
+        if self._cached and self._is_fresh():
+            return self._cached
+        return await asyncio.to_thread(self.load)
+
     def get_redacted_summary(self) -> dict:
-        """Return a summary safe for LLM output — no raw PII."""
-        profile = self.load()
+        """Return a summary safe for LLM output — no raw PII. Cached; treat as read-only."""
+        profile = self.load()  # drops the derived caches if the file changed on disk
+        if self._redacted_cache is not None:
+            return self._redacted_cache
+
         name_parts = profile.shipping.full_name.split()
         redacted_name = f"{name_parts[0]} {name_parts[-1][0]}." if len(name_parts) > 1 else name_parts[0]
+        _, _, domain = profile.email.partition("@")
 
-        return {
-            "email": profile.email[0] + "***@" + profile.email.split("@")[1],
+        self._redacted_cache = {
+            "email": profile.email[0] + "***@" + domain,
             "shipping": {
                 "name": redacted_name,
                 "city": profile.shipping.city,
@@ -61,17 +106,24 @@ class ProfileManager:
                 "last_four": profile.payment.card_number[-4:],
             },
         }
+        return self._redacted_cache
 
     def get_shipping_for_form(self) -> dict:
         """Full shipping data for internal form-filling only. Never return to LLM."""
         profile = self.load()
-        return profile.shipping.model_dump()
+        if self._shipping_cache is None:
+            self._shipping_cache = msgspec.to_builtins(profile.shipping)
+        return self._shipping_cache
 
     def get_payment_for_form(self) -> dict:
         """Full payment data for internal form-filling only. Never return to LLM."""
         profile = self.load()
-        return profile.payment.model_dump()
+        if self._payment_cache is None:
+            self._payment_cache = msgspec.to_builtins(profile.payment)
+        return self._payment_cache
 
     def clear_cache(self) -> None:
         """Clear cached profile (for testing)."""
         self._cached = None
+        self._cached_mtime = None
+        self._drop_derived()
@@ -1,8 +1,8 @@
-"""Pydantic models for user profile data."""
-from pydantic import BaseModel
+"""msgspec models for user profile data."""
+import msgspec
 
 
-class ShippingAddress(BaseModel):
+class ShippingAddress(msgspec.Struct, kw_only=True):
     """Shipping address fields."""
     full_name: str
     street: str
@@ -14,7 +14,7 @@ class ShippingAddress(BaseModel):
     phone: str
 
 
-class PaymentMethod(BaseModel):
+class PaymentMethod(msgspec.Struct, kw_only=True):
     """Payment card info — stored encrypted, never exposed to LLM."""
     card_type: str  # visa, mastercard, amex, discover
     card_number: str
@@ -25,7 +25,7 @@ class PaymentMethod(BaseModel):
     billing_address: ShippingAddress | None = None
 
 
-class UserProfile(BaseModel):
+class UserProfile(msgspec.Struct, kw_only=True):
     """Complete user profile for checkout form filling."""
     email: str
     shipping: ShippingAddress
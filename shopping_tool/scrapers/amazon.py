@@ -2,11 +2,16 @@
 Amazon scraper — search products and extract details via Playwright.
 Uses the shared BrowserManager for all page interactions.
 """
+import importlib.util
 import logging
 import re
+import sys
+import time
 from typing import Optional
 from urllib.parse import quote_plus
 
+from bs4 import BeautifulSoup
+
 from ..browser import BrowserManager
 from .base import BaseRetailerScraper, ProductListing, ProductDetails
 
@@ -14,14 +19,263 @@ logger = logging.getLogger(__name__)
 
 AMAZON_BASE = "https://www.amazon.com"
 
+# lxml (the [fast] extra) parses in C; html.parser is the pure-Python fallback
+_HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") is not None else "html.parser"
+
+# Present on every genuine search results page; absent on captcha/bot-check pages
+_SEARCH_RESULT_MARKER = 'data-component-type="s-search-result"'
+
+# Results pages in a row that show the marker but parse to nothing before the skill path
+# is paused — one odd page (e.g. a zero-result query) shouldn't turn it off — and for how long
+_SKILL_MAX_MISSES = 3
+_SKILL_COOLDOWN = 600.0
+
+# Title selectors that signal a product page has rendered
+_TITLE_WAIT_SELECTORS = ["#productTitle", "#title", "h1 span", "h1"]
+
+# Extracts search results as parallel per-field arrays
+_SEARCH_JS = '''
+(maxResults) => {
+    const items = document.querySelectorAll('[data-component-type="s-search-result"]');
+    // One array per field rather than one object per item keeps the CDP payload compact
+    const cols = {titles: [], prices: [], urls: [], ratings: [], reviewCounts: [], imageUrls: [], asins: []};
+
+    for (let i = 0; i < Math.min(items.length, maxResults); i++) {
+        const item = items[i];
+
+        // Skip sponsored/ad results that aren't real products
+        const asin = item.getAttribute('data-asin');
+        if (!asin) continue;
+
+        // Title
+        const titleEl = item.querySelector('h2 a span, h2 span a span, .a-text-normal');
+        const title = titleEl ? titleEl.textContent.trim() : '';
+        if (!title) continue;
+
+        // URL — try multiple selectors, fall back to ASIN-based URL
+        const linkEl = item.querySelector('h2 a, h2 span a, a.a-link-normal[href*="/dp/"]');
+        let url = linkEl ? linkEl.getAttribute('href') : '';
+        if (url && !url.startsWith('http')) {
+            url = 'https://www.amazon.com' + url;
+        }
+        if (!url && asin) {
+            url = 'https://www.amazon.com/dp/' + asin;
+        }
+
+        // Price
+        const priceWhole = item.querySelector('.a-price .a-price-whole');
+        const priceFraction = item.querySelector('.a-price .a-price-fraction');
+        let price = null;
+        if (priceWhole) {
+            const whole = priceWhole.textContent.replace(/[^0-9]/g, '');
+            const frac = priceFraction ? priceFraction.textContent.trim() : '00';
+            price = `$${whole}.${frac}`;
+        }
+
+        // Rating
+        const ratingEl = item.querySelector('.a-icon-alt');
+        const rating = ratingEl ? ratingEl.textContent.trim() : null;
+
+        // Review count
+        const reviewEl = item.querySelector('[aria-label*="stars"] + span, .a-size-base.s-underline-text');
+        const reviewCount = reviewEl ? reviewEl.textContent.trim().replace(/[()]/g, '') : null;
+
+        // Image
+        const imgEl = item.querySelector('img.s-image');
+        const imageUrl = imgEl ? imgEl.getAttribute('src') : null;
+
+        cols.titles.push(title);
+        cols.prices.push(price);
+        cols.urls.push(url);
+        cols.ratings.push(rating);
+        cols.reviewCounts.push(reviewCount);
+        cols.imageUrls.push(imageUrl);
+        cols.asins.push(asin);
+    }
+
+    return cols;
+}
+'''
+
+# Waits for the title, then extracts everything in the same page.evaluate
+_DETAILS_JS = '''
+async ({waitSelectors, timeoutMs}) => {
+    // Wait for any title selector to have text (MutationObserver, since rAF stalls in background tabs)
+    const ready = () => waitSelectors.some(sel => {
+        const el = document.querySelector(sel);
+        return el && el.textContent.trim();
+    });
+    if (!ready()) {
+        await new Promise(resolve => {
+            const observer = new MutationObserver(() => {
+                if (ready()) { observer.disconnect(); resolve(); }
+            });
+            observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+            setTimeout(() => { observer.disconnect(); resolve(); }, timeoutMs);
+        });
+    }
+
+    const result = {};
+
+    // Title — try multiple selectors
+    const titleSelectors = ['#productTitle', '#title span', '#title', 'h1 span.a-text-normal', 'h1'];
+    result.title = '';
+    for (const sel of titleSelectors) {
+        const el = document.querySelector(sel);
+        if (el && el.textContent.trim()) {
+            result.title = el.textContent.trim();
+            break;
+        }
+    }
+
+    // Price — try multiple selectors
+    const priceSelectors = [
+        '.a-price .a-offscreen',
+        '#priceblock_ourprice',
+        '#priceblock_dealprice',
+        '.apexPriceToPay .a-offscreen',
+        '#corePrice_feature_div .a-offscreen',
+    ];
+    result.price = null;
+    for (const sel of priceSelectors) {
+        const el = document.querySelector(sel);
+        if (el && el.textContent.trim()) {
+            result.price = el.textContent.trim();
+            break;
+        }
+    }
+
+    // Rating
+    const ratingEl = document.querySelector('#acrPopover .a-icon-alt, span.a-icon-alt');
+    result.rating = ratingEl ? ratingEl.textContent.trim() : null;
+
+    // Review count
+    const reviewEl = document.querySelector('#acrCustomerReviewText');
+    result.reviewCount = reviewEl ? reviewEl.textContent.trim() : null;
+
+    // Availability
+    const availEl = document.querySelector('#availability span');
+    result.availability = availEl ? availEl.textContent.trim() : 'Unknown';
+
+    // Feature bullets
+    const featureEls = document.querySelectorAll('#feature-bullets ul li span.a-list-item');
+    result.features = [];
+    featureEls.forEach(el => {
+        const text = el.textContent.trim();
+        if (text && text.length > 5) {
+            result.features.push(text);
+        }
+    });
+
+    // Description
+    const descEl = document.querySelector('#productDescription p, #productDescription span');
+    result.description = descEl ? descEl.textContent.trim() : '';
+
+    // Image
+    const imgEl = document.querySelector('#landingImage, #imgBlkFront');
+    result.imageUrl = imgEl ? (imgEl.getAttribute('data-old-hires') || imgEl.getAttribute('src')) : null;
+
+    return result;
+}
+'''
+
+
+def _parse_search_html(html: str, max_results: int) -> list[ProductListing]:
+    """Parse an Amazon search results page — mirrors the JS extractor in search()."""
+    soup = BeautifulSoup(html, _HTML_PARSER)
+    items = soup.select('[data-component-type="s-search-result"]')[:max_results]
+
+    listings = []
+    for item in items:
+        asin = item.get("data-asin")
+        if not asin:
+            continue
+
+        title_el = item.select_one("h2 a span, h2 span a span, .a-text-normal")
+        title = title_el.get_text().strip() if title_el else ""
+        if not title:
+            continue
+
+        link_el = item.select_one('h2 a, h2 span a, a.a-link-normal[href*="/dp/"]')
+        url = link_el.get("href", "") if link_el else ""
+        if url and not url.startswith("http"):
+            url = AMAZON_BASE + url
+        if not url:
+            url = f"{AMAZON_BASE}/dp/{asin}"
+
+        price = None
+        price_whole = item.select_one(".a-price .a-price-whole")
+        if price_whole:
+            whole = re.sub(r"[^0-9]", "", price_whole.get_text())
+            price_fraction = item.select_one(".a-price .a-price-fraction")
+            frac = price_fraction.get_text().strip() if price_fraction else "00"
+            price = f"${whole}.{frac}"
+
+        rating_el = item.select_one(".a-icon-alt")
+        review_el = item.select_one('[aria-label*="stars"] + span, .a-size-base.s-underline-text')
+        img_el = item.select_one("img.s-image")
+
+        listings.append(ProductListing(
+            title=title,
+            price=price,
+            url=url,
+            image_url=img_el.get("src") if img_el else None,
+            rating=rating_el.get_text().strip() if rating_el else None,
+            review_count=re.sub(r"[()]", "", review_el.get_text().strip()) if review_el else None,
+            retailer="amazon",
+        ))
+
+    return listings
+
 
 class AmazonScraper(BaseRetailerScraper):
     """Amazon product search and detail extraction."""
 
     retailer_name = "amazon"
+    origin = AMAZON_BASE
 
     def __init__(self, browser: BrowserManager):
         self._browser = browser
+        self._skill_misses = 0
+        self._skill_paused_until = 0.0
+
+    async def skill(self, query: str, max_results: int = 5) -> Optional[list[ProductListing]]:
+        """Search Amazon over plain HTTP and parse the results page without Playwright."""
+        if time.monotonic() < self._skill_paused_until:
+            return None
+
+        search_url = f"{AMAZON_BASE}/s?k={quote_plus(query)}"
+        try:
+            response = await self._browser.http_client().get(search_url)
+        except Exception as e:
+            logger.debug("Amazon skill request failed: %s", e)
+            return None
+
+        # Captcha / bot-check pages come back 200 without any result markers
+        html = response.text if response.status_code == 200 else ""
+        if _SEARCH_RESULT_MARKER not in html:
+            logger.info("Amazon skill miss (status=%d) — falling back to browser", response.status_code)
+            return None
+
+        listings = _parse_search_html(html, max_results)
+        if not listings:
+            # Markers present but nothing parsed — a layout change if it keeps happening
+            self._skill_misses += 1
+            if self._skill_misses < _SKILL_MAX_MISSES:
+                logger.info("Amazon skill parse returned nothing — falling back to browser")
+            else:
+                logger.warning(
+                    "Amazon skill parse returned nothing %d times in a row — pausing skill path for %.0fs",
+                    self._skill_misses, _SKILL_COOLDOWN,
+                )
+                self._skill_misses = 0
+                self._skill_paused_until = time.monotonic() + _SKILL_COOLDOWN
+            return None
+
+        self._skill_misses = 0
+
+        logger.info("Amazon skill returned %d results for '%s'", len(listings), query)
+        return listings
 
     async def search(self, query: str, max_results: int = 5) -> list[ProductListing]:
         """Search Amazon for products via Playwright."""
@@ -44,82 +298,24 @@ class AmazonScraper(BaseRetailerScraper):
                 logger.error("No search results found on page")
                 return []
 
-        # Extract results via JS
-        results = await page.evaluate('''
-            (maxResults) => {
-                const items = document.querySelectorAll('[data-component-type="s-search-result"]');
-                const results = [];
-
-                for (let i = 0; i < Math.min(items.length, maxResults); i++) {
-                    const item = items[i];
-
-                    // Skip sponsored/ad results that aren't real products
-                    const asin = item.getAttribute('data-asin');
-                    if (!asin) continue;
-
-                    // Title
-                    const titleEl = item.querySelector('h2 a span, h2 span a span, .a-text-normal');
-                    const title = titleEl ? titleEl.textContent.trim() : '';
-                    if (!title) continue;
-
-                    // URL — try multiple selectors, fall back to ASIN-based URL
-                    const linkEl = item.querySelector('h2 a, h2 span a, a.a-link-normal[href*="/dp/"]');
-                    let url = linkEl ? linkEl.getAttribute('href') : '';
-                    if (url && !url.startsWith('http')) {
-                        url = 'https://www.amazon.com' + url;
-                    }
-                    if (!url && asin) {
-                        url = 'https://www.amazon.com/dp/' + asin;
-                    }
-
-                    // Price
-                    const priceWhole = item.querySelector('.a-price .a-price-whole');
-                    const priceFraction = item.querySelector('.a-price .a-price-fraction');
-                    let price = null;
-                    if (priceWhole) {
-                        const whole = priceWhole.textContent.replace(/[^0-9]/g, '');
-                        const frac = priceFraction ? priceFraction.textContent.trim() : '00';
-                        price = `$${whole}.${frac}`;
-                    }
-
-                    // Rating
-                    const ratingEl = item.querySelector('.a-icon-alt');
-                    const rating = ratingEl ? ratingEl.textContent.trim() : null;
-
-                    // Review count
-                    const reviewEl = item.querySelector('[aria-label*="stars"] + span, .a-size-base.s-underline-text');
-                    const reviewCount = reviewEl ? reviewEl.textContent.trim().replace(/[()]/g, '') : null;
-
-                    // Image
-                    const imgEl = item.querySelector('img.s-image');
-                    const imageUrl = imgEl ? imgEl.getAttribute('src') : null;
-
-                    results.push({
-                        title: title,
-                        price,
-                        url,
-                        rating,
-                        reviewCount,
-                        imageUrl,
-                        asin,
-                    });
-                }
-
-                return results;
-            }
-        ''', max_results)
-
-        listings = []
-        for r in results:
-            listings.append(ProductListing(
-                title=r["title"],
-                price=r.get("price"),
-                url=r.get("url", ""),
-                image_url=r.get("imageUrl"),
-                rating=r.get("rating"),
-                review_count=r.get("reviewCount"),
+        # Extract results via JS — returned column-wise, zipped back into rows here
+        cols = await page.evaluate(_SEARCH_JS, max_results)
+
+        listings = [
+            ProductListing(
+                title=title,
+                price=price,
+                url=url or "",
+                image_url=image_url,
+                rating=rating,
+                review_count=review_count,
                 retailer="amazon",
-            ))
+            )
+            for title, price, url, rating, review_count, image_url in zip(
+                cols["titles"], cols["prices"], cols["urls"],
+                cols["ratings"], cols["reviewCounts"], cols["imageUrls"],
+            )
+        ]
 
         logger.info("Amazon search returned %d results for '%s'", len(listings), query)
         return listings
@@ -133,79 +329,11 @@ class AmazonScraper(BaseRetailerScraper):
         if not page:
             page = await self._browser.new_page(url)
 
-        # Wait for product title — try multiple selectors
-        for selector in ["#productTitle", "#title", "h1 span", "h1"]:
-            try:
-                await page.wait_for_selector(selector, timeout=5000)
-                break
-            except Exception:
-                continue
-
-        details = await page.evaluate('''
-            () => {
-                const result = {};
-
-                // Title — try multiple selectors
-                const titleSelectors = ['#productTitle', '#title span', '#title', 'h1 span.a-text-normal', 'h1'];
-                result.title = '';
-                for (const sel of titleSelectors) {
-                    const el = document.querySelector(sel);
-                    if (el && el.textContent.trim()) {
-                        result.title = el.textContent.trim();
-                        break;
-                    }
-                }
-
-                // Price — try multiple selectors
-                const priceSelectors = [
-                    '.a-price .a-offscreen',
-                    '#priceblock_ourprice',
-                    '#priceblock_dealprice',
-                    '.apexPriceToPay .a-offscreen',
-                    '#corePrice_feature_div .a-offscreen',
-                ];
-                result.price = null;
-                for (const sel of priceSelectors) {
-                    const el = document.querySelector(sel);
-                    if (el && el.textContent.trim()) {
-                        result.price = el.textContent.trim();
-                        break;
-                    }
-                }
-
-                // Rating
-                const ratingEl = document.querySelector('#acrPopover .a-icon-alt, span.a-icon-alt');
-                result.rating = ratingEl ? ratingEl.textContent.trim() : null;
-
-                // Review count
-                const reviewEl = document.querySelector('#acrCustomerReviewText');
-                result.reviewCount = reviewEl ? reviewEl.textContent.trim() : null;
-
-                // Availability
-                const availEl = document.querySelector('#availability span');
-                result.availability = availEl ? availEl.textContent.trim() : 'Unknown';
-
-                // Feature bullets
-                const featureEls = document.querySelectorAll('#feature-bullets ul li span.a-list-item');
-                result.features = [];
-                featureEls.forEach(el => {
-                    const text = el.textContent.trim();
-                    if (text && text.length > 5) {
-                        result.features.push(text);
-                    }
-                });
-
-                // Description
-                const descEl = document.querySelector('#productDescription p, #productDescription span');
-                result.description = descEl ? descEl.textContent.trim() : '';
-
-                // Image
-                const imgEl = document.querySelector('#landingImage, #imgBlkFront');
-                result.imageUrl = imgEl ? (imgEl.getAttribute('data-old-hires') || imgEl.getAttribute('src')) : null;
-
-                return result;
-            }
-        ''')
+        # Wait for the title and extract details in a single round trip
+        details = await page.evaluate(
+            _DETAILS_JS,
+            {"waitSelectors": _TITLE_WAIT_SELECTORS, "timeoutMs": 5000},
+        )
 
         if not details.get("title"):
             logger.warning("Failed to extract product title from %s", url)
@@ -219,7 +347,8 @@ class AmazonScraper(BaseRetailerScraper):
             features=details.get("features", []),
             rating=details.get("rating"),
             review_count=details.get("reviewCount"),
-            availability=details.get("availability", "Unknown"),
+            # Availability comes from a small fixed set ("In Stock", ...) — share one copy of each
+            availability=sys.intern(details.get("availability") or "Unknown"),
             retailer="amazon",
             image_url=details.get("imageUrl"),
         )
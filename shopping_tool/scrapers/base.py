@@ -1,10 +1,17 @@
 """Base retailer scraper — abstract interface for all retailer implementations."""
+import asyncio
+import logging
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from typing import Optional
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+# Product pages loaded at once when fetching details in bulk — keeps retailers from rate-limiting us
+DETAIL_CONCURRENCY = 4
+
+
+@dataclass(slots=True)
 class ProductListing:
     """A product from a search result."""
     title: str
@@ -17,7 +24,7 @@ class ProductListing:
     in_stock: bool = True
 
 
-@dataclass
+@dataclass(slots=True)
 class ProductDetails:
     """Full details for a single product page."""
     title: str
@@ -50,6 +57,16 @@ class BaseRetailerScraper(ABC):
     """Abstract base for retailer scrapers."""
 
     retailer_name: str = "unknown"
+    origin: str = ""  # site root prewarmed at startup; empty to skip
+
+    async def skill(self, query: str, max_results: int = 5) -> Optional[list[ProductListing]]:
+        """
+        Fast-path search over plain HTTP, without opening a browser page.
+
+        Returns None when the retailer has no skill path or the response
+        doesn't look like a real results page — callers then fall back to search().
+        """
+        return None
 
     @abstractmethod
     async def search(self, query: str, max_results: int = 5) -> list[ProductListing]:
@@ -60,3 +77,26 @@ class BaseRetailerScraper(ABC):
     async def get_details(self, url: str) -> Optional[ProductDetails]:
         """Get full product details from a product page URL."""
         ...
+
+    async def get_details_many(
+        self,
+        urls: list[str],
+        max_concurrent: int = DETAIL_CONCURRENCY,
+    ) -> list[Optional[ProductDetails]]:
+        """
+        Fetch details for several URLs, at most `max_concurrent` pages at a time.
+
+        Results are in input order; a URL that fails yields None instead of
+        aborting the rest.
+        """
+        sem = asyncio.Semaphore(max_concurrent)
+
+        async def one(url: str) -> Optional[ProductDetails]:
+            async with sem:
+                try:
+                    return await self.get_details(url)
+                except Exception as e:
+                    logger.error("Get details failed for %s: %s", url, e)
+                    return None
+
+        return await asyncio.gather(*(one(url) for url in urls))
@@ -6,13 +6,16 @@ Handles product search, cart management, checkout with human-in-the-loop confirm
 plus atomic browsing tools for interactive page exploration.
 """
 import asyncio
-import json
+import heapq
 import logging
 import os
 import secrets
 import time
-from datetime import datetime
+from functools import lru_cache, wraps
 from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+import msgspec
 
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
@@ -21,8 +24,9 @@ from mcp.types import Tool, TextContent
 from .output_sanitizer import sanitize_output
 from .profile import ProfileManager, UserProfile, ShippingAddress, PaymentMethod
 from .browser import BrowserManager
-from .actions.search import SearchAction
+from .actions.search import SCRAPER_CLASSES, SearchAction
 from . import element_resolver
+from .llm.openrouter import close_shared_clients
 
 logger = logging.getLogger(__name__)
 
@@ -33,22 +37,94 @@ _DEBUG_LOG_DIR = Path(os.environ.get(
 ))
 
 
+_JSON_ENCODER = msgspec.json.Encoder()
+
+
+def _to_json(obj) -> str:
+    """Indented JSON text, encoded by msgspec (much faster than the stdlib json module)."""
+    return msgspec.json.format(_JSON_ENCODER.encode(obj), indent=2).decode()
+
+
+# Entries wait here for the background writer so tool calls never block on disk I/O
+_DEBUG_LOG_QUEUE_SIZE = 1024
+_DEBUG_LOG_BATCH_WINDOW = 0.01  # seconds
+_debug_log_queue: asyncio.Queue = asyncio.Queue(maxsize=_DEBUG_LOG_QUEUE_SIZE)
+_debug_log_writer: asyncio.Task | None = None
+
+
 def _debug_log(tool_name: str, args: dict, result: str) -> None:
-    """Append a tool call entry to the debug log file."""
+    """Queue a tool call entry for the debug log; a background task writes it."""
+    global _debug_log_writer
     try:
-        _DEBUG_LOG_DIR.mkdir(parents=True, exist_ok=True)
-        log_file = _DEBUG_LOG_DIR / f"session_{datetime.now().strftime('%Y-%m-%d')}.log"
-        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-
-        entry = (
-            f"\n{'='*80}\n"
-            f"[{timestamp}] TOOL: {tool_name}\n"
-            f"ARGS: {json.dumps(args, indent=2)}\n"
-            f"RESPONSE:\n{result}\n"
-        )
+        _debug_log_queue.put_nowait((time.time(), tool_name, args, result))
+    except asyncio.QueueFull:
+        logger.debug("Debug log queue full — dropping entry for %s", tool_name)
+        return
+    if _debug_log_writer is None or _debug_log_writer.done():
+        _debug_log_writer = asyncio.get_running_loop().create_task(_drain_debug_log())
+
+
+async def _drain_debug_log() -> None:
+    """Write queued entries until the queue is empty, one file append per batch."""
+    while not _debug_log_queue.empty():
+        # Let a burst of tool calls accumulate so it lands in a single open/write/close
+        await asyncio.sleep(_DEBUG_LOG_BATCH_WINDOW)
+        batch = []
+        while not _debug_log_queue.empty():
+            batch.append(_debug_log_queue.get_nowait())
+        await asyncio.to_thread(_write_debug_entries, batch)
+
+
+async def _flush_debug_log() -> None:
+    """Wait for queued debug log entries to reach disk."""
+    if _debug_log_writer is not None and not _debug_log_writer.done():
+        await _debug_log_writer
+
+
+@lru_cache(maxsize=None)
+def _ensure_debug_log_dir() -> None:
+    _DEBUG_LOG_DIR.mkdir(parents=True, exist_ok=True)
+
+
+# ((log dir, year, day of year), log file) for the most recent entry; the path changes once a day
+_debug_log_file: tuple[tuple, Path] | None = None
+
+
+def _debug_log_path(local: time.struct_time) -> Path:
+    global _debug_log_file
+    key = (_DEBUG_LOG_DIR, local.tm_year, local.tm_yday)
+    if _debug_log_file is None or _debug_log_file[0] != key:
+        _debug_log_file = (key, _DEBUG_LOG_DIR / f"session_{time.strftime('%Y-%m-%d', local)}.log")
+    return _debug_log_file[1]
+
 
-        with open(log_file, "a") as f:
-            f.write(entry)
+def _write_debug_entries(batch: list[tuple[float, str, dict, str]]) -> None:
+    """Append entries to their day's log file (runs on a worker thread)."""
+    try:
+        _ensure_debug_log_dir()
+        by_file: dict[Path, list[str]] = {}
+        for when, tool_name, args, result in batch:
+            local = time.localtime(when)
+            log_file = _debug_log_path(local)
+            # Round to microseconds first (as datetime does) so float error can't drop a millisecond
+            millis = min(round(when % 1 * 1_000_000) // 1000, 999)
+            timestamp = f"{time.strftime('%H:%M:%S', local)}.{millis:03d}"
+            by_file.setdefault(log_file, []).append(
+                f"\n{'='*80}\n"
+                f"[{timestamp}] TOOL: {tool_name}\n"
+                f"ARGS: {_to_json(args)}\n"
+                f"RESPONSE:\n{result}\n"
+            )
+
+        # Unbuffered fd: one open, one write, one close per file per batch
+        for log_file, entries in by_file.items():
+            data = memoryview("".join(entries).encode())
+            fd = os.open(log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                while data:
+                    data = data[os.write(fd, data):]
+            finally:
+                os.close(fd)
     except Exception as e:
         logger.debug("Debug log write failed: %s", e)
 
@@ -61,6 +137,10 @@ _search_action: SearchAction | None = None
 
 # Confirmation gate state (in-memory, single-process)
 _pending_confirmations: dict[str, dict] = {}
+# (expires_at, code) min-heap so cleanup only touches codes that have expired
+_confirmation_expiry: list[tuple[float, str]] = []
+# Held only while reading or mutating the two structures above; no other tool takes it
+_confirmations_lock = asyncio.Lock()
 
 # Confirmation code TTL
 _CONFIRMATION_TTL = 300  # 5 minutes
@@ -87,434 +167,473 @@ def _get_search_action() -> SearchAction:
     return _search_action
 
 
+# Uppercase letters and digits minus the look-alikes 0/O and 1/I/L
+_CODE_ALPHABET = "ABCDEFGHJKMNPQRSTUVWXYZ23456789"
+
+
 def _generate_confirmation_code() -> str:
     """Generate a 6-character alphanumeric confirmation code."""
-    return secrets.token_hex(3).upper()
+    return "".join([secrets.choice(_CODE_ALPHABET) for _ in range(6)])
 
 
 def _cleanup_expired_confirmations() -> None:
     """Remove expired confirmation codes."""
-    now = time.time()
-    expired = [k for k, v in _pending_confirmations.items() if now - v["created_at"] > _CONFIRMATION_TTL]
-    for k in expired:
-        del _pending_confirmations[k]
+    now = time.monotonic()
+    while _confirmation_expiry and _confirmation_expiry[0][0] < now:
+        _, code = heapq.heappop(_confirmation_expiry)
+        pending = _pending_confirmations.get(code)
+        # Skip codes already consumed, or reissued since this entry was pushed
+        if pending is not None and pending["expires_at"] < now:
+            del _pending_confirmations[code]
 
 
 # ---------------------------------------------------------------------------
 # Tool definitions
 # ---------------------------------------------------------------------------
 
-@server.list_tools()
-async def list_tools() -> list[Tool]:
-    return [
-        Tool(
-            name="search_products",
-            description="Search for products across retailers by query. Returns product names, prices, ratings, and URLs.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "Product search query (e.g., 'wireless mouse under $50')",
-                    },
-                    "max_results": {
-                        "type": "integer",
-                        "description": "Maximum results per retailer (default: no limit)",
-                    },
-                    "retailers": {
-                        "type": "array",
-                        "items": {"type": "string"},
-                        "description": "Which retailers to search: 'amazon', 'bestbuy', 'walmart', or 'all'",
-                        "default": ["all"],
-                    },
+# Built once at import — the definitions are constant
+_TOOLS: list[Tool] = [
+    Tool(
+        name="search_products",
+        description="Search for products across retailers by query. Returns product names, prices, ratings, and URLs.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Product search query (e.g., 'wireless mouse under $50')",
+                },
+                "max_results": {
+                    "type": "integer",
+                    "description": "Maximum results per retailer (default: no limit)",
+                },
+                "retailers": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Which retailers to search: 'amazon', 'bestbuy', 'walmart', or 'all'",
+                    "default": ["all"],
                 },
-                "required": ["query"],
             },
-        ),
-        Tool(
-            name="compare_prices",
-            description="Compare prices for a specific product across multiple retailers.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "product_name": {
-                        "type": "string",
-                        "description": "Product name to compare prices for",
-                    },
-                    "product_urls": {
-                        "type": "array",
-                        "items": {"type": "string"},
-                        "description": "Optional specific product URLs to compare",
-                    },
+            "required": ["query"],
+        },
+    ),
+    Tool(
+        name="compare_prices",
+        description="Compare prices for a specific product across multiple retailers.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "product_name": {
+                    "type": "string",
+                    "description": "Product name to compare prices for",
+                },
+                "product_urls": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Optional specific product URLs to compare",
                 },
-                "required": ["product_name"],
             },
-        ),
-        Tool(
-            name="get_product_details",
-            description="Get detailed info about a product: specs, reviews summary, availability, and price.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "url": {
-                        "type": "string",
-                        "description": "Product page URL",
-                    },
+            "required": ["product_name"],
+        },
+    ),
+    Tool(
+        name="get_product_details",
+        description="Get detailed info about a product: specs, reviews summary, availability, and price.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "url": {
+                    "type": "string",
+                    "description": "Product page URL",
                 },
-                "required": ["url"],
             },
-        ),
-        Tool(
-            name="open_product_page",
-            description="Open a product page in a visible browser window for interactive shopping.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "url": {
-                        "type": "string",
-                        "description": "Product page URL to open",
-                    },
+            "required": ["url"],
+        },
+    ),
+    Tool(
+        name="open_product_page",
+        description="Open a product page in a visible browser window for interactive shopping.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "url": {
+                    "type": "string",
+                    "description": "Product page URL to open",
                 },
-                "required": ["url"],
             },
-        ),
-        Tool(
-            name="add_to_cart",
-            description="Add a product to the shopping cart. Opens the page if not already open.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "url": {
-                        "type": "string",
-                        "description": "Product page URL",
-                    },
-                    "quantity": {
-                        "type": "integer",
-                        "description": "Number of items to add",
-                        "default": 1,
-                    },
+            "required": ["url"],
+        },
+    ),
+    Tool(
+        name="add_to_cart",
+        description="Add a product to the shopping cart. Opens the page if not already open.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "url": {
+                    "type": "string",
+                    "description": "Product page URL",
+                },
+                "quantity": {
+                    "type": "integer",
+                    "description": "Number of items to add",
+                    "default": 1,
                 },
-                "required": ["url"],
             },
+            "required": ["url"],
+        },
+    ),
+    Tool(
+        name="preview_checkout",
+        description=(
+            "Preview the checkout with your saved profile. Returns a REDACTED summary "
+            "(shipping city/state, card last 4 digits, cart total) and a confirmation code. "
+            "Does NOT submit payment. The user must provide the confirmation code to proceed."
         ),
-        Tool(
-            name="preview_checkout",
-            description=(
-                "Preview the checkout with your saved profile. Returns a REDACTED summary "
-                "(shipping city/state, card last 4 digits, cart total) and a confirmation code. "
-                "Does NOT submit payment. The user must provide the confirmation code to proceed."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "url": {
-                        "type": "string",
-                        "description": "Cart or checkout URL (optional — uses current cart if omitted)",
-                    },
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "url": {
+                    "type": "string",
+                    "description": "Cart or checkout URL (optional — uses current cart if omitted)",
                 },
-                "required": [],
             },
+            "required": [],
+        },
+    ),
+    Tool(
+        name="confirm_purchase",
+        description=(
+            "Complete the purchase. REQUIRES the confirmation_code returned by preview_checkout. "
+            "The user must explicitly provide this code to authorize payment."
         ),
-        Tool(
-            name="confirm_purchase",
-            description=(
-                "Complete the purchase. REQUIRES the confirmation_code returned by preview_checkout. "
-                "The user must explicitly provide this code to authorize payment."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "confirmation_code": {
-                        "type": "string",
-                        "description": "The 6-character code from preview_checkout",
-                    },
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "confirmation_code": {
+                    "type": "string",
+                    "description": "The 6-character code from preview_checkout",
                 },
-                "required": ["confirmation_code"],
             },
+            "required": ["confirmation_code"],
+        },
+    ),
+    Tool(
+        name="setup_profile",
+        description=(
+            "Create or update your shopping profile (shipping address, payment method). "
+            "Data is encrypted at rest and never shown to the AI in full."
         ),
-        Tool(
-            name="setup_profile",
-            description=(
-                "Create or update your shopping profile (shipping address, payment method). "
-                "Data is encrypted at rest and never shown to the AI in full."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "action": {
-                        "type": "string",
-                        "enum": ["init", "update_shipping", "update_payment", "view_summary"],
-                        "description": "What to do: init (full setup), update_shipping, update_payment, or view_summary",
-                    },
-                    "shipping": {
-                        "type": "object",
-                        "description": "Shipping address fields (full_name, street, apt, city, state, zip_code, country, phone)",
-                    },
-                    "payment": {
-                        "type": "object",
-                        "description": "Payment fields (card_type, card_number, expiry_month, expiry_year, cvv)",
-                    },
-                    "email": {
-                        "type": "string",
-                        "description": "Email address for order confirmations",
-                    },
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "action": {
+                    "type": "string",
+                    "enum": ["init", "update_shipping", "update_payment", "view_summary"],
+                    "description": "What to do: init (full setup), update_shipping, update_payment, or view_summary",
+                },
+                "shipping": {
+                    "type": "object",
+                    "description": "Shipping address fields (full_name, street, apt, city, state, zip_code, country, phone)",
+                },
+                "payment": {
+                    "type": "object",
+                    "description": "Payment fields (card_type, card_number, expiry_month, expiry_year, cvv)",
+                },
+                "email": {
+                    "type": "string",
+                    "description": "Email address for order confirmations",
                 },
-                "required": ["action"],
             },
+            "required": ["action"],
+        },
+    ),
+    # --- Atomic browsing tools ---
+    Tool(
+        name="read_page",
+        description=(
+            "Read the current browser page. Returns structured content: title, text, "
+            "buttons, links, inputs, and prices. Use this to see what's on the page "
+            "before deciding what to click or interact with."
         ),
-        # --- Atomic browsing tools ---
-        Tool(
-            name="read_page",
-            description=(
-                "Read the current browser page. Returns structured content: title, text, "
-                "buttons, links, inputs, and prices. Use this to see what's on the page "
-                "before deciding what to click or interact with."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": [],
-            },
+        inputSchema={
+            "type": "object",
+            "properties": {},
+            "required": [],
+        },
+    ),
+    Tool(
+        name="click_element",
+        description=(
+            "Click a button, link, or interactive element on the current page. "
+            "Describe the element in plain English (e.g., 'Add to Cart button', "
+            "'See all reviews link', 'first search result'). The system resolves "
+            "the description to the correct element using AI."
         ),
-        Tool(
-            name="click_element",
-            description=(
-                "Click a button, link, or interactive element on the current page. "
-                "Describe the element in plain English (e.g., 'Add to Cart button', "
-                "'See all reviews link', 'first search result'). The system resolves "
-                "the description to the correct element using AI."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "description": {
-                        "type": "string",
-                        "description": "Human description of what to click (e.g., 'Add to Cart button', 'Next page link')",
-                    },
-                    "element_type": {
-                        "type": "string",
-                        "enum": ["button", "link", "input", "any"],
-                        "description": "Type hint for the element",
-                        "default": "any",
-                    },
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "description": {
+                    "type": "string",
+                    "description": "Human description of what to click (e.g., 'Add to Cart button', 'Next page link')",
                 },
-                "required": ["description"],
-            },
-        ),
-        Tool(
-            name="type_text",
-            description=(
-                "Type text into an input field on the current page. Describe the field "
-                "in plain English (e.g., 'search box', 'quantity field', 'email input')."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "description": {
-                        "type": "string",
-                        "description": "Human description of the input field (e.g., 'search box', 'email field')",
-                    },
-                    "text": {
-                        "type": "string",
-                        "description": "The text to type into the field",
-                    },
+                "element_type": {
+                    "type": "string",
+                    "enum": ["button", "link", "input", "any"],
+                    "description": "Type hint for the element",
+                    "default": "any",
                 },
-                "required": ["description", "text"],
             },
+            "required": ["description"],
+        },
+    ),
+    Tool(
+        name="type_text",
+        description=(
+            "Type text into an input field on the current page. Describe the field "
+            "in plain English (e.g., 'search box', 'quantity field', 'email input')."
         ),
-        Tool(
-            name="select_option",
-            description=(
-                "Select an option from a dropdown menu on the current page. "
-                "Describe the dropdown and the value to select."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "description": {
-                        "type": "string",
-                        "description": "Human description of the dropdown (e.g., 'quantity selector', 'size dropdown')",
-                    },
-                    "value": {
-                        "type": "string",
-                        "description": "The option label to select (e.g., '2', 'Large', 'Blue')",
-                    },
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "description": {
+                    "type": "string",
+                    "description": "Human description of the input field (e.g., 'search box', 'email field')",
+                },
+                "text": {
+                    "type": "string",
+                    "description": "The text to type into the field",
                 },
-                "required": ["description", "value"],
             },
+            "required": ["description", "text"],
+        },
+    ),
+    Tool(
+        name="select_option",
+        description=(
+            "Select an option from a dropdown menu on the current page. "
+            "Describe the dropdown and the value to select."
         ),
-        Tool(
-            name="scroll_page",
-            description="Scroll the current page up or down to see more content.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "direction": {
-                        "type": "string",
-                        "enum": ["down", "up"],
-                        "description": "Scroll direction",
-                        "default": "down",
-                    },
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "description": {
+                    "type": "string",
+                    "description": "Human description of the dropdown (e.g., 'quantity selector', 'size dropdown')",
+                },
+                "value": {
+                    "type": "string",
+                    "description": "The option label to select (e.g., '2', 'Large', 'Blue')",
                 },
-                "required": [],
             },
-        ),
-        Tool(
-            name="go_back",
-            description="Go back to the previous page in the browser (like pressing the Back button).",
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": [],
+            "required": ["description", "value"],
+        },
+    ),
+    Tool(
+        name="scroll_page",
+        description="Scroll the current page up or down to see more content.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "direction": {
+                    "type": "string",
+                    "enum": ["down", "up"],
+                    "description": "Scroll direction",
+                    "default": "down",
+                },
             },
+            "required": [],
+        },
+    ),
+    Tool(
+        name="go_back",
+        description="Go back to the previous page in the browser (like pressing the Back button).",
+        inputSchema={
+            "type": "object",
+            "properties": {},
+            "required": [],
+        },
+    ),
+    Tool(
+        name="open_link",
+        description=(
+            "Open a URL in a NEW browser tab, keeping the current tab intact. "
+            "Use this when you want to explore a link without losing your current page "
+            "(e.g., opening a product from search results while keeping the results page)."
         ),
-        Tool(
-            name="open_link",
-            description=(
-                "Open a URL in a NEW browser tab, keeping the current tab intact. "
-                "Use this when you want to explore a link without losing your current page "
-                "(e.g., opening a product from search results while keeping the results page)."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "url": {
-                        "type": "string",
-                        "description": "The URL to open in a new tab",
-                    },
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "url": {
+                    "type": "string",
+                    "description": "The URL to open in a new tab",
                 },
-                "required": ["url"],
             },
+            "required": ["url"],
+        },
+    ),
+    Tool(
+        name="switch_tab",
+        description=(
+            "Switch to a different browser tab by index. "
+            "Use this to go back to a previous tab (e.g., search results) "
+            "after opening a product in a new tab."
         ),
-        Tool(
-            name="switch_tab",
-            description=(
-                "Switch to a different browser tab by index. "
-                "Use this to go back to a previous tab (e.g., search results) "
-                "after opening a product in a new tab."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "tab_index": {
-                        "type": "integer",
-                        "description": "The tab index to switch to (shown in read_page output)",
-                    },
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "tab_index": {
+                    "type": "integer",
+                    "description": "The tab index to switch to (shown in read_page output)",
                 },
-                "required": ["tab_index"],
             },
-        ),
-    ]
+            "required": ["tab_index"],
+        },
+    ),
+]
+
+
+@server.list_tools()
+async def list_tools() -> list[Tool]:
+    return list(_TOOLS)
 
 
 # ---------------------------------------------------------------------------
 # Tool dispatch
 # ---------------------------------------------------------------------------
 
+def _text_result(text: str) -> list[TextContent]:
+    # Plain constructor on purpose: pydantic v2 validates in its compiled core,
+    # and model_construct() measured ~3x slower for this two-field model
+    return [TextContent(type="text", text=text)]
+
+
 @server.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     try:
-        if name == "setup_profile":
-            result = await _handle_setup_profile(arguments)
-        elif name == "search_products":
-            result = await _handle_search_products(arguments)
-        elif name == "compare_prices":
-            result = await _handle_compare_prices(arguments)
-        elif name == "get_product_details":
-            result = await _handle_get_product_details(arguments)
-        elif name == "open_product_page":
-            result = await _handle_open_product_page(arguments)
-        elif name == "add_to_cart":
-            result = await _handle_add_to_cart(arguments)
-        elif name == "preview_checkout":
-            result = await _handle_preview_checkout(arguments)
-        elif name == "confirm_purchase":
-            result = await _handle_confirm_purchase(arguments)
-        elif name == "read_page":
-            result = await _handle_read_page(arguments)
-        elif name == "click_element":
-            result = await _handle_click_element(arguments)
-        elif name == "type_text":
-            result = await _handle_type_text(arguments)
-        elif name == "select_option":
-            result = await _handle_select_option(arguments)
-        elif name == "scroll_page":
-            result = await _handle_scroll_page(arguments)
-        elif name == "go_back":
-            result = await _handle_go_back(arguments)
-        elif name == "open_link":
-            result = await _handle_open_link(arguments)
-        elif name == "switch_tab":
-            result = await _handle_switch_tab(arguments)
-        else:
-            return [TextContent(type="text", text=f"Unknown tool: {name}")]
-
-        if isinstance(result, str):
-            text = result
-        else:
-            text = json.dumps(result, indent=2)
-        sanitized = sanitize_output(text)
+        handler = _HANDLERS.get(name)
+        if handler is None:
+            return _text_result(f"Unknown tool: {name}")
+        text = await handler(arguments)
+        sanitized = text if name in _TRUSTED_TOOLS else sanitize_output(text)
 
         _debug_log(name, arguments, sanitized)
-        return [TextContent(type="text", text=sanitized)]
+        return _text_result(sanitized)
 
     except Exception as e:
         logger.exception("Tool %s failed", name)
         error_text = f"Error: {str(e)}"
         _debug_log(name, arguments, error_text)
-        return [TextContent(type="text", text=error_text)]
+        return _text_result(error_text)
 
 
 # ---------------------------------------------------------------------------
 # Tool implementations
 # ---------------------------------------------------------------------------
 
-async def _handle_setup_profile(args: dict) -> dict:
+# Fixed response shapes; msgspec encodes these straight from their fields, with no dict in between
+class StatusMessage(msgspec.Struct):
+    status: str
+    message: str
+
+
+class ProfileResponse(msgspec.Struct):
+    status: str
+    profile: dict
+
+
+class PreviewResponse(msgspec.Struct):
+    status: str
+    confirmation_code: str
+    message: str
+    shipping_to: dict
+    paying_with: dict
+    email: str
+    note: str
+
+
+class ConfirmResponse(msgspec.Struct):
+    status: str
+    message: str
+    checkout_url: str
+
+
+# Every handler returns the response text; handlers that build a dict or Struct encode it here
+def _json_response(handler: Callable[[dict], Awaitable[Any]]) -> Callable[[dict], Awaitable[str]]:
+    @wraps(handler)
+    async def wrapper(args: dict) -> str:
+        return _to_json(await handler(args))
+    return wrapper
+
+
+@_json_response
+async def _handle_setup_profile(args: dict) -> ProfileResponse | StatusMessage:
     """Create, update, or view the encrypted user profile."""
     pm = _get_profile_manager()
     action = args["action"]
 
     if action == "view_summary":
         if not pm.exists():
-            return {"status": "no_profile", "message": "No profile found. Use action='init' to create one."}
-        return {"status": "ok", "profile": pm.get_redacted_summary()}
+            return StatusMessage(status="no_profile", message="No profile found. Use action='init' to create one.")
+        await pm.load_async()
+        return ProfileResponse(status="ok", profile=pm.get_redacted_summary())
 
     if action == "init":
         shipping_data = args.get("shipping")
         payment_data = args.get("payment")
         email = args.get("email")
         if not shipping_data or not payment_data or not email:
-            return {
-                "status": "error",
-                "message": "action='init' requires 'shipping', 'payment', and 'email' fields.",
-            }
+            return StatusMessage(
+                status="error",
+                message="action='init' requires 'shipping', 'payment', and 'email' fields.",
+            )
         profile = UserProfile(
             email=email,
-            shipping=ShippingAddress(**shipping_data),
-            payment=PaymentMethod(**payment_data),
+            shipping=msgspec.convert(shipping_data, ShippingAddress, strict=False),
+            payment=msgspec.convert(payment_data, PaymentMethod, strict=False),
         )
-        pm.save(profile)
-        return {"status": "saved", "profile": pm.get_redacted_summary()}
+        await pm.save_async(profile)
+        return ProfileResponse(status="saved", profile=pm.get_redacted_summary())
 
     if action == "update_shipping":
-        profile = pm.load()
+        profile = await pm.load_async()
         shipping_data = args.get("shipping")
         if not shipping_data:
-            return {"status": "error", "message": "update_shipping requires 'shipping' field."}
-        profile.shipping = ShippingAddress(**shipping_data)
-        pm.save(profile)
-        return {"status": "updated", "profile": pm.get_redacted_summary()}
+            return StatusMessage(status="error", message="update_shipping requires 'shipping' field.")
+        profile.shipping = msgspec.convert(shipping_data, ShippingAddress, strict=False)
+        await pm.save_async(profile)
+        return ProfileResponse(status="updated", profile=pm.get_redacted_summary())
 
     if action == "update_payment":
-        profile = pm.load()
+        profile = await pm.load_async()
         payment_data = args.get("payment")
         if not payment_data:
-            return {"status": "error", "message": "update_payment requires 'payment' field."}
-        profile.payment = PaymentMethod(**payment_data)
-        pm.save(profile)
-        return {"status": "updated", "profile": pm.get_redacted_summary()}
-
-    return {"status": "error", "message": f"Unknown action: {action}"}
+            return StatusMessage(status="error", message="update_payment requires 'payment' field.")
+        profile.payment = msgspec.convert(payment_data, PaymentMethod, strict=False)
+        await pm.save_async(profile)
+        return ProfileResponse(status="updated", profile=pm.get_redacted_summary())
+
+    return StatusMessage(status="error", message=f"Unknown action: {action}")
+
+
+_SEARCH_GUIDANCE = "\n".join([
+    "=== IMPORTANT: DO NOT STOP HERE ===",
+    "You have search results but NO details yet. You MUST keep calling tools to",
+    "gather product details, reviews, and pricing before responding to the user.",
+    "",
+    "REQUIRED NEXT STEPS:",
+    "  1. Use open_link with the URL of the most promising product to open it in a NEW TAB",
+    "  2. Use read_page to see the full product details, reviews, and pricing",
+    "  3. {return_step}",
+    "  4. Repeat steps 1-3 for the next best products (at least the top 2-3)",
+    "  5. ONLY after you have explored the products, summarize your findings to the user",
+    "",
+    "DO NOT present a table of search results and ask the user what to do.",
+    "Instead, proactively explore the best options and give an informed recommendation.",
+])
+# Step 3 depends on whether the search opened a results tab; the HTTP fast path doesn't
+_SEARCH_RETURN_TAB = "Use switch_tab({index}) to come back to these search results"
+_SEARCH_RETURN_LIST = "Pick the next product URL from the list above (no search results tab was opened)"
 
 
 async def _handle_search_products(args: dict) -> str:
@@ -524,6 +643,8 @@ async def _handle_search_products(args: dict) -> str:
     retailers = args.get("retailers", ["all"])
 
     search = _get_search_action()
+    browser = _get_browser_manager()
+    tabs_before = browser.tab_count
     result = await search.search(query, max_results=max_results, retailers=retailers)
 
     # Format results as readable text with guidance
@@ -548,23 +669,16 @@ async def _handle_search_products(args: dict) -> str:
         lines.append(tab_header)
 
     # Workflow guidance — directive, not suggestive
-    lines.append("=== IMPORTANT: DO NOT STOP HERE ===")
-    lines.append("You have search results but NO details yet. You MUST keep calling tools to")
-    lines.append("gather product details, reviews, and pricing before responding to the user.")
-    lines.append("")
-    lines.append("REQUIRED NEXT STEPS:")
-    lines.append("  1. Use open_link with the URL of the most promising product to open it in a NEW TAB")
-    lines.append("  2. Use read_page to see the full product details, reviews, and pricing")
-    lines.append("  3. Use switch_tab(0) to come back to these search results")
-    lines.append("  4. Repeat steps 1-3 for the next best products (at least the top 2-3)")
-    lines.append("  5. ONLY after you have explored the products, summarize your findings to the user")
-    lines.append("")
-    lines.append("DO NOT present a table of search results and ask the user what to do.")
-    lines.append("Instead, proactively explore the best options and give an informed recommendation.")
+    if browser.tab_count > tabs_before:
+        return_step = _SEARCH_RETURN_TAB.format(index=browser.active_tab_index)
+    else:
+        return_step = _SEARCH_RETURN_LIST
+    lines.append(_SEARCH_GUIDANCE.format(return_step=return_step))
 
     return "\n".join(lines)
 
 
+@_json_response
 async def _handle_compare_prices(args: dict) -> dict:
     """Compare prices across retailers. Stub for Phase 4."""
     return {
@@ -574,18 +688,21 @@ async def _handle_compare_prices(args: dict) -> dict:
     }
 
 
+@_json_response
 async def _handle_get_product_details(args: dict) -> dict:
     """Get product details from a URL via Playwright."""
     search = _get_search_action()
     return await search.get_details(args["url"])
 
 
+@_json_response
 async def _handle_open_product_page(args: dict) -> dict:
     """Open a product page in the headed browser."""
     search = _get_search_action()
     return await search.open_page(args["url"])
 
 
+@_json_response
 async def _handle_add_to_cart(args: dict) -> dict:
     """Add product to cart. Stub for Phase 3."""
     return {
@@ -594,62 +711,73 @@ async def _handle_add_to_cart(args: dict) -> dict:
     }
 
 
-async def _handle_preview_checkout(args: dict) -> dict:
+@_json_response
+async def _handle_preview_checkout(args: dict) -> PreviewResponse | StatusMessage:
     """Preview checkout with redacted profile and generate confirmation code."""
     pm = _get_profile_manager()
     if not pm.exists():
-        return {"status": "error", "message": "No profile found. Use setup_profile first."}
-
-    _cleanup_expired_confirmations()
-
-    code = _generate_confirmation_code()
-    _pending_confirmations[code] = {
-        "created_at": time.time(),
-        "url": args.get("url", "current_cart"),
-    }
+        return StatusMessage(status="error", message="No profile found. Use setup_profile first.")
+
+    await pm.load_async()
+
+    async with _confirmations_lock:
+        _cleanup_expired_confirmations()
+        code = _generate_confirmation_code()
+        while code in _pending_confirmations:
+            code = _generate_confirmation_code()
+        expires_at = time.monotonic() + _CONFIRMATION_TTL
+        _pending_confirmations[code] = {
+            "expires_at": expires_at,
+            "url": args.get("url", "current_cart"),
+        }
+        heapq.heappush(_confirmation_expiry, (expires_at, code))
 
     summary = pm.get_redacted_summary()
 
-    return {
-        "status": "preview",
-        "confirmation_code": code,
-        "message": (
+    return PreviewResponse(
+        status="preview",
+        confirmation_code=code,
+        message=(
             f"Review your order details below. To complete the purchase, "
             f"provide the confirmation code: {code}"
         ),
-        "shipping_to": summary["shipping"],
-        "paying_with": summary["payment"],
-        "email": summary["email"],
-        "note": "Cart total will be shown once browser checkout is implemented (Phase 3).",
-    }
+        shipping_to=summary["shipping"],
+        paying_with=summary["payment"],
+        email=summary["email"],
+        note="Cart total will be shown once browser checkout is implemented (Phase 3).",
+    )
 
 
-async def _handle_confirm_purchase(args: dict) -> dict:
+@_json_response
+async def _handle_confirm_purchase(args: dict) -> ConfirmResponse | StatusMessage:
     """Complete purchase if confirmation code is valid."""
     code = args["confirmation_code"].strip().upper()
 
-    _cleanup_expired_confirmations()
-
-    if code not in _pending_confirmations:
-        return {
-            "status": "rejected",
-            "message": "Invalid or expired confirmation code. Run preview_checkout again.",
-        }
+    async with _confirmations_lock:
+        _cleanup_expired_confirmations()
+        confirmation = _pending_confirmations.pop(code, None)
 
-    confirmation = _pending_confirmations.pop(code)
+    if confirmation is None:
+        return StatusMessage(
+            status="rejected",
+            message="Invalid or expired confirmation code. Run preview_checkout again.",
+        )
 
     # TODO: Phase 3 — actually submit checkout via Playwright
-    return {
-        "status": "stub",
-        "message": f"Confirmation code {code} accepted. Checkout submission coming in Phase 3.",
-        "checkout_url": confirmation["url"],
-    }
+    return ConfirmResponse(
+        status="stub",
+        message=f"Confirmation code {code} accepted. Checkout submission coming in Phase 3.",
+        checkout_url=confirmation["url"],
+    )
 
 
 # ---------------------------------------------------------------------------
 # Atomic browsing tool handlers
 # ---------------------------------------------------------------------------
 
+_NO_PAGE_MSG = "No browser page is open. Use open_product_page or search_products first."
+
+
 async def _get_tab_header() -> str:
     """Generate tab bar header showing all open tabs."""
     browser = _get_browser_manager()
@@ -723,78 +851,144 @@ def _format_page_summary(elements: dict, tab_header: str = "") -> str:
     return "\n".join(lines)
 
 
+# Static guidance blocks, joined once at import; _build_guidance picks and stitches them
+_GUIDANCE_HEADER = "\n=== NEXT STEPS ==="
+
+_GUIDANCE_SEARCH = "\n".join([
+    "You are on a SEARCH RESULTS page. DO NOT stop here.",
+    "",
+    "CONTINUE by exploring the top products:",
+    "  1. Use open_link with a product URL to open it in a NEW TAB",
+    "  2. Use read_page to see the full details",
+    "  3. Use switch_tab(0) to return here and explore the next product",
+    "",
+    "Keep going until you have enough information to give the user a useful answer.",
+])
+
+_GUIDANCE_PRODUCT = "\n".join([
+    "You are on a PRODUCT page. Read the details above carefully.",
+    "",
+    "NOW you should:",
+    "  - If the user wants to buy: Use click_element(\"Add to Cart button\")",
+])
+_GUIDANCE_PRODUCT_REVIEWS = "  - To check reviews: Use scroll_page(\"down\") or click_element(\"See all reviews\")"
+_GUIDANCE_PRODUCT_TAIL = "\n".join([
+    "  - To compare more products: Use switch_tab(0) to go back and open_link another product",
+    "  - To see more details: Use scroll_page(direction=\"down\")",
+    "",
+    "If you still have products to explore, go back and keep exploring before responding.",
+])
+
+_GUIDANCE_REVIEWS = "\n".join([
+    "You are on a REVIEWS page.",
+    "",
+    "CONTINUE reading reviews:",
+    "  1. Scroll down with scroll_page(\"down\") to see more",
+])
+_GUIDANCE_REVIEWS_NEXT = "  2. Use click_element(\"Next page\") then read_page for more reviews"
+_GUIDANCE_REVIEWS_TAIL = "\n".join([
+    "",
+    "When you have enough info, use switch_tab to go back.",
+])
+
+_GUIDANCE_CART = "\n".join([
+    "You are on the CART page.",
+    "",
+    "Next: Use click_element(\"Proceed to checkout button\") then read_page.",
+])
+
+_GUIDANCE_OTHER = "Continue exploring this page:"
+_GUIDANCE_OTHER_FORMS = "  - Fill forms: type_text(\"field\", \"value\") then click_element(\"submit\")"
+_GUIDANCE_OTHER_TAIL = "\n".join([
+    "  - Click things: click_element(\"description\") or open_link(url)",
+    "  - See more: scroll_page(\"down\")",
+    "  - Navigate: switch_tab(index) or go_back",
+])
+
+
 def _build_guidance(elements: dict) -> str:
     """Generate directive step-by-step guidance that tells Claude to keep going."""
     url = elements.get("url", "")
     buttons = elements.get("buttons", [])
     links = elements.get("links", [])
-    inputs = elements.get("inputs", [])
-    btn_texts = [b.get("text", "").lower() for b in buttons]
-    link_texts = [l.get("text", "").lower() for l in links]
+    # One lowercased blob per group; newlines keep a keyword from matching across two texts
+    btn_text = "\n".join([b.get("text", "") for b in buttons]).lower()
+    link_text = "\n".join([l.get("text", "") for l in links]).lower()
 
-    hints = ["\n=== NEXT STEPS ==="]
+    hints = [_GUIDANCE_HEADER]
 
     # Detect page type and give directive guidance
-    if "amazon.com/s?" in url or "/s?" in url:
-        hints.append("You are on a SEARCH RESULTS page. DO NOT stop here.")
-        hints.append("")
-        hints.append("CONTINUE by exploring the top products:")
-        hints.append("  1. Use open_link with a product URL to open it in a NEW TAB")
-        hints.append("  2. Use read_page to see the full details")
-        hints.append("  3. Use switch_tab(0) to return here and explore the next product")
-        hints.append("")
-        hints.append("Keep going until you have enough information to give the user a useful answer.")
-
-    elif any("add to cart" in t for t in btn_texts):
-        hints.append("You are on a PRODUCT page. Read the details above carefully.")
-        hints.append("")
-        hints.append("NOW you should:")
-        hints.append("  - If the user wants to buy: Use click_element(\"Add to Cart button\")")
-        if any("review" in t for t in link_texts + btn_texts):
-            hints.append("  - To check reviews: Use scroll_page(\"down\") or click_element(\"See all reviews\")")
-        hints.append("  - To compare more products: Use switch_tab(0) to go back and open_link another product")
-        hints.append("  - To see more details: Use scroll_page(direction=\"down\")")
-        hints.append("")
-        hints.append("If you still have products to explore, go back and keep exploring before responding.")
-
-    elif "review" in url.lower() or any("review" in t for t in btn_texts + link_texts):
-        hints.append("You are on a REVIEWS page.")
-        hints.append("")
-        hints.append("CONTINUE reading reviews:")
-        hints.append("  1. Scroll down with scroll_page(\"down\") to see more")
-        if any("next" in t for t in link_texts + btn_texts):
-            hints.append("  2. Use click_element(\"Next page\") then read_page for more reviews")
-        hints.append("")
-        hints.append("When you have enough info, use switch_tab to go back.")
-
-    elif any("cart" in t.lower() for t in [elements.get("title", "")]):
-        hints.append("You are on the CART page.")
-        hints.append("")
-        hints.append("Next: Use click_element(\"Proceed to checkout button\") then read_page.")
+    if "/s?" in url:
+        hints.append(_GUIDANCE_SEARCH)
+
+    elif "add to cart" in btn_text:
+        hints.append(_GUIDANCE_PRODUCT)
+        if "review" in link_text or "review" in btn_text:
+            hints.append(_GUIDANCE_PRODUCT_REVIEWS)
+        hints.append(_GUIDANCE_PRODUCT_TAIL)
+
+    elif "review" in url.lower() or "review" in btn_text or "review" in link_text:
+        hints.append(_GUIDANCE_REVIEWS)
+        if "next" in link_text or "next" in btn_text:
+            hints.append(_GUIDANCE_REVIEWS_NEXT)
+        hints.append(_GUIDANCE_REVIEWS_TAIL)
+
+    elif "cart" in elements.get("title", "").lower():
+        hints.append(_GUIDANCE_CART)
 
     else:
-        hints.append("Continue exploring this page:")
-        if inputs:
-            hints.append("  - Fill forms: type_text(\"field\", \"value\") then click_element(\"submit\")")
-        hints.append("  - Click things: click_element(\"description\") or open_link(url)")
-        hints.append("  - See more: scroll_page(\"down\")")
-        hints.append("  - Navigate: switch_tab(index) or go_back")
+        hints.append(_GUIDANCE_OTHER)
+        if elements.get("inputs"):
+            hints.append(_GUIDANCE_OTHER_FORMS)
+        hints.append(_GUIDANCE_OTHER_TAIL)
 
     return "\n".join(hints)
 
 
+async def _render_page(browser: BrowserManager, page) -> str:
+    """Page summary plus guidance; element extraction and the tab list are fetched concurrently."""
+    # Always re-extract: the page may have loaded more since the cached snapshot, which
+    # only serves selector resolution (and is refreshed here for the next resolve)
+    elements, tab_header = await asyncio.gather(
+        browser.extract_page_elements(page, use_cache=False),
+        _get_tab_header(),
+    )
+    return _format_page_summary(elements, tab_header=tab_header) + _build_guidance(elements)
+
+
 async def _handle_read_page(args: dict) -> str:
     """Read the current browser page content."""
     browser = _get_browser_manager()
     page = browser.active_page
     if not page:
-        return "No browser page is open. Use open_product_page or search_products first."
+        return _NO_PAGE_MSG
+
+    return await _render_page(browser, page)
+
+
+async def _resolve_element(
+    browser: BrowserManager, page, description: str, element_type: str,
+) -> tuple[str | None, dict | None]:
+    """
+    Resolve a description to a selector on the page.
+
+    Known selectors are answered from the URL alone; the page is only extracted
+    when the LLM has to look at it. Returns (selector, elements), where elements
+    is None on a fast-path hit.
+    """
+    selector = element_resolver.fast_resolve(description, page.url)
+    if selector:
+        logger.info("Fast-resolved '%s' -> %s", description, selector)
+        return selector, None
 
     elements = await browser.extract_page_elements(page)
-    tab_header = await _get_tab_header()
-    summary = _format_page_summary(elements, tab_header=tab_header)
-    guidance = _build_guidance(elements)
-    return summary + guidance
+    selector = await element_resolver.resolve_selector(
+        description=description,
+        element_type=element_type,
+        page_elements=elements,
+        verify=lambda sel: browser.selector_exists(page, sel),
+    )
+    return selector, elements
 
 
 async def _handle_click_element(args: dict) -> str:
@@ -802,20 +996,13 @@ async def _handle_click_element(args: dict) -> str:
     browser = _get_browser_manager()
     page = browser.active_page
     if not page:
-        return "No browser page is open. Use open_product_page or search_products first."
+        return _NO_PAGE_MSG
 
     description = args["description"]
     element_type = args.get("element_type", "any")
 
-    # Extract page elements for the resolver
-    elements = await browser.extract_page_elements(page)
-
     # Resolve description to CSS selector
-    selector = await element_resolver.resolve_selector(
-        description=description,
-        element_type=element_type,
-        page_elements=elements,
-    )
+    selector, elements = await _resolve_element(browser, page, description, element_type)
 
     if not selector:
         return (
@@ -839,12 +1026,8 @@ async def _handle_click_element(args: dict) -> str:
         pass
 
     # Read the updated page
-    new_elements = await browser.extract_page_elements(page)
-    tab_header = await _get_tab_header()
-    new_summary = _format_page_summary(new_elements, tab_header=tab_header)
-    guidance = _build_guidance(new_elements)
-
-    return f"Clicked \"{description}\" (selector: {selector}). Page updated.\n\n{new_summary}{guidance}"
+    view = await _render_page(browser, page)
+    return f"Clicked \"{description}\" (selector: {selector}). Page updated.\n\n{view}"
 
 
 async def _handle_type_text(args: dict) -> str:
@@ -852,17 +1035,12 @@ async def _handle_type_text(args: dict) -> str:
     browser = _get_browser_manager()
     page = browser.active_page
     if not page:
-        return "No browser page is open. Use open_product_page or search_products first."
+        return _NO_PAGE_MSG
 
     description = args["description"]
     text = args["text"]
 
-    elements = await browser.extract_page_elements(page)
-    selector = await element_resolver.resolve_selector(
-        description=description,
-        element_type="input",
-        page_elements=elements,
-    )
+    selector, elements = await _resolve_element(browser, page, description, "input")
 
     if not selector:
         return (
@@ -883,17 +1061,12 @@ async def _handle_select_option(args: dict) -> str:
     browser = _get_browser_manager()
     page = browser.active_page
     if not page:
-        return "No browser page is open. Use open_product_page or search_products first."
+        return _NO_PAGE_MSG
 
     description = args["description"]
     value = args["value"]
 
-    elements = await browser.extract_page_elements(page)
-    selector = await element_resolver.resolve_selector(
-        description=description,
-        element_type="select",
-        page_elements=elements,
-    )
+    selector, elements = await _resolve_element(browser, page, description, "select")
 
     if not selector:
         return (
@@ -914,17 +1087,13 @@ async def _handle_scroll_page(args: dict) -> str:
     browser = _get_browser_manager()
     page = browser.active_page
     if not page:
-        return "No browser page is open. Use open_product_page or search_products first."
+        return _NO_PAGE_MSG
 
     direction = args.get("direction", "down")
     await browser.scroll(page, direction)
 
-    elements = await browser.extract_page_elements(page)
-    tab_header = await _get_tab_header()
-    summary = _format_page_summary(elements, tab_header=tab_header)
-    guidance = _build_guidance(elements)
-
-    return f"Scrolled {direction}.\n\n{summary}{guidance}"
+    view = await _render_page(browser, page)
+    return f"Scrolled {direction}.\n\n{view}"
 
 
 async def _handle_go_back(args: dict) -> str:
@@ -932,16 +1101,12 @@ async def _handle_go_back(args: dict) -> str:
     browser = _get_browser_manager()
     page = browser.active_page
     if not page:
-        return "No browser page is open. Use open_product_page or search_products first."
+        return _NO_PAGE_MSG
 
     new_url = await browser.go_back(page)
 
-    elements = await browser.extract_page_elements(page)
-    tab_header = await _get_tab_header()
-    summary = _format_page_summary(elements, tab_header=tab_header)
-    guidance = _build_guidance(elements)
-
-    return f"Navigated back to: {new_url}\n\n{summary}{guidance}"
+    view = await _render_page(browser, page)
+    return f"Navigated back to: {new_url}\n\n{view}"
 
 
 async def _handle_open_link(args: dict) -> str:
@@ -951,12 +1116,8 @@ async def _handle_open_link(args: dict) -> str:
 
     page = await browser.open_in_new_tab(url)
 
-    elements = await browser.extract_page_elements(page)
-    tab_header = await _get_tab_header()
-    summary = _format_page_summary(elements, tab_header=tab_header)
-    guidance = _build_guidance(elements)
-
-    return f"Opened in new tab (Tab {browser.active_tab_index}): {url}\n\n{summary}{guidance}"
+    view = await _render_page(browser, page)
+    return f"Opened in new tab (Tab {browser.active_tab_index}): {url}\n\n{view}"
 
 
 async def _handle_switch_tab(args: dict) -> str:
@@ -970,30 +1131,111 @@ async def _handle_switch_tab(args: dict) -> str:
         tab_info = "\n".join(f"  Tab {t['index']}: {t['title']}" for t in tabs)
         return f"Invalid tab index: {index}. Available tabs:\n{tab_info}"
 
-    elements = await browser.extract_page_elements(page)
-    tab_header = await _get_tab_header()
-    summary = _format_page_summary(elements, tab_header=tab_header)
-    guidance = _build_guidance(elements)
-
-    return f"Switched to Tab {index}.\n\n{summary}{guidance}"
+    view = await _render_page(browser, page)
+    return f"Switched to Tab {index}.\n\n{view}"
+
+
+# Tool name -> handler, used by call_tool()
+_HANDLERS = {
+    "setup_profile": _handle_setup_profile,
+    "search_products": _handle_search_products,
+    "compare_prices": _handle_compare_prices,
+    "get_product_details": _handle_get_product_details,
+    "open_product_page": _handle_open_product_page,
+    "add_to_cart": _handle_add_to_cart,
+    "preview_checkout": _handle_preview_checkout,
+    "confirm_purchase": _handle_confirm_purchase,
+    "read_page": _handle_read_page,
+    "click_element": _handle_click_element,
+    "type_text": _handle_type_text,
+    "select_option": _handle_select_option,
+    "scroll_page": _handle_scroll_page,
+    "go_back": _handle_go_back,
+    "open_link": _handle_open_link,
+    "switch_tab": _handle_switch_tab,
+}
+
+# Tools whose responses the server builds entirely itself, so call_tool() skips the
+# sanitizer. Anything echoing user input or page data (setup_profile's profile fields,
+# add_to_cart's product title and URL) stays sanitized.
+_TRUSTED_TOOLS = frozenset({
+    "compare_prices",
+    "preview_checkout",
+    "confirm_purchase",
+})
 
 
 # ---------------------------------------------------------------------------
 # Server entry point
 # ---------------------------------------------------------------------------
 
+class _CachedTimeFormatter(logging.Formatter):
+    """logging.Formatter that runs strftime once per second instead of once per record."""
+
+    def __init__(self, fmt: str | None = None):
+        super().__init__(fmt)
+        self._last_sec = -1
+        self._last_str = ""
+
+    def formatTime(self, record: logging.LogRecord, datefmt: str | None = None) -> str:
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        sec = int(record.created)
+        if sec != self._last_sec:
+            self._last_str = time.strftime(self.default_time_format, self.converter(record.created))
+            self._last_sec = sec
+        return self.default_msec_format % (self._last_str, record.msecs)
+
+
+async def _preload_profile() -> None:
+    """Decrypt the saved profile into the manager's cache, if there is one."""
+    pm = _get_profile_manager()
+    if not pm.exists():
+        return
+    try:
+        await pm.load_async()
+    except Exception as e:
+        logger.warning("Profile preload failed: %s", e)
+
+
+async def _warmup() -> None:
+    """Launch the browser, open retailer connections, and load the profile before the first tool call."""
+    browser = _get_browser_manager()
+    origins = {cls.origin for cls in SCRAPER_CLASSES.values() if cls.origin}
+    await asyncio.gather(
+        browser.warmup(),
+        _preload_profile(),
+        *(browser.prewarm(origin) for origin in origins),
+    )
+
+
 async def main():
     """Run the MCP server over stdio."""
-    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    handler = logging.StreamHandler()
+    handler.setFormatter(_CachedTimeFormatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s"))
+    logging.basicConfig(level=logging.INFO, handlers=[handler])
     logger.info("Shopping Assistant MCP server starting...")
 
+    # Create the singletons up front; they're cheap and every tool call needs one
+    _get_profile_manager()
+    _get_search_action()
+
+    # Warm up in the background so the first tool call doesn't pay for launch or handshakes
+    warmup = None
+    if os.environ.get("SHOPPING_WARMUP", "1") == "1":
+        warmup = asyncio.create_task(_warmup())
+
     try:
         async with stdio_server() as (read_stream, write_stream):
             await server.run(read_stream, write_stream, server.create_initialization_options())
     finally:
+        if warmup and not warmup.done():
+            warmup.cancel()
         # Clean up browser on shutdown
         if _browser_manager:
             await _browser_manager.close()
+        await close_shared_clients()
+        await _flush_debug_log()
 
 
 def run():
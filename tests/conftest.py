@@ -1,7 +1,40 @@
 """Shared test fixtures."""
+import asyncio
+
 import pytest
-from pathlib import Path
+from shopping_tool.profile.crypto import ProfileCrypto
+from shopping_tool.profile.manager import ProfileManager
 from shopping_tool.profile.schema import UserProfile, ShippingAddress, PaymentMethod
+from shopping_tool import element_resolver
+from shopping_tool import server
+
+
+@pytest.fixture(autouse=True)
+def isolated_selector_cache(tmp_path, monkeypatch):
+    """Keep LLM selector resolutions out of the real ~/.cache between tests."""
+    monkeypatch.setenv("SHOPPING_SELECTOR_CACHE", str(tmp_path / "selectors.json"))
+    monkeypatch.setattr(element_resolver, "_selector_cache", None)
+
+
+@pytest.fixture(autouse=True)
+def isolated_browser_profile(tmp_path, monkeypatch):
+    """Keep any Chromium profile a test launches out of the real ~/.cache."""
+    monkeypatch.setenv("SHOPPING_USER_DATA_DIR", str(tmp_path / "browser-profile"))
+
+
+@pytest.fixture(autouse=True)
+def isolated_server_state(tmp_path, monkeypatch):
+    """Fresh server singletons, confirmations, and debug log per test, so tests pass in any order or xdist worker."""
+    monkeypatch.setattr(server, "_profile_manager", None)
+    monkeypatch.setattr(server, "_browser_manager", None)
+    monkeypatch.setattr(server, "_search_action", None)
+    monkeypatch.setattr(server, "_pending_confirmations", {})
+    monkeypatch.setattr(server, "_confirmation_expiry", [])
+    monkeypatch.setattr(server, "_confirmations_lock", asyncio.Lock())
+    monkeypatch.setattr(server, "_debug_log_queue", asyncio.Queue(maxsize=server._DEBUG_LOG_QUEUE_SIZE))
+    monkeypatch.setattr(server, "_debug_log_writer", None)
+    monkeypatch.setattr(server, "_DEBUG_LOG_DIR", tmp_path / "debug")
+    server._ensure_debug_log_dir.cache_clear()
 
 
 @pytest.fixture
@@ -37,6 +70,20 @@ def sample_profile(sample_shipping, sample_payment):
     )
 
 
+@pytest.fixture(scope="session")
+def profile_key_path(tmp_path_factory):
+    """One encryption key for the whole run (per xdist worker); created on first use."""
+    return tmp_path_factory.mktemp("keys") / "test.key"
+
+
+@pytest.fixture
+def profile_manager(tmp_path, profile_key_path):
+    """ProfileManager over a per-test profile file, encrypted with the shared test key."""
+    pm = ProfileManager(profile_path=tmp_path / "profile.enc")
+    pm._crypto = ProfileCrypto(key_path=profile_key_path)
+    return pm
+
+
 @pytest.fixture
 def tmp_profile_dir(tmp_path):
     """Temporary directory for profile storage during tests."""
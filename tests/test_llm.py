@@ -0,0 +1,228 @@
+"""Tests for the OpenRouter LLM provider."""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+
+from shopping_tool.llm import openrouter
+from shopping_tool.llm.base import LLMResponse
+from shopping_tool.llm.openrouter import OpenRouterProvider, get_provider
+
+
+@pytest.fixture(autouse=True)
+def empty_client_cache(monkeypatch):
+    monkeypatch.setattr(openrouter, "_CLIENT_CACHE", {})
+    monkeypatch.setattr(openrouter, "_response_cache", openrouter.ResponseCache())
+
+
+class TestSharedClient:
+    def test_providers_share_one_client(self):
+        a = get_provider(model="deepseek", api_key="sk-test")
+        b = get_provider(model="grok", api_key="sk-test")
+        assert a._client is b._client
+        assert len(openrouter._CLIENT_CACHE) == 1
+
+    def test_different_keys_get_different_clients(self):
+        a = OpenRouterProvider(api_key="sk-one")
+        b = OpenRouterProvider(api_key="sk-two")
+        assert a._client is not b._client
+
+    def test_injected_http_client_bypasses_cache(self):
+        http = httpx.AsyncClient()
+        provider = OpenRouterProvider(api_key="sk-test", http_client=http)
+        assert provider._client._client is http
+        assert openrouter._CLIENT_CACHE == {}
+
+    @pytest.mark.asyncio
+    async def test_close_shared_clients(self):
+        provider = OpenRouterProvider(api_key="sk-test")
+        await openrouter.close_shared_clients()
+        assert provider._client.is_closed()
+        assert openrouter._CLIENT_CACHE == {}
+
+    def test_missing_api_key(self, monkeypatch):
+        monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+        with pytest.raises(ValueError):
+            get_provider()
+
+
+class TestModelResolution:
+    def test_shortcut_resolved_at_construction(self):
+        provider = OpenRouterProvider(api_key="sk-test", model="deepseek")
+        assert provider.model == "deepseek/deepseek-chat"
+
+    def test_per_call_override(self):
+        provider = OpenRouterProvider(api_key="sk-test")
+        kwargs = {"model": "grok"}
+        assert provider._resolve_model(kwargs) == "x-ai/grok-code-fast-1"
+        assert "model" not in kwargs
+
+    def test_unknown_model_passes_through(self):
+        provider = OpenRouterProvider(api_key="sk-test", model="vendor/custom-model")
+        assert provider._resolve_model({}) == "vendor/custom-model"
+
+    def test_model_table_is_read_only(self):
+        with pytest.raises(TypeError):
+            openrouter.OPENROUTER_MODELS["new"] = "x"
+
+
+class TestRunStream:
+    @staticmethod
+    def _provider_streaming(chunks):
+        async def stream():
+            for text in chunks:
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+        provider = OpenRouterProvider(api_key="sk-test", http_client=httpx.AsyncClient())
+        provider._client = MagicMock()
+        provider._client.chat.completions.create = AsyncMock(return_value=stream())
+        return provider
+
+    @pytest.mark.asyncio
+    async def test_raw_chunks_by_default(self):
+        provider = self._provider_streaming(["a", None, "b"])
+        assert [c async for c in provider.run_stream("hi")] == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_sanitized_stream(self):
+        chunks = ["Your SSN is 123-4", "5-6789 and card 4111 1111 ", "1111 1234."]
+        provider = self._provider_streaming(chunks)
+        text = "".join([c async for c in provider.run_stream("hi", sanitize=True)])
+        assert text == "Your SSN is [SSN REDACTED] and card [CARD REDACTED]."
+
+
+class TestRequestCoalescing:
+    @staticmethod
+    def _completion(text):
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=text))],
+            model="deepseek/deepseek-chat",
+            usage=None,
+            model_dump=lambda: {},
+        )
+
+    @pytest.mark.asyncio
+    async def test_identical_concurrent_calls_share_one_request(self):
+        provider = OpenRouterProvider(api_key="sk-test")
+
+        async def create(**kwargs):
+            await asyncio.sleep(0.01)
+            return self._completion("ok")
+
+        provider._client.chat.completions.create = AsyncMock(side_effect=create)
+        results = await asyncio.gather(*(provider.run("same", system="sys", temperature=0) for _ in range(5)))
+        assert [r.content for r in results] == ["ok"] * 5
+        assert provider._client.chat.completions.create.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_different_queries_are_separate_requests(self):
+        provider = OpenRouterProvider(api_key="sk-test")
+        provider._client.chat.completions.create = AsyncMock(return_value=self._completion("ok"))
+        await asyncio.gather(provider.run("one"), provider.run("two"))
+        assert provider._client.chat.completions.create.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_sequential_calls_served_from_cache(self):
+        provider = OpenRouterProvider(api_key="sk-test")
+        provider._client.chat.completions.create = AsyncMock(return_value=self._completion("ok"))
+        first = await provider.run("same", temperature=0)
+        assert await provider.run("same", temperature=0) is first
+        assert provider._client.chat.completions.create.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_cache_can_be_bypassed(self):
+        provider = OpenRouterProvider(api_key="sk-test")
+        provider._client.chat.completions.create = AsyncMock(return_value=self._completion("ok"))
+        await provider.run("same", temperature=0)
+        await provider.run("same", temperature=0, cache=False)
+        assert provider._client.chat.completions.create.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_empty_reply_not_cached(self):
+        provider = OpenRouterProvider(api_key="sk-test")
+        provider._client.chat.completions.create = AsyncMock(return_value=self._completion(""))
+        await provider.run("same", temperature=0)
+        await provider.run("same", temperature=0)
+        assert provider._client.chat.completions.create.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_only_replies_the_caller_can_parse_are_cached(self):
+        provider = OpenRouterProvider(api_key="sk-test")
+        provider._client.chat.completions.create = AsyncMock(side_effect=[
+            self._completion("Sure! The selector is #buy"),
+            self._completion('{"selector": "#buy"}'),
+        ])
+        bad = await provider.run("same", temperature=0, validate=json.loads)
+        assert bad.content == "Sure! The selector is #buy"  # still handed back once
+        good = await provider.run("same", temperature=0, validate=json.loads)
+        assert await provider.run("same", temperature=0, validate=json.loads) is good
+        assert provider._client.chat.completions.create.await_count == 2
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("temperature", [None, 0.7])
+    async def test_sampled_completions_not_cached_or_shared(self, temperature):
+        provider = OpenRouterProvider(api_key="sk-test")
+
+        async def create(**kwargs):
+            await asyncio.sleep(0.01)
+            return self._completion("ok")
+
+        provider._client.chat.completions.create = AsyncMock(side_effect=create)
+        await asyncio.gather(provider.run("same", temperature=temperature), provider.run("same", temperature=temperature))
+        await provider.run("same", temperature=temperature)
+        create_mock = provider._client.chat.completions.create
+        assert create_mock.await_count == 3
+        assert create_mock.await_args.kwargs.get("temperature") == temperature
+
+    @pytest.mark.asyncio
+    async def test_skip_cache_models(self):
+        provider = OpenRouterProvider(api_key="sk-test", skip_cache_models={"deepseek"})
+        provider._client.chat.completions.create = AsyncMock(return_value=self._completion("ok"))
+        await provider.run("same", temperature=0)
+        await provider.run("same", temperature=0)
+        await provider.run("same", temperature=0, model="grok")
+        await provider.run("same", temperature=0, model="grok")
+        assert provider._client.chat.completions.create.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_injected_clients_share_cache_entries(self):
+        first = OpenRouterProvider(api_key="sk-test", http_client=httpx.AsyncClient())
+        second = OpenRouterProvider(api_key="sk-test", http_client=httpx.AsyncClient())
+        first._client.chat.completions.create = AsyncMock(return_value=self._completion("ok"))
+        second._client.chat.completions.create = AsyncMock(return_value=self._completion("ok"))
+        await first.run("same", temperature=0)
+        await second.run("same", temperature=0)
+        second._client.chat.completions.create.assert_not_awaited()
+
+
+class TestResponseCache:
+    def test_lru_eviction(self):
+        cache = openrouter.ResponseCache(maxsize=2)
+        cache.put(b"a", "A")
+        cache.put(b"b", "B")
+        cache.get(b"a")
+        cache.put(b"c", "C")
+        assert cache.get(b"b") is None
+        assert cache.get(b"a") == "A"
+
+    def test_expiry(self, monkeypatch):
+        cache = openrouter.ResponseCache(ttl=10)
+        now = [100.0]
+        monkeypatch.setattr(openrouter.time, "monotonic", lambda: now[0])
+        cache.put(b"k", "V")
+        now[0] = 111.0
+        assert cache.get(b"k") is None
+
+
+class TestLLMResponse:
+    def test_raw_response_defaults_to_empty(self):
+        assert LLMResponse(content="ok", model="m").raw_response == {}
+
+    def test_raw_response_init_kwarg(self):
+        response = LLMResponse(content="ok", model="m", usage={"input": 1}, raw_response={"id": "gen-1"})
+        assert response.raw_response == {"id": "gen-1"}
+        assert response.usage == {"input": 1}
+        assert not hasattr(response, "__dict__")
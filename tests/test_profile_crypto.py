@@ -1,10 +1,13 @@
 """Tests for profile encryption and management."""
+import os
+
+import msgspec
 import pytest
-from pathlib import Path
+
+from cryptography.fernet import Fernet
 
 from shopping_tool.profile.crypto import ProfileCrypto
 from shopping_tool.profile.manager import ProfileManager
-from shopping_tool.profile.schema import UserProfile, ShippingAddress, PaymentMethod
 
 
 class TestProfileCrypto:
@@ -32,6 +35,14 @@ class TestProfileCrypto:
         decrypted = crypto2.decrypt(encrypted)
         assert decrypted == {"value": 42}
 
+    def test_key_read_once_per_instance(self, tmp_path):
+        key_path = tmp_path / "test.key"
+        crypto = ProfileCrypto(key_path=key_path)
+        encrypted = crypto.encrypt({"value": 42})
+        key_path.unlink()
+        assert crypto.decrypt(encrypted) == {"value": 42}
+        assert not key_path.exists()  # cached key used, no new one generated
+
     def test_tampered_data_raises(self, tmp_path):
         crypto = ProfileCrypto(key_path=tmp_path / "test.key")
         encrypted = crypto.encrypt({"secret": "data"})
@@ -39,11 +50,23 @@ class TestProfileCrypto:
         with pytest.raises(Exception):
             crypto.decrypt(tampered)
 
+    def test_reads_legacy_fernet_blob(self, tmp_path):
+        key_path = tmp_path / "test.key"
+        crypto = ProfileCrypto(key_path=key_path)
+        crypto.encrypt({"warm": "key"})
+        legacy = Fernet(key_path.read_bytes()).encrypt(b'{"value": 42}')
+        assert crypto.decrypt(legacy) == {"value": 42}
+
+    def test_new_blobs_are_versioned(self, tmp_path):
+        crypto = ProfileCrypto(key_path=tmp_path / "test.key")
+        encrypted = crypto.encrypt({"value": 42})
+        assert encrypted[:1] == b"\x02"
+        assert encrypted != crypto.encrypt({"value": 42})  # fresh nonce each time
+
 
 class TestProfileManager:
-    def test_save_and_load(self, tmp_path, sample_profile):
-        pm = ProfileManager(profile_path=tmp_path / "profile.enc")
-        pm._crypto = ProfileCrypto(key_path=tmp_path / "test.key")
+    def test_save_and_load(self, profile_manager, sample_profile):
+        pm = profile_manager
         pm.save(sample_profile)
         pm.clear_cache()
         loaded = pm.load()
@@ -55,9 +78,8 @@ class TestProfileManager:
         pm = ProfileManager(profile_path=tmp_path / "nope.enc")
         assert not pm.exists()
 
-    def test_exists_true_after_save(self, tmp_path, sample_profile):
-        pm = ProfileManager(profile_path=tmp_path / "profile.enc")
-        pm._crypto = ProfileCrypto(key_path=tmp_path / "test.key")
+    def test_exists_true_after_save(self, profile_manager, sample_profile):
+        pm = profile_manager
         pm.save(sample_profile)
         assert pm.exists()
 
@@ -66,9 +88,8 @@ class TestProfileManager:
         with pytest.raises(FileNotFoundError):
             pm.load()
 
-    def test_redacted_summary_hides_pii(self, tmp_path, sample_profile):
-        pm = ProfileManager(profile_path=tmp_path / "profile.enc")
-        pm._crypto = ProfileCrypto(key_path=tmp_path / "test.key")
+    def test_redacted_summary_hides_pii(self, profile_manager, sample_profile):
+        pm = profile_manager
         pm.save(sample_profile)
 
         summary = pm.get_redacted_summary()
@@ -88,15 +109,63 @@ class TestProfileManager:
         # Zip partially hidden
         assert summary["shipping"]["zip"] == "941**"
 
-    def test_encrypted_on_disk(self, tmp_path, sample_profile):
-        profile_path = tmp_path / "profile.enc"
-        pm = ProfileManager(profile_path=profile_path)
-        pm._crypto = ProfileCrypto(key_path=tmp_path / "test.key")
-        pm.save(sample_profile)
+    def test_encrypted_on_disk(self, profile_manager, sample_profile):
+        profile_manager.save(sample_profile)
 
-        raw_bytes = profile_path.read_bytes()
+        raw_bytes = profile_manager._path.read_bytes()
         raw_str = raw_bytes.decode("utf-8", errors="ignore")
         # None of the plaintext PII should appear in the encrypted file
         assert "jane.doe@example.com" not in raw_str
         assert "4111111111111234" not in raw_str
         assert "123 Main Street" not in raw_str
+
+    def test_redacted_summary_cached_until_save(self, profile_manager, sample_profile):
+        pm = profile_manager
+        pm.save(sample_profile)
+
+        first = pm.get_redacted_summary()
+        assert pm.get_redacted_summary() is first
+
+        updated = msgspec.structs.replace(
+            sample_profile,
+            shipping=msgspec.structs.replace(sample_profile.shipping, city="Oakland"),
+        )
+        pm.save(updated)
+        assert pm.get_redacted_summary()["shipping"]["city"] == "Oakland"
+        assert pm.get_shipping_for_form()["city"] == "Oakland"
+
+    def test_redacted_summary_reloads_after_external_write(self, profile_manager, sample_profile):
+        pm = profile_manager
+        profile_path = pm._path
+        pm.save(sample_profile)
+        assert pm.get_redacted_summary()["shipping"]["city"] == "San Francisco"
+
+        other = ProfileManager(profile_path=profile_path)
+        other._crypto = pm._crypto
+        other.save(msgspec.structs.replace(
+            sample_profile,
+            shipping=msgspec.structs.replace(sample_profile.shipping, city="Oakland"),
+        ))
+        # Coarse filesystem clocks can leave the mtime unchanged; force a distinct one
+        stat = profile_path.stat()
+        os.utime(profile_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert pm.get_redacted_summary()["shipping"]["city"] == "Oakland"
+
+    def test_loads_profile_written_as_plain_json(self, tmp_path, sample_profile):
+        """Profiles saved before the msgspec switch (json.dumps of a dict) still load."""
+        profile_path = tmp_path / "profile.enc"
+        crypto = ProfileCrypto(key_path=tmp_path / "test.key")
+        profile_path.write_bytes(crypto.encrypt(msgspec.to_builtins(sample_profile)))
+
+        pm = ProfileManager(profile_path=profile_path)
+        pm._crypto = crypto
+        assert pm.load() == sample_profile
+
+
+    @pytest.mark.asyncio
+    async def test_async_save_and_load(self, profile_manager, sample_profile):
+        pm = profile_manager
+        await pm.save_async(sample_profile)
+        pm.clear_cache()
+        assert await pm.load_async() == sample_profile
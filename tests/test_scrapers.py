@@ -1,13 +1,20 @@
 """Tests for scrapers, search action, and element resolver."""
+import asyncio
+import gc
 import json
+import shutil
+import subprocess
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from shopping_tool.scrapers.base import ProductListing, ProductDetails, BaseRetailerScraper
+from shopping_tool.scrapers import amazon
 from shopping_tool.scrapers.amazon import AmazonScraper
 from shopping_tool.actions.search import SearchAction, SCRAPER_CLASSES
-from shopping_tool.element_resolver import resolve_selector, _detect_retailer, RETAILER_HINTS
+from shopping_tool.element_resolver import resolve_selector, _detect_retailer, fast_resolve, _fast_resolve_cached, RETAILER_HINTS
+from shopping_tool import browser as browser_module
 from shopping_tool.browser import BrowserManager
+from shopping_tool import element_resolver
 
 
 # ---- ProductListing / ProductDetails dataclasses ----
@@ -32,6 +39,14 @@ class TestProductModels:
         assert listing.price == "$29.99"
         assert listing.retailer == "amazon"
 
+    def test_models_are_slotted(self):
+        listing = ProductListing(title="Mouse", retailer="amazon")
+        details = ProductDetails(title="Mouse")
+        assert not hasattr(listing, "__dict__")
+        assert not hasattr(details, "__dict__")
+        with pytest.raises(AttributeError):
+            listing.colour = "black"
+
     def test_product_details_to_dict(self):
         details = ProductDetails(
             title="Test Product",
@@ -90,29 +105,17 @@ class TestAmazonScraper:
         """Mock Playwright page to return JS-evaluated results."""
         mock_page = AsyncMock()
         mock_browser.new_page.return_value = mock_page
-        mock_page.wait_for_selector = AsyncMock()
 
         # Simulate JS evaluate returning search results
-        mock_page.evaluate = AsyncMock(return_value=[
-            {
-                "title": "Logitech MX Master 3S",
-                "price": "$89.99",
-                "url": "https://www.amazon.com/dp/B09HM94VDS",
-                "rating": "4.7 out of 5 stars",
-                "reviewCount": "12,345",
-                "imageUrl": "https://images.amazon.com/test.jpg",
-                "asin": "B09HM94VDS",
-            },
-            {
-                "title": "Razer DeathAdder V3",
-                "price": "$59.99",
-                "url": "https://www.amazon.com/dp/B0BFQX4SYS",
-                "rating": "4.5 out of 5 stars",
-                "reviewCount": "5,678",
-                "imageUrl": None,
-                "asin": "B0BFQX4SYS",
-            },
-        ])
+        mock_page.evaluate = AsyncMock(return_value={
+            "titles": ["Logitech MX Master 3S", "Razer DeathAdder V3"],
+            "prices": ["$89.99", None],
+            "urls": ["https://www.amazon.com/dp/B09HM94VDS", "https://www.amazon.com/dp/B0BFQX4SYS"],
+            "ratings": ["4.7 out of 5 stars", "4.5 out of 5 stars"],
+            "reviewCounts": ["12,345", "5,678"],
+            "imageUrls": ["https://images.amazon.com/test.jpg", None],
+            "asins": ["B09HM94VDS", "B0BFQX4SYS"],
+        })
 
         results = await scraper.search("wireless mouse", max_results=5)
 
@@ -121,6 +124,8 @@ class TestAmazonScraper:
         assert results[0].price == "$89.99"
         assert results[0].retailer == "amazon"
         assert results[1].title == "Razer DeathAdder V3"
+        assert results[1].price is None
+        assert results[1].url == "https://www.amazon.com/dp/B0BFQX4SYS"
 
     @pytest.mark.asyncio
     async def test_search_empty_results(self, scraper, mock_browser):
@@ -140,12 +145,61 @@ class TestAmazonScraper:
         results = await scraper.search("nonexistent product xyz")
         assert results == []
 
+    @pytest.mark.asyncio
+    async def test_skill_parses_http_results(self, scraper, mock_browser):
+        html = """
+        <div data-component-type="s-search-result" data-asin="B09HM94VDS">
+          <h2><a href="/dp/B09HM94VDS"><span>Logitech MX Master 3S</span></a></h2>
+          <span class="a-price"><span class="a-price-whole">89.</span><span class="a-price-fraction">99</span></span>
+          <span class="a-icon-alt">4.7 out of 5 stars</span>
+        </div>
+        """
+        client = MagicMock()
+        client.get = AsyncMock(return_value=MagicMock(status_code=200, text=html))
+        mock_browser.http_client = MagicMock(return_value=client)
+
+        results = await scraper.skill("wireless mouse")
+
+        assert len(results) == 1
+        assert results[0].title == "Logitech MX Master 3S"
+        assert results[0].price == "$89.99"
+        assert results[0].url == "https://www.amazon.com/dp/B09HM94VDS"
+        mock_browser.new_page.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_skill_miss_on_bot_check(self, scraper, mock_browser):
+        client = MagicMock()
+        client.get = AsyncMock(return_value=MagicMock(status_code=200, text="<form>captcha</form>"))
+        mock_browser.http_client = MagicMock(return_value=client)
+
+        assert await scraper.skill("wireless mouse") is None
+
+    @pytest.mark.asyncio
+    async def test_skill_pauses_only_after_repeated_empty_parses(self, scraper, mock_browser, monkeypatch):
+        # Marker present, but no result parses (e.g. a zero-result query)
+        html = '<div data-component-type="s-search-result"></div>'
+        client = MagicMock()
+        client.get = AsyncMock(return_value=MagicMock(status_code=200, text=html))
+        mock_browser.http_client = MagicMock(return_value=client)
+        now = [1000.0]
+        monkeypatch.setattr(amazon.time, "monotonic", lambda: now[0])
+
+        for _ in range(amazon._SKILL_MAX_MISSES):
+            assert await scraper.skill("zero results") is None
+        assert client.get.await_count == amazon._SKILL_MAX_MISSES
+
+        # Paused: no request until the cooldown runs out
+        assert await scraper.skill("wireless mouse") is None
+        assert client.get.await_count == amazon._SKILL_MAX_MISSES
+        now[0] += amazon._SKILL_COOLDOWN
+        await scraper.skill("wireless mouse")
+        assert client.get.await_count == amazon._SKILL_MAX_MISSES + 1
+
     @pytest.mark.asyncio
     async def test_get_details(self, scraper, mock_browser):
         mock_page = AsyncMock()
         mock_browser.get_page.return_value = None
         mock_browser.new_page.return_value = mock_page
-        mock_page.wait_for_selector = AsyncMock()
 
         mock_page.evaluate = AsyncMock(return_value={
             "title": "Logitech MX Master 3S",
@@ -165,12 +219,35 @@ class TestAmazonScraper:
         assert details.price == "$89.99"
         assert details.retailer == "amazon"
         assert len(details.features) == 3
+        # Title wait and extraction share one round trip
+        mock_page.evaluate.assert_awaited_once()
+        mock_page.wait_for_selector.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_get_details_many_bounded_ordered_and_isolated(self, scraper):
+        active = 0
+        peak = 0
+
+        async def fake_details(url):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            if url.endswith("BAD"):
+                raise RuntimeError("page crashed")
+            return ProductDetails(title=url, url=url)
+
+        scraper.get_details = fake_details
+        urls = ["https://www.amazon.com/dp/A", "https://www.amazon.com/dp/BAD", "https://www.amazon.com/dp/C"]
+        results = await scraper.get_details_many(urls, max_concurrent=2)
+        assert [r.url if r else None for r in results] == [urls[0], None, urls[2]]
+        assert peak == 2
 
     @pytest.mark.asyncio
     async def test_get_details_no_title(self, scraper, mock_browser):
         mock_page = AsyncMock()
         mock_browser.get_page.return_value = mock_page
-        mock_page.wait_for_selector = AsyncMock()
         mock_page.evaluate = AsyncMock(return_value={"title": "", "price": None})
 
         details = await scraper.get_details("https://www.amazon.com/dp/BAD")
@@ -198,18 +275,15 @@ class TestSearchAction:
     async def test_search_wires_to_scraper(self, action, mock_browser):
         mock_page = AsyncMock()
         mock_browser.new_page.return_value = mock_page
-        mock_page.wait_for_selector = AsyncMock()
-        mock_page.evaluate = AsyncMock(return_value=[
-            {
-                "title": "Test Mouse",
-                "price": "$25.00",
-                "url": "https://amazon.com/dp/TEST",
-                "rating": "4.0",
-                "reviewCount": "100",
-                "imageUrl": None,
-                "asin": "TEST123",
-            },
-        ])
+        mock_page.evaluate = AsyncMock(return_value={
+            "titles": ["Test Mouse"],
+            "prices": ["$25.00"],
+            "urls": ["https://amazon.com/dp/TEST"],
+            "ratings": ["4.0"],
+            "reviewCounts": ["100"],
+            "imageUrls": [None],
+            "asins": ["TEST123"],
+        })
 
         result = await action.search("mouse", max_results=3, retailers=["amazon"])
 
@@ -224,12 +298,104 @@ class TestSearchAction:
         assert result["status"] == "ok"
         assert result["total_results"] == 0
 
+    @pytest.mark.asyncio
+    async def test_search_failing_retailer_does_not_block_others(self, action):
+        class BrokenScraper(BaseRetailerScraper):
+            retailer_name = "broken"
+
+            def __init__(self, browser):
+                pass
+
+            async def search(self, query, max_results=5):
+                raise RuntimeError("boom")
+
+            async def get_details(self, url):
+                return None
+
+        class WorkingScraper(BrokenScraper):
+            retailer_name = "working"
+
+            async def search(self, query, max_results=5):
+                return [ProductListing(title="Mouse", retailer="working")]
+
+        with patch.dict(SCRAPER_CLASSES, {"broken": BrokenScraper, "working": WorkingScraper}):
+            result = await action.search("mouse", retailers=["broken", "working"])
+
+        assert result["total_results"] == 1
+        assert result["results"][0]["retailer"] == "working"
+        assert result["retailers_searched"] == ["broken (error)", "working"]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("retailers", [["working", "working"], ["all", "working"]])
+    async def test_search_repeated_retailer_runs_once(self, action, retailers):
+        calls = []
+
+        class WorkingScraper(BaseRetailerScraper):
+            retailer_name = "working"
+
+            def __init__(self, browser):
+                pass
+
+            async def search(self, query, max_results=5):
+                calls.append(query)
+                return [ProductListing(title="Mouse", retailer="working")]
+
+            async def get_details(self, url):
+                return None
+
+        with patch.dict(SCRAPER_CLASSES, {"working": WorkingScraper}, clear=True):
+            result = await action.search("mouse", retailers=retailers)
+
+        assert calls == ["mouse"]
+        assert result["total_results"] == 1
+        assert result["retailers_searched"] == ["working"]
+
     @pytest.mark.asyncio
     async def test_get_details_unsupported_url(self, action):
         result = await action.get_details("https://shop.example.com/item")
         assert result["status"] == "error"
         assert "Unsupported" in result["message"]
 
+    @pytest.mark.asyncio
+    async def test_get_all_details_delegates_to_get_details_many(self, action):
+        active = 0
+        peak = 0
+
+        class FakeScraper(BaseRetailerScraper):
+            retailer_name = "amazon"
+
+            def __init__(self, browser):
+                pass
+
+            async def search(self, query, max_results=5):
+                return []
+
+            async def get_details(self, url):
+                nonlocal active, peak
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+                if url.endswith("BAD"):
+                    raise RuntimeError("page crashed")
+                return ProductDetails(title=url, url=url, retailer="amazon")
+
+        urls = [f"https://amazon.com/dp/ITEM{i}" for i in range(5)]
+        urls[1] = "https://amazon.com/dp/BAD"
+        urls.insert(3, "https://shop.example.com/item")
+
+        with patch.dict(SCRAPER_CLASSES, {"amazon": FakeScraper}):
+            with patch.object(FakeScraper, "get_details_many", autospec=True,
+                              side_effect=BaseRetailerScraper.get_details_many) as many:
+                results = await action.get_all_details(urls, concurrency=2)
+
+        many.assert_awaited_once()
+        assert many.await_args.args[1] == [u for u in urls if "amazon" in u]
+        assert [r["status"] for r in results] == ["ok", "error", "ok", "error", "ok", "ok"]
+        assert [r["details"]["url"] for r in results if r["status"] == "ok"] == [urls[0], urls[2], urls[4], urls[5]]
+        assert "Unsupported" in results[3]["message"]
+        assert peak == 2
+
     @pytest.mark.asyncio
     async def test_open_page(self, action, mock_browser):
         mock_page = AsyncMock()
@@ -248,6 +414,338 @@ class TestSearchAction:
         assert result["buttons_found"] == 1
 
 
+# ---- BrowserManager element cache ----
+
+class TestElementCache:
+    @pytest.fixture
+    def page(self):
+        page = MagicMock()
+        page.url = "https://amazon.com/dp/TEST"
+        page.evaluate = AsyncMock(return_value={"url": "https://amazon.com/dp/TEST", "buttons": []})
+        return page
+
+    @pytest.mark.asyncio
+    async def test_repeat_extraction_is_cached(self, page):
+        browser = BrowserManager()
+        first = await browser.extract_page_elements(page)
+        second = await browser.extract_page_elements(page)
+        assert first is second
+        page.evaluate.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_interaction_invalidates_cache(self, page):
+        browser = BrowserManager()
+        await browser.extract_page_elements(page)
+        with patch("shopping_tool.browser.asyncio.sleep", new=AsyncMock()):
+            await browser.scroll(page, "down")
+        await browser.extract_page_elements(page)
+        # One call for the first extraction, one for the scroll, one for the re-extraction
+        assert page.evaluate.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_main_frame_navigation_invalidates_cache(self, page):
+        browser = BrowserManager()
+        await browser.extract_page_elements(page)
+        browser._on_frame_navigated(page, MagicMock(parent_frame=None))
+        assert browser.get_cached_elements(page) is None
+
+    @pytest.mark.asyncio
+    async def test_closed_page_entry_is_dropped(self):
+        browser = BrowserManager()
+        page = MagicMock(evaluate=AsyncMock(return_value={"buttons": []}))
+        await browser.extract_page_elements(page)
+        assert len(browser._element_cache) == 1
+        del page
+        gc.collect()
+        assert len(browser._element_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_bypass_cache(self, page):
+        browser = BrowserManager()
+        await browser.extract_page_elements(page)
+        await browser.extract_page_elements(page, use_cache=False)
+        assert page.evaluate.call_count == 2
+
+
+# ---- _PREPARE_TARGET_JS, run under node against a stub element ----
+
+def _prepare_target(element: dict | None) -> dict:
+    node = shutil.which("node")
+    if node is None:
+        pytest.skip("node not installed")
+    script = f"""
+        const el = {json.dumps(element)};
+        if (el) {{
+            el.getBoundingClientRect = () => el.rect;
+            el.scrollIntoView = () => {{ el.scrolled = true; }};
+        }}
+        globalThis.document = {{querySelector: () => el}};
+        globalThis.getComputedStyle = (e) => e.style;
+        const visible = ({browser_module._PREPARE_TARGET_JS})('#target');
+        console.log(JSON.stringify({{visible, scrolled: Boolean(el && el.scrolled)}}));
+    """
+    result = subprocess.run([node, "-e", script], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+class TestPrepareTargetJS:
+    BOX = {"width": 320, "height": 48}
+
+    def test_fixed_position_target_is_visible(self):
+        # Sticky "Add to Cart" bar: position:fixed leaves offsetParent null, but it has a box
+        bar = {"offsetParent": None, "rect": self.BOX, "style": {"display": "block", "visibility": "visible", "position": "fixed"}}
+        assert _prepare_target(bar) == {"visible": True, "scrolled": True}
+
+    @pytest.mark.parametrize("rect,visibility", [
+        ({"width": 0, "height": 0}, "visible"),
+        ({"width": 320, "height": 48}, "hidden"),
+    ], ids=["empty-box", "visibility-hidden"])
+    def test_hidden_target(self, rect, visibility):
+        el = {"rect": rect, "style": {"display": "block", "visibility": visibility}}
+        assert _prepare_target(el) == {"visible": False, "scrolled": False}
+
+    def test_display_contents_is_left_to_playwright(self):
+        el = {"rect": {"width": 0, "height": 0}, "style": {"display": "contents", "visibility": "visible"}}
+        assert _prepare_target(el)["visible"] is None
+
+    def test_missing_target(self):
+        assert _prepare_target(None)["visible"] is None
+
+
+# ---- BrowserManager click / fill ----
+
+class TestBrowserInteractions:
+    @pytest.fixture
+    def page(self):
+        page = MagicMock()
+        page.url = "https://amazon.com/dp/TEST"
+        return page
+
+    @pytest.fixture
+    def target(self, page):
+        """The Locator page.locator(selector).first hands back."""
+        target = AsyncMock()
+        target.count.return_value = 1
+        target.is_visible.return_value = True
+        page.locator.return_value.first = target
+        return target
+
+    @pytest.fixture(autouse=True)
+    def no_sleep(self):
+        with patch("shopping_tool.browser.asyncio.sleep", new=AsyncMock()):
+            yield
+
+    @pytest.mark.asyncio
+    async def test_click_checks_css_in_one_evaluate(self, page, target):
+        page.evaluate = AsyncMock(return_value=True)
+        assert await BrowserManager().click(page, "#add-to-cart-button") is True
+        page.evaluate.assert_called_once()
+        target.count.assert_not_awaited()
+        # Playwright's actionable click, not a raw mouse click at coordinates
+        target.click.assert_awaited_once_with(timeout=3000)
+
+    @pytest.mark.asyncio
+    async def test_click_missing_element(self, page, target):
+        page.evaluate = AsyncMock(return_value=None)
+        target.count.return_value = 0
+        assert await BrowserManager().click(page, "#missing") is False
+        target.click.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_click_hidden_element(self, page, target):
+        page.evaluate = AsyncMock(return_value=False)
+        assert await BrowserManager().click(page, "#hidden") is False
+        target.click.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("selector", ["text=Add to Cart", "xpath=//button[1]", "#buybox >> text=Buy Now"])
+    async def test_click_playwright_selector_uses_locator(self, page, target, selector):
+        page.evaluate = AsyncMock(side_effect=Exception(f"'{selector}' is not a valid selector"))
+        assert await BrowserManager().click(page, selector) is True
+        page.locator.assert_called_with(selector)
+        target.scroll_into_view_if_needed.assert_awaited_once()
+        target.click.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_click_falls_back_to_js_click(self, page, target):
+        page.evaluate = AsyncMock(return_value=True)
+        target.click.side_effect = Exception("intercepted by overlay")
+        assert await BrowserManager().click(page, "#add-to-cart-button") is True
+        target.evaluate.assert_awaited_once_with("el => el.click()")
+
+    @pytest.mark.asyncio
+    async def test_fill_sets_value_through_locator(self, page, target):
+        page.evaluate = AsyncMock(return_value=True)
+        assert await BrowserManager().fill(page, "#twotabsearchtextbox", "mouse") is True
+        page.evaluate.assert_called_once()
+        target.fill.assert_awaited_once_with("mouse")
+        target.press_sequentially.assert_not_awaited()
+        target.press.assert_awaited_once_with("Escape")
+
+    @pytest.mark.asyncio
+    async def test_fill_types_per_key_with_jitter(self, page, target, monkeypatch):
+        monkeypatch.setattr(browser_module, "JITTER", True)
+        page.evaluate = AsyncMock(return_value=True)
+        assert await BrowserManager().fill(page, "#twotabsearchtextbox", "mouse") is True
+        target.fill.assert_awaited_once_with("")
+        assert target.press_sequentially.await_args.args[0] == "mouse"
+
+    @pytest.mark.asyncio
+    async def test_fill_playwright_selector_uses_locator(self, page, target):
+        page.evaluate = AsyncMock(side_effect=Exception("not a valid selector"))
+        assert await BrowserManager().fill(page, "input >> nth=0", "mouse") is True
+        target.fill.assert_awaited_once_with("mouse")
+
+
+class TestResourceBlocking:
+    @pytest.fixture
+    def context(self):
+        context = MagicMock()
+        context.new_page = AsyncMock(return_value=MagicMock(goto=AsyncMock()))
+        context.new_cdp_session = AsyncMock(return_value=MagicMock(send=AsyncMock()))
+        return context
+
+    @pytest.mark.asyncio
+    async def test_blocks_via_cdp_when_enabled(self, context, monkeypatch):
+        monkeypatch.setenv("SHOPPING_BLOCK_MEDIA", "1")
+        browser = BrowserManager()
+        browser._context = context
+        await browser.new_page("https://amazon.com")
+        cdp = context.new_cdp_session.return_value
+        cdp.send.assert_any_await("Network.setBlockedURLs", {"urls": browser_module.BLOCKED_URL_PATTERNS})
+        context.new_page.return_value.route.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_no_blocking_by_default(self, context, monkeypatch):
+        monkeypatch.delenv("SHOPPING_BLOCK_MEDIA", raising=False)
+        browser = BrowserManager()
+        browser._context = context
+        await browser.new_page("https://amazon.com")
+        context.new_cdp_session.assert_not_called()
+
+
+class TestTabList:
+    @pytest.mark.asyncio
+    async def test_closed_tab_reported_without_blocking_others(self):
+        live = MagicMock(url="https://amazon.com/dp/A", title=AsyncMock(return_value="Product A"))
+        dead = MagicMock(url="https://amazon.com/dp/B", title=AsyncMock(side_effect=Exception("closed")))
+        browser = BrowserManager()
+        browser._tabs = [live, dead]
+        browser._active_tab_index = 0
+
+        tabs = await browser.get_tab_list()
+        assert tabs[0] == {"index": 0, "url": "https://amazon.com/dp/A", "title": "Product A", "active": True}
+        assert tabs[1]["title"] == "(closed)"
+        assert tabs[1]["url"] == "(closed)"
+
+
+class TestBrowserLifecycle:
+    @pytest.fixture
+    def launch(self, monkeypatch):
+        """Stub out the real Playwright launch and count calls."""
+        calls = []
+
+        async def fake_launch(browser):
+            calls.append(browser)
+            await asyncio.sleep(0)
+            browser._context = MagicMock(close=AsyncMock())
+
+        monkeypatch.setattr(BrowserManager, "_launch", fake_launch)
+        return calls
+
+    @pytest.mark.asyncio
+    async def test_warmup_and_first_call_share_one_launch(self, launch):
+        browser = BrowserManager()
+        await asyncio.gather(browser.warmup(), browser._ensure_context())
+        assert len(launch) == 1
+
+    @pytest.mark.asyncio
+    async def test_idle_browser_is_closed(self, launch):
+        browser = BrowserManager()
+        http = browser.http_client()
+        await browser._ensure_context()
+        context = browser._context
+        browser._idle_task = asyncio.create_task(browser._close_when_idle(0.01))
+        await asyncio.wait_for(browser._idle_task, timeout=1)
+        assert browser._context is None
+        context.close.assert_awaited_once()
+        assert browser.http_client() is http  # pooled connections survive the idle close
+        await browser.close()
+        assert http.is_closed
+
+    @pytest.fixture
+    def playwright(self, monkeypatch):
+        playwright = MagicMock(stop=AsyncMock())
+        monkeypatch.setattr(browser_module, "async_playwright", lambda: MagicMock(start=AsyncMock(return_value=playwright)))
+        return playwright
+
+    @pytest.mark.asyncio
+    async def test_failed_launch_stops_playwright(self, playwright, tmp_path):
+        playwright.chromium.launch_persistent_context = AsyncMock(side_effect=RuntimeError("no chromium"))
+        playwright.chromium.launch = AsyncMock(side_effect=RuntimeError("no chromium"))
+        browser = BrowserManager()
+
+        with pytest.raises(RuntimeError):
+            await browser._ensure_context()
+
+        playwright.stop.assert_awaited_once()
+        assert browser._playwright is None
+        assert browser.user_data_dir == tmp_path / "browser-profile"
+
+    @pytest.mark.asyncio
+    async def test_locked_profile_falls_back_to_temporary_context(self, playwright):
+        # What Chromium reports when another server already holds the profile dir
+        playwright.chromium.launch_persistent_context = AsyncMock(
+            side_effect=RuntimeError("The profile appears to be in use by another Chromium process"))
+        context = MagicMock()
+        chromium = MagicMock(new_context=AsyncMock(return_value=context))
+        playwright.chromium.launch = AsyncMock(return_value=chromium)
+        browser = BrowserManager()
+
+        assert await browser._ensure_context() is context
+        assert browser._browser is chromium
+        playwright.stop.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_first_tab_reuses_startup_blank_page(self, playwright):
+        blank = MagicMock(goto=AsyncMock())
+        fresh = MagicMock(goto=AsyncMock())
+        context = MagicMock(pages=[blank], new_page=AsyncMock(return_value=fresh))
+        playwright.chromium.launch_persistent_context = AsyncMock(return_value=context)
+        browser = BrowserManager()
+        browser._random_delay = AsyncMock()
+
+        assert await browser.new_page("https://www.amazon.com/s?k=mouse") is blank
+        context.new_page.assert_not_awaited()
+        assert await browser.new_page("https://www.amazon.com/dp/TEST") is fresh
+        assert browser.tab_count == 2
+
+    @pytest.mark.asyncio
+    async def test_prewarm_uses_shared_client(self):
+        browser = BrowserManager()
+        client = MagicMock(head=AsyncMock(), is_closed=False)
+        browser._http = client
+        await browser.prewarm("https://www.amazon.com")
+        client.head.assert_awaited_once_with("https://www.amazon.com/")
+
+    @pytest.mark.asyncio
+    async def test_prewarm_failure_is_swallowed(self):
+        browser = BrowserManager()
+        browser._http = MagicMock(head=AsyncMock(side_effect=OSError("offline")), is_closed=False)
+        await browser.prewarm("https://www.amazon.com")
+
+
+class TestJitterSchedule:
+    def test_disabled_by_default(self):
+        assert browser_module._jitter_schedule((0.5, 1.2), (0.3, 0.7)) == (0.0, 0.0)
+
+    def test_enabled_stays_within_budget(self, monkeypatch):
+        monkeypatch.setattr(browser_module, "JITTER", True)
+        waits = browser_module._jitter_schedule((1.0, 1.5), (1.0, 1.5))
+        assert len(waits) == 2
+        assert sum(waits) <= browser_module.JITTER_BUDGET + 1e-9
+
+
 # ---- Element resolver (mocked LLM) ----
 
 class TestElementResolver:
@@ -271,6 +769,27 @@ class TestElementResolver:
         )
         assert result == "#add-to-cart-button"
 
+    @pytest.mark.parametrize("description,expected", [
+        ("the Add to Cart button", "#add-to-cart-button"),
+        ("add-to-cart", "#add-to-cart-button"),
+        ("Add item to cart", "#add-to-cart-button"),
+        ("See All Reviews", 'a[data-hook="see-all-reviews-link-foot"]'),
+        ("the search button", "#nav-search-submit-button"),
+        ("click the search input", "#twotabsearchtextbox"),
+    ])
+    def test_fast_resolve_normalized_descriptions(self, description, expected):
+        assert fast_resolve(description, "https://www.amazon.com/dp/B01234") == expected
+
+    def test_fast_resolve_ambiguous_description_returns_none(self):
+        # "search" alone matches both the search box and the search button
+        assert fast_resolve("search", "https://www.amazon.com/dp/B01234") is None
+
+    def test_fast_resolve_memoized_across_case_and_whitespace(self):
+        _fast_resolve_cached.cache_clear()
+        fast_resolve("Add to Cart", "https://www.amazon.com/dp/B01234")
+        assert fast_resolve("  add to cart ", "https://www.amazon.com/dp/B05678") == "#add-to-cart-button"
+        assert _fast_resolve_cached.cache_info().hits == 1
+
     @pytest.mark.asyncio
     async def test_fast_resolve_unknown_description_falls_through(self):
         """Unknown descriptions should fall through to LLM."""
@@ -316,6 +835,7 @@ class TestElementResolver:
             )
 
             assert result == "#special-btn"
+            assert provider.run.call_args.kwargs["response_format"] == {"type": "json_object"}
 
     @pytest.mark.asyncio
     async def test_resolve_selector_not_found(self):
@@ -339,6 +859,28 @@ class TestElementResolver:
 
             assert result is None
 
+    @pytest.mark.asyncio
+    async def test_resolve_selector_retries_malformed_json(self):
+        mock_response = MagicMock()
+        mock_response.content = "Sure! The selector is #buy"
+
+        with patch("shopping_tool.element_resolver.get_provider") as mock_get:
+            provider = AsyncMock()
+            provider.run.return_value = mock_response
+            mock_get.return_value = provider
+
+            result = await resolve_selector(
+                description="buy button",
+                element_type="button",
+                page_elements={"html": "<button id='buy'>Buy</button>", "url": "https://amazon.com"},
+            )
+
+            assert result is None
+            assert provider.run.await_count == 3
+            # Only the first try is deterministic; retries sample so they can differ
+            assert [c.kwargs["temperature"] for c in provider.run.await_args_list] == [0, None, None]
+            assert provider.run.await_args.kwargs["validate"] is element_resolver._parse_json_response
+
     @pytest.mark.asyncio
     async def test_resolve_selector_no_api_key(self):
         with patch("shopping_tool.element_resolver.get_provider", side_effect=ValueError("OPENROUTER_API_KEY not set")):
@@ -349,6 +891,98 @@ class TestElementResolver:
             )
             assert result is None
 
+    @pytest.mark.asyncio
+    async def test_resolve_selector_sends_digest_not_html(self):
+        mock_response = MagicMock()
+        mock_response.content = json.dumps({"selector": "#gift-wrap", "found": True, "reason": "id"})
+
+        with patch("shopping_tool.element_resolver.get_provider") as mock_get:
+            provider = AsyncMock()
+            provider.run.return_value = mock_response
+            mock_get.return_value = provider
+
+            result = await resolve_selector(
+                description="gift wrap checkbox",
+                element_type="input",
+                page_elements={
+                    "url": "https://amazon.com/dp/B01234",
+                    "html": "<div>" + "x" * 5000 + "</div>",
+                    "buttons": [],
+                    "inputs": [{"index": 0, "id": "gift-wrap", "type": "checkbox", "label": "Add gift wrap"}],
+                    "selects": [],
+                    "links": [],
+                },
+            )
+
+            assert result == "#gift-wrap"
+            prompt = provider.run.call_args.args[0]
+            assert "PAGE ELEMENTS (JSON)" in prompt
+            assert "x" * 5000 not in prompt
+
+    @pytest.mark.asyncio
+    async def test_resolve_selector_falls_back_to_html(self):
+        mock_response = MagicMock()
+        mock_response.content = json.dumps({"selector": ".promo", "found": True, "reason": "class"})
+
+        with patch("shopping_tool.element_resolver.get_provider") as mock_get:
+            provider = AsyncMock()
+            provider.run.return_value = mock_response
+            mock_get.return_value = provider
+
+            await resolve_selector(
+                description="promo banner",
+                element_type="any",
+                page_elements={
+                    "url": "https://amazon.com/dp/B01234",
+                    "html": "<div class='promo'>Sale</div>",
+                    "buttons": [{"index": 0, "text": "Add to Cart", "type": "button"}],
+                },
+            )
+
+            prompt = provider.run.call_args.args[0]
+            assert "PAGE HTML" in prompt
+            assert "<div class='promo'>" in prompt
+
+    @pytest.mark.asyncio
+    async def test_llm_resolution_is_cached_on_disk(self, tmp_path):
+        mock_response = MagicMock()
+        mock_response.content = json.dumps({"selector": "#special-btn", "found": True, "reason": "id"})
+        page_elements = {"html": "<button id='special-btn'>Go</button>", "url": "https://amazon.com/dp/B01234"}
+
+        with patch("shopping_tool.element_resolver.get_provider") as mock_get:
+            provider = AsyncMock()
+            provider.run.return_value = mock_response
+            mock_get.return_value = provider
+
+            first = await resolve_selector("special checkout button", "button", page_elements)
+            second = await resolve_selector("Special checkout buttons!", "button", page_elements)
+
+            assert first == second == "#special-btn"
+            provider.run.assert_called_once()
+
+        saved = json.loads((tmp_path / "selectors.json").read_text())
+        assert saved == {"amazon|special checkout button|button": "#special-btn"}
+
+    @pytest.mark.asyncio
+    async def test_stale_cached_selector_is_re_resolved(self):
+        mock_response = MagicMock()
+        mock_response.content = json.dumps({"selector": "#new-btn", "found": True, "reason": "id"})
+        page_elements = {"html": "<button id='new-btn'>Go</button>", "url": "https://amazon.com/dp/B01234"}
+
+        with patch("shopping_tool.element_resolver.get_provider") as mock_get:
+            provider = AsyncMock()
+            provider.run.return_value = mock_response
+            mock_get.return_value = provider
+
+            with patch.dict(element_resolver._load_selector_cache(), {"amazon|special checkout button|button": "#old-btn"}):
+                result = await resolve_selector(
+                    "special checkout button", "button", page_elements,
+                    verify=AsyncMock(return_value=False),
+                )
+
+            assert result == "#new-btn"
+            provider.run.assert_called_once()
+
     @pytest.mark.asyncio
     async def test_resolve_selector_json_in_fences(self):
         mock_response = MagicMock()
@@ -366,3 +1000,11 @@ class TestElementResolver:
             )
 
             assert result == ".buy-btn"
+
+    @pytest.mark.parametrize("content", [
+        'Sure:\n```json\n{"selector": "#x"}\n```\nDone.',
+        '```\n{"selector": "#x"}\n```',
+        '```json\n{"selector": "#x"}\n',  # reply cut off before the closing fence
+    ])
+    def test_parse_json_response_strips_fences(self, content):
+        assert element_resolver._parse_json_response(content) == {"selector": "#x"}
@@ -1,11 +1,17 @@
 """Tests for MCP server tool registration and dispatch."""
+import logging
+
 import pytest
 import json
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, create_autospec, patch
+from pathlib import Path
+from types import MappingProxyType
 
 from shopping_tool.server import (
     list_tools,
     call_tool,
+    _HANDLERS,
+    _TOOLS,
     _handle_setup_profile,
     _handle_preview_checkout,
     _handle_confirm_purchase,
@@ -17,18 +23,17 @@ from shopping_tool.server import (
     _handle_go_back,
     _handle_open_link,
     _handle_switch_tab,
-    _handle_search_products,
     _format_page_summary,
     _build_guidance,
-    _pending_confirmations,
-    _get_profile_manager,
 )
+from shopping_tool.actions.search import SearchAction
+from shopping_tool.browser import BrowserManager
 from shopping_tool.profile.manager import ProfileManager
 from shopping_tool.profile.crypto import ProfileCrypto
 import shopping_tool.server as server_module
 
 
-EXPECTED_TOOLS = [
+EXPECTED_TOOLS = frozenset({
     "search_products",
     "compare_prices",
     "get_product_details",
@@ -45,34 +50,45 @@ EXPECTED_TOOLS = [
     "go_back",
     "open_link",
     "switch_tab",
-]
+})
 
 
 @pytest.mark.asyncio
 async def test_list_tools_returns_all_sixteen():
     tools = await list_tools()
-    names = [t.name for t in tools]
+    names = {t.name for t in tools}
     assert len(tools) == 16
-    for expected in EXPECTED_TOOLS:
-        assert expected in names, f"Missing tool: {expected}"
+    missing = EXPECTED_TOOLS - names
+    assert not missing, f"Missing tools: {sorted(missing)}"
 
 
 @pytest.mark.asyncio
-async def test_all_tools_have_schemas():
-    tools = await list_tools()
-    for tool in tools:
-        assert tool.description, f"{tool.name} missing description"
-        assert tool.inputSchema, f"{tool.name} missing inputSchema"
-        assert tool.inputSchema["type"] == "object"
+@pytest.mark.parametrize("tool_name", sorted(EXPECTED_TOOLS))
+async def test_tool_has_schema(tool_name):
+    tool = next(t for t in await list_tools() if t.name == tool_name)
+    assert tool.description
+    assert tool.inputSchema
+    assert tool.inputSchema["type"] == "object"
 
 
 @pytest.mark.asyncio
-async def test_setup_profile_init(tmp_path):
-    pm = ProfileManager(profile_path=tmp_path / "profile.enc")
-    pm._crypto = ProfileCrypto(key_path=tmp_path / "test.key")
-    server_module._profile_manager = pm
+async def test_list_tools_reuses_tool_objects():
+    first = await list_tools()
+    first.clear()
+    second = await list_tools()
+    assert len(second) == 16
+    assert second[0] is (await list_tools())[0]
+
+
+def test_every_tool_has_a_handler():
+    assert {t.name for t in _TOOLS} == set(_HANDLERS)
 
-    result = await _handle_setup_profile({
+
+@pytest.mark.asyncio
+async def test_setup_profile_init(profile_manager):
+    server_module._profile_manager = profile_manager
+
+    result = json.loads(await _handle_setup_profile({
         "action": "init",
         "email": "test@example.com",
         "shipping": {
@@ -90,84 +106,160 @@ async def test_setup_profile_init(tmp_path):
             "expiry_year": 2028,
             "cvv": "456",
         },
-    })
+    }))
 
     assert result["status"] == "saved"
     assert result["profile"]["payment"]["last_four"] == "5678"
-    # Cleanup
-    server_module._profile_manager = None
 
 
 @pytest.mark.asyncio
-async def test_setup_profile_view_no_profile(tmp_path):
-    pm = ProfileManager(profile_path=tmp_path / "nope.enc")
-    server_module._profile_manager = pm
-
-    result = await _handle_setup_profile({"action": "view_summary"})
-    assert result["status"] == "no_profile"
-    server_module._profile_manager = None
+async def test_setup_profile_coerces_numeric_strings(profile_manager):
+    server_module._profile_manager = profile_manager
 
-
-@pytest.mark.asyncio
-async def test_confirmation_code_flow(tmp_path):
-    """Test the preview -> confirm flow."""
-    # Setup a profile first
-    pm = ProfileManager(profile_path=tmp_path / "profile.enc")
-    pm._crypto = ProfileCrypto(key_path=tmp_path / "test.key")
-    server_module._profile_manager = pm
-
-    await _handle_setup_profile({
+    result = json.loads(await _handle_setup_profile({
         "action": "init",
         "email": "test@example.com",
         "shipping": {
             "full_name": "Test User",
-            "street": "789 Pine",
-            "city": "Austin",
-            "state": "TX",
-            "zip_code": "73301",
-            "phone": "512-555-0100",
+            "street": "456 Oak Ave",
+            "city": "Portland",
+            "state": "OR",
+            "zip_code": "97201",
+            "phone": "503-555-0100",
         },
         "payment": {
             "card_type": "visa",
-            "card_number": "4111111111119999",
-            "expiry_month": 3,
-            "expiry_year": 2029,
-            "cvv": "789",
+            "card_number": "4111111111111234",
+            "expiry_month": "6",
+            "expiry_year": "2028",
+            "cvv": "456",
         },
-    })
+    }))
+
+    assert result["status"] == "saved"
+    assert profile_manager.get_payment_for_form()["expiry_month"] == 6
+
+
+@pytest.mark.asyncio
+async def test_setup_profile_view_no_profile(profile_manager):
+    server_module._profile_manager = profile_manager
+
+    result = json.loads(await _handle_setup_profile({"action": "view_summary"}))
+    assert result["status"] == "no_profile"
+
+
+@pytest.mark.asyncio
+async def test_preload_profile_fills_cache(profile_manager, profile_key_path, sample_profile):
+    profile_manager.save(sample_profile)
+
+    pm = ProfileManager(profile_path=profile_manager._path)
+    pm._crypto = ProfileCrypto(key_path=profile_key_path)
+    server_module._profile_manager = pm
+    await server_module._preload_profile()
+    assert pm._cached == sample_profile
+
+
+@pytest.mark.asyncio
+async def test_confirmation_code_flow(profile_manager, sample_profile):
+    """Test the preview -> confirm flow."""
+    profile_manager.save(sample_profile)
+    server_module._profile_manager = profile_manager
 
     # Preview
-    preview = await _handle_preview_checkout({})
+    preview = json.loads(await _handle_preview_checkout({}))
     assert preview["status"] == "preview"
     code = preview["confirmation_code"]
     assert len(code) == 6
 
     # Confirm with correct code
-    confirm = await _handle_confirm_purchase({"confirmation_code": code})
+    confirm = json.loads(await _handle_confirm_purchase({"confirmation_code": code}))
     assert confirm["status"] == "stub"  # Phase 3 will make this real
-    assert code not in _pending_confirmations  # Code consumed
+    assert code not in server_module._pending_confirmations  # Code consumed
 
     # Confirm again with same code should fail
-    confirm2 = await _handle_confirm_purchase({"confirmation_code": code})
+    confirm2 = json.loads(await _handle_confirm_purchase({"confirmation_code": code}))
     assert confirm2["status"] == "rejected"
 
-    server_module._profile_manager = None
+
+def test_confirmation_codes_avoid_ambiguous_characters():
+    codes = {server_module._generate_confirmation_code() for _ in range(200)}
+    assert len(codes) > 190
+    for code in codes:
+        assert len(code) == 6
+        assert not set(code) & set("0O1IL")
+
+
+def test_expired_confirmations_are_cleaned_up(monkeypatch):
+    monkeypatch.setattr(server_module, "_pending_confirmations", {})
+    monkeypatch.setattr(server_module, "_confirmation_expiry", [])
+    now = server_module.time.monotonic()
+    for code, expires_at in (("OLD111", now - 1), ("NEW222", now + 60)):
+        server_module._pending_confirmations[code] = {"expires_at": expires_at, "url": "cart"}
+        server_module.heapq.heappush(server_module._confirmation_expiry, (expires_at, code))
+
+    server_module._cleanup_expired_confirmations()
+    assert list(server_module._pending_confirmations) == ["NEW222"]
+    assert server_module._confirmation_expiry == [(now + 60, "NEW222")]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_confirms_accept_code_once(monkeypatch):
+    monkeypatch.setattr(server_module, "_pending_confirmations", {
+        "ABC234": {"expires_at": server_module.time.monotonic() + 60, "url": "cart"},
+    })
+    results = await server_module.asyncio.gather(
+        *(_handle_confirm_purchase({"confirmation_code": "abc234"}) for _ in range(5))
+    )
+    assert sorted(json.loads(r)["status"] for r in results) == ["rejected"] * 4 + ["stub"]
 
 
 @pytest.mark.asyncio
 async def test_confirm_with_bad_code():
-    result = await _handle_confirm_purchase({"confirmation_code": "BADCODE"})
+    result = json.loads(await _handle_confirm_purchase({"confirmation_code": "BADCODE"}))
     assert result["status"] == "rejected"
 
 
 @pytest.mark.asyncio
-async def test_search_products_returns_guided_text():
-    """search_products now returns guided text with workflow instructions."""
+async def test_search_products_returns_guided_text(browser_mock, monkeypatch):
+    """search_products returns guided text with workflow instructions."""
+    search = create_autospec(SearchAction, instance=True)
+    search.search.return_value = {
+        "status": "ok",
+        "query": "laptop",
+        "results": [{"title": "Acme Laptop 14", "price": "$499.99", "rating": "4.4 out of 5 stars",
+                     "url": "https://www.amazon.com/dp/B0LAPTOP01"}],
+        "total_results": 1,
+        "retailers_searched": ["amazon"],
+    }
+    monkeypatch.setattr(server_module, "_search_action", search)
+    browser_mock.tab_count = 0
+
     result = await call_tool("search_products", {"query": "laptop"})
+
     assert len(result) == 1
-    text = result[0].text
-    # Should contain either results or an error message
-    assert "laptop" in text.lower() or "Error" in text
+    _assert_contains_all(result[0].text, ('Search results for "laptop"', "Acme Laptop 14", "$499.99", "from: amazon"))
+    search.search.assert_awaited_once_with("laptop", max_results=50, retailers=["all"])
+    # Served by the HTTP fast path: no results tab to send the agent back to
+    assert "switch_tab" not in result[0].text
+    assert "list above" in result[0].text
+
+
+@pytest.mark.asyncio
+async def test_search_guidance_points_at_opened_results_tab(browser_mock, monkeypatch):
+    async def browser_search(query, max_results, retailers):
+        browser_mock.tab_count = 3
+        browser_mock.active_tab_index = 2
+        return {"status": "ok", "query": query, "results": [], "total_results": 0, "retailers_searched": ["amazon"]}
+
+    search = create_autospec(SearchAction, instance=True)
+    search.search.side_effect = browser_search
+    monkeypatch.setattr(server_module, "_search_action", search)
+    browser_mock.tab_count = 2
+    browser_mock.get_tab_list.return_value = []
+
+    result = await call_tool("search_products", {"query": "laptop"})
+
+    assert "Use switch_tab(2) to come back to these search results" in result[0].text
 
 
 @pytest.mark.asyncio
@@ -176,294 +268,287 @@ async def test_unknown_tool():
     assert "Unknown tool" in result[0].text
 
 
+@pytest.mark.asyncio
+async def test_dict_handlers_return_json_text():
+    text = await _HANDLERS["compare_prices"]({"product_name": "mouse"})
+    assert isinstance(text, str)
+    assert json.loads(text)["status"] == "stub"
+
+
+@pytest.mark.asyncio
+async def test_trusted_tools_skip_sanitizer():
+    handler = AsyncMock(return_value="card 4111 1111 1111 1234")
+    with patch.dict(_HANDLERS, {"compare_prices": handler, "read_page": handler}):
+        trusted = await call_tool("compare_prices", {})
+        scraped = await call_tool("read_page", {})
+    assert "4111" in trusted[0].text
+    assert "4111" not in scraped[0].text
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("tool", ["setup_profile", "add_to_cart"])
+async def test_tools_echoing_user_or_page_data_are_sanitized(tool):
+    handler = AsyncMock(return_value="card 4111 1111 1111 1234")
+    with patch.dict(_HANDLERS, {tool: handler}):
+        result = await call_tool(tool, {})
+    assert "4111" not in result[0].text
+
+
 # ---------------------------------------------------------------------------
 # Atomic browsing tool tests
 # ---------------------------------------------------------------------------
 
-class TestReadPage:
-    @pytest.mark.asyncio
-    async def test_no_active_page(self):
-        server_module._browser_manager = MagicMock()
-        server_module._browser_manager.active_page = None
-        result = await _handle_read_page({})
-        assert "No browser page" in result
-        server_module._browser_manager = None
+# Keys every extract_page_elements() result has; tests add the ones their page needs
+_EMPTY_ELEMENTS = MappingProxyType({"buttons": [], "links": [], "inputs": [], "selects": [], "text_content": []})
+
+
+@pytest.fixture
+def browser_mock(monkeypatch):
+    """Autospecced BrowserManager installed as the server's singleton for one test."""
+    browser = create_autospec(BrowserManager, instance=True)
+    monkeypatch.setattr(server_module, "_browser_manager", browser)
+    return browser
+
 
+@pytest.fixture
+def resolver_mock(monkeypatch):
+    """Autospecced element_resolver whose known-selector lookup always misses."""
+    resolver = create_autospec(server_module.element_resolver)
+    resolver.fast_resolve.return_value = None
+    monkeypatch.setattr(server_module, "element_resolver", resolver)
+    return resolver
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("handler,args", [
+    (_handle_read_page, {}),
+    (_handle_click_element, {"description": "button"}),
+    (_handle_type_text, {"description": "search box", "text": "laptop"}),
+    (_handle_select_option, {"description": "quantity", "value": "2"}),
+    (_handle_scroll_page, {}),
+    (_handle_go_back, {}),
+])
+async def test_no_active_page(handler, args, browser_mock):
+    browser_mock.active_page = None
+    result = await handler(args)
+    assert "No browser page" in result
+
+
+def _assert_contains_all(text: str, expected) -> None:
+    """Check every substring in one assert, reporting all that are missing."""
+    missing = [s for s in expected if s not in text]
+    assert not missing, f"missing: {missing}"
+
+
+def _show_page(browser, elements: dict, tabs: list[dict] | None = None) -> None:
+    """Have the mocked browser extract `elements` (over the empty template) with `tabs` open."""
+    browser.extract_page_elements.return_value = {**_EMPTY_ELEMENTS, **elements}
+    if tabs is not None:
+        browser.tab_count = len(tabs)
+        browser.get_tab_list.return_value = tabs
+
+
+class TestReadPage:
     @pytest.mark.asyncio
-    async def test_reads_page_content(self):
-        mock_browser = MagicMock()
+    async def test_reads_page_content(self, browser_mock):
         mock_page = AsyncMock()
-        mock_browser.active_page = mock_page
-        mock_browser.extract_page_elements = AsyncMock(return_value={
+        browser_mock.active_page = mock_page
+        _show_page(browser_mock, {
             "url": "https://amazon.com/dp/TEST",
             "title": "Test Product Page",
             "buttons": [{"index": 0, "text": "Add to Cart", "id": "add-to-cart-button", "type": "button", "classes": ""}],
             "links": [{"index": 0, "text": "See all reviews", "href": "https://amazon.com/reviews"}],
-            "inputs": [],
-            "selects": [],
             "text_content": ["$29.99", "In Stock"],
-        })
-        mock_browser.tab_count = 1
-        mock_browser.get_tab_list = AsyncMock(return_value=[
+        }, tabs=[
             {"index": 0, "url": "https://amazon.com/dp/TEST", "title": "Test Product Page", "active": True},
         ])
-        server_module._browser_manager = mock_browser
 
         result = await _handle_read_page({})
-        assert "Test Product Page" in result
-        assert "$29.99" in result
-        assert "Add to Cart" in result
-        assert "See all reviews" in result
-        assert "NEXT STEPS" in result
-        server_module._browser_manager = None
+        _assert_contains_all(result, ("Test Product Page", "$29.99", "Add to Cart", "See all reviews", "NEXT STEPS"))
 
-
-class TestClickElement:
     @pytest.mark.asyncio
-    async def test_no_active_page(self):
-        server_module._browser_manager = MagicMock()
-        server_module._browser_manager.active_page = None
-        result = await _handle_click_element({"description": "button"})
-        assert "No browser page" in result
-        server_module._browser_manager = None
+    async def test_extraction_and_tab_list_overlap(self, browser_mock):
+        tabs_requested = server_module.asyncio.Event()
+
+        async def extract(page, use_cache=True):
+            # Only finishes if the tab list was requested while extraction was in flight
+            await server_module.asyncio.wait_for(tabs_requested.wait(), timeout=1)
+            return {"url": "https://amazon.com/dp/TEST", "title": "T", "buttons": [], "links": [], "inputs": []}
+
+        async def tab_list():
+            tabs_requested.set()
+            return [{"index": 0, "url": "https://amazon.com/dp/TEST", "title": "T", "active": True}]
+
+        browser_mock.active_page = AsyncMock()
+        browser_mock.tab_count = 1
+        browser_mock.extract_page_elements = extract
+        browser_mock.get_tab_list = tab_list
 
+        result = await _handle_read_page({})
+        assert "Open Tabs (1)" in result
+
+
+class TestClickElement:
     @pytest.mark.asyncio
-    async def test_selector_not_found(self):
-        mock_browser = MagicMock()
+    async def test_selector_not_found(self, browser_mock, resolver_mock):
         mock_page = AsyncMock()
-        mock_browser.active_page = mock_page
-        mock_browser.extract_page_elements = AsyncMock(return_value={
+        browser_mock.active_page = mock_page
+        _show_page(browser_mock, {
             "url": "https://amazon.com",
             "html": "<div>empty</div>",
-            "buttons": [],
-            "links": [],
         })
-        server_module._browser_manager = mock_browser
 
-        with patch("shopping_tool.server.element_resolver") as mock_resolver:
-            mock_resolver.resolve_selector = AsyncMock(return_value=None)
-            result = await _handle_click_element({"description": "Nonexistent button"})
-            assert "Could not find" in result
+        resolver_mock.resolve_selector.return_value = None
 
-        server_module._browser_manager = None
+        result = await _handle_click_element({"description": "Nonexistent button"})
+        assert "Could not find" in result
 
     @pytest.mark.asyncio
-    async def test_click_success(self):
-        mock_browser = MagicMock()
+    async def test_click_success(self, browser_mock, resolver_mock):
         mock_page = AsyncMock()
-        mock_browser.active_page = mock_page
-        mock_browser.extract_page_elements = AsyncMock(return_value={
+        browser_mock.active_page = mock_page
+        _show_page(browser_mock, {
             "url": "https://amazon.com/dp/TEST",
             "html": "<button id='btn'>Click me</button>",
             "title": "After Click",
             "buttons": [{"index": 0, "text": "Click me", "id": "btn", "type": "button", "classes": ""}],
-            "links": [],
-            "inputs": [],
-            "selects": [],
             "text_content": ["Page content after click"],
-        })
-        mock_browser.click = AsyncMock(return_value=True)
-        mock_browser.tab_count = 1
-        mock_browser.get_tab_list = AsyncMock(return_value=[
+        }, tabs=[
             {"index": 0, "url": "https://amazon.com/dp/TEST", "title": "After Click", "active": True},
         ])
-        mock_page.wait_for_load_state = AsyncMock()
-        server_module._browser_manager = mock_browser
+        browser_mock.click.return_value = True
 
-        with patch("shopping_tool.server.element_resolver") as mock_resolver:
-            mock_resolver.resolve_selector = AsyncMock(return_value="#btn")
-            result = await _handle_click_element({"description": "Click me button"})
-            assert "Clicked" in result
-            assert "#btn" in result
-            assert "After Click" in result
+        resolver_mock.resolve_selector.return_value = "#btn"
 
-        server_module._browser_manager = None
+        result = await _handle_click_element({"description": "Click me button"})
+        _assert_contains_all(result, ("Clicked", "#btn", "After Click"))
 
-
-class TestTypeText:
     @pytest.mark.asyncio
-    async def test_no_active_page(self):
-        server_module._browser_manager = MagicMock()
-        server_module._browser_manager.active_page = None
-        result = await _handle_type_text({"description": "search box", "text": "laptop"})
-        assert "No browser page" in result
-        server_module._browser_manager = None
+    async def test_known_selector_skips_extraction(self, browser_mock):
+        mock_page = AsyncMock()
+        mock_page.url = "https://www.amazon.com/dp/TEST"
+        browser_mock.active_page = mock_page
+        browser_mock.click.return_value = False
+
+        with patch.object(server_module.element_resolver, "resolve_selector", AsyncMock()) as llm_resolve:
+            result = await _handle_click_element({"description": "Add to Cart"})
 
+        assert "#add-to-cart-button" in result
+        browser_mock.click.assert_awaited_once_with(mock_page, "#add-to-cart-button")
+        browser_mock.extract_page_elements.assert_not_awaited()
+        llm_resolve.assert_not_awaited()
+
+
+class TestTypeText:
     @pytest.mark.asyncio
-    async def test_type_success(self):
-        mock_browser = MagicMock()
+    async def test_type_success(self, browser_mock, resolver_mock):
         mock_page = AsyncMock()
-        mock_browser.active_page = mock_page
-        mock_browser.extract_page_elements = AsyncMock(return_value={
+        browser_mock.active_page = mock_page
+        _show_page(browser_mock, {
             "url": "https://amazon.com",
             "html": "<input id='search' />",
             "inputs": [{"index": 0, "id": "search", "type": "text"}],
         })
-        mock_browser.fill = AsyncMock(return_value=True)
-        server_module._browser_manager = mock_browser
+        browser_mock.fill.return_value = True
 
-        with patch("shopping_tool.server.element_resolver") as mock_resolver:
-            mock_resolver.resolve_selector = AsyncMock(return_value="#search")
-            result = await _handle_type_text({"description": "search box", "text": "wireless mouse"})
-            assert "Typed" in result
-            assert "wireless mouse" in result
+        resolver_mock.resolve_selector.return_value = "#search"
 
-        server_module._browser_manager = None
+        result = await _handle_type_text({"description": "search box", "text": "wireless mouse"})
+        assert "Typed" in result
+        assert "wireless mouse" in result
 
 
 class TestScrollPage:
     @pytest.mark.asyncio
-    async def test_no_active_page(self):
-        server_module._browser_manager = MagicMock()
-        server_module._browser_manager.active_page = None
-        result = await _handle_scroll_page({})
-        assert "No browser page" in result
-        server_module._browser_manager = None
-
-    @pytest.mark.asyncio
-    async def test_scroll_down(self):
-        mock_browser = MagicMock()
+    async def test_scroll_down(self, browser_mock):
         mock_page = AsyncMock()
-        mock_browser.active_page = mock_page
-        mock_browser.scroll = AsyncMock()
-        mock_browser.extract_page_elements = AsyncMock(return_value={
+        browser_mock.active_page = mock_page
+        _show_page(browser_mock, {
             "url": "https://amazon.com/dp/TEST",
             "title": "Product Page",
-            "buttons": [],
-            "links": [],
-            "inputs": [],
-            "selects": [],
             "text_content": ["More content below"],
-        })
-        mock_browser.tab_count = 1
-        mock_browser.get_tab_list = AsyncMock(return_value=[
+        }, tabs=[
             {"index": 0, "url": "https://amazon.com/dp/TEST", "title": "Product Page", "active": True},
         ])
-        server_module._browser_manager = mock_browser
 
         result = await _handle_scroll_page({"direction": "down"})
         assert "Scrolled down" in result
         assert "More content below" in result
-        mock_browser.scroll.assert_called_once_with(mock_page, "down")
-        server_module._browser_manager = None
+        browser_mock.scroll.assert_called_once_with(mock_page, "down")
 
 
 class TestGoBack:
     @pytest.mark.asyncio
-    async def test_no_active_page(self):
-        server_module._browser_manager = MagicMock()
-        server_module._browser_manager.active_page = None
-        result = await _handle_go_back({})
-        assert "No browser page" in result
-        server_module._browser_manager = None
-
-    @pytest.mark.asyncio
-    async def test_go_back_success(self):
-        mock_browser = MagicMock()
+    async def test_go_back_success(self, browser_mock):
         mock_page = AsyncMock()
-        mock_browser.active_page = mock_page
-        mock_browser.go_back = AsyncMock(return_value="https://amazon.com/s?k=mouse")
-        mock_browser.extract_page_elements = AsyncMock(return_value={
+        browser_mock.active_page = mock_page
+        browser_mock.go_back.return_value = "https://amazon.com/s?k=mouse"
+        _show_page(browser_mock, {
             "url": "https://amazon.com/s?k=mouse",
             "title": "Search Results",
-            "buttons": [],
-            "links": [],
-            "inputs": [],
-            "selects": [],
             "text_content": ["Search results for mouse"],
-        })
-        mock_browser.tab_count = 1
-        mock_browser.get_tab_list = AsyncMock(return_value=[
+        }, tabs=[
             {"index": 0, "url": "https://amazon.com/s?k=mouse", "title": "Search Results", "active": True},
         ])
-        server_module._browser_manager = mock_browser
 
         result = await _handle_go_back({})
         assert "Navigated back" in result
         assert "Search Results" in result
-        server_module._browser_manager = None
-
-
-class TestSelectOption:
-    @pytest.mark.asyncio
-    async def test_no_active_page(self):
-        server_module._browser_manager = MagicMock()
-        server_module._browser_manager.active_page = None
-        result = await _handle_select_option({"description": "quantity", "value": "2"})
-        assert "No browser page" in result
-        server_module._browser_manager = None
 
 
 class TestOpenLink:
     @pytest.mark.asyncio
-    async def test_opens_new_tab(self):
-        mock_browser = MagicMock()
+    async def test_opens_new_tab(self, browser_mock):
         mock_page = AsyncMock()
-        mock_browser.open_in_new_tab = AsyncMock(return_value=mock_page)
-        mock_browser.active_tab_index = 1
-        mock_browser.tab_count = 2
-        mock_browser.extract_page_elements = AsyncMock(return_value={
+        browser_mock.open_in_new_tab.return_value = mock_page
+        browser_mock.active_tab_index = 1
+        _show_page(browser_mock, {
             "url": "https://amazon.com/dp/TEST",
             "title": "Product Page",
             "buttons": [{"text": "Add to Cart", "index": 0, "id": "", "type": "button", "classes": ""}],
-            "links": [],
-            "inputs": [],
-            "selects": [],
             "text_content": ["$29.99"],
-        })
-        mock_browser.get_tab_list = AsyncMock(return_value=[
+        }, tabs=[
             {"index": 0, "url": "https://amazon.com/s?k=mouse", "title": "Search", "active": False},
             {"index": 1, "url": "https://amazon.com/dp/TEST", "title": "Product Page", "active": True},
         ])
-        server_module._browser_manager = mock_browser
 
         result = await _handle_open_link({"url": "https://amazon.com/dp/TEST"})
         assert "new tab" in result.lower() or "Tab 1" in result
         assert "Product Page" in result
-        mock_browser.open_in_new_tab.assert_called_once()
-        server_module._browser_manager = None
+        browser_mock.open_in_new_tab.assert_called_once()
+        browser_mock.extract_page_elements.assert_awaited_once_with(mock_page, use_cache=False)
 
 
 class TestSwitchTab:
     @pytest.mark.asyncio
-    async def test_switch_valid_tab(self):
-        mock_browser = MagicMock()
+    async def test_switch_valid_tab(self, browser_mock):
         mock_page = AsyncMock()
-        mock_browser.switch_tab.return_value = mock_page
-        mock_browser.extract_page_elements = AsyncMock(return_value={
+        browser_mock.switch_tab.return_value = mock_page
+        _show_page(browser_mock, {
             "url": "https://amazon.com/s?k=mouse",
             "title": "Search Results",
-            "buttons": [],
-            "links": [],
-            "inputs": [],
-            "selects": [],
             "text_content": ["Results for mouse"],
-        })
-        mock_browser.tab_count = 2
-        mock_browser.active_tab_index = 0
-        mock_browser.get_tab_list = AsyncMock(return_value=[
+        }, tabs=[
             {"index": 0, "url": "https://amazon.com/s?k=mouse", "title": "Search Results", "active": True},
             {"index": 1, "url": "https://amazon.com/dp/TEST", "title": "Product", "active": False},
         ])
-        server_module._browser_manager = mock_browser
+        browser_mock.active_tab_index = 0
 
         result = await _handle_switch_tab({"tab_index": 0})
         assert "Switched to Tab 0" in result
         assert "Search Results" in result
-        server_module._browser_manager = None
+        # The tab may have loaded more since it was last extracted
+        browser_mock.extract_page_elements.assert_awaited_once_with(mock_page, use_cache=False)
 
     @pytest.mark.asyncio
-    async def test_switch_invalid_tab(self):
-        mock_browser = MagicMock()
-        mock_browser.switch_tab.return_value = None
-        mock_browser.get_tab_list = AsyncMock(return_value=[
+    async def test_switch_invalid_tab(self, browser_mock):
+        browser_mock.switch_tab.return_value = None
+        browser_mock.get_tab_list.return_value = [
             {"index": 0, "url": "https://amazon.com", "title": "Amazon", "active": True},
-        ])
-        server_module._browser_manager = mock_browser
+        ]
 
         result = await _handle_switch_tab({"tab_index": 5})
         assert "Invalid tab index" in result
-        server_module._browser_manager = None
 
 
 # ---------------------------------------------------------------------------
@@ -482,61 +567,78 @@ class TestFormatPageSummary:
             "selects": [],
         }
         summary = _format_page_summary(elements)
-        assert "Test Product" in summary
-        assert "$29.99" in summary
-        assert "Add to Cart" in summary
-        assert "Reviews" in summary
-        assert "Quantity" in summary
+        _assert_contains_all(summary, ("Test Product", "$29.99", "Add to Cart", "Reviews", "Quantity"))
 
 
 class TestBuildGuidance:
-    def test_search_results_page(self):
+    @pytest.mark.parametrize("url,buttons,links,expected", [
+        ("https://amazon.com/s?k=mouse", [], [], ["SEARCH RESULTS", "DO NOT stop", "open_link", "switch_tab"]),
+        ("https://amazon.com/dp/B01234", [{"text": "Add to Cart"}], [{"text": "See all reviews"}],
+         ["PRODUCT", "Add to Cart", "review"]),
+        ("https://amazon.com/product-reviews/B01234", [], [{"text": "Next page"}], ["REVIEWS", "Next page", "switch_tab"]),
+        # Search results guidance is a directive multi-step workflow
+        ("https://amazon.com/s?k=laptop", [], [], ["open_link", "read_page", "switch_tab", "DO NOT stop"]),
+    ], ids=["search", "product", "reviews", "search-workflow"])
+    def test_page_type_guidance(self, url, buttons, links, expected):
+        guidance = _build_guidance({"url": url, "buttons": buttons, "links": links, "inputs": []})
+        _assert_contains_all(guidance, expected)
+
+    def test_keyword_does_not_span_two_buttons(self):
         elements = {
-            "url": "https://amazon.com/s?k=mouse",
-            "buttons": [],
+            "url": "https://amazon.com/dp/B01234",
+            "buttons": [{"text": "Add to"}, {"text": "Cart"}],
             "links": [],
             "inputs": [],
         }
-        guidance = _build_guidance(elements)
-        assert "SEARCH RESULTS" in guidance
-        assert "DO NOT stop" in guidance
-        assert "open_link" in guidance
-        assert "switch_tab" in guidance
+        assert "PRODUCT" not in _build_guidance(elements)
 
-    def test_product_page_with_cart(self):
-        elements = {
-            "url": "https://amazon.com/dp/B01234",
-            "buttons": [{"text": "Add to Cart"}],
-            "links": [{"text": "See all reviews"}],
-            "inputs": [],
-        }
-        guidance = _build_guidance(elements)
-        assert "PRODUCT" in guidance
-        assert "Add to Cart" in guidance
-        assert "review" in guidance.lower()
 
-    def test_reviews_page(self):
-        elements = {
-            "url": "https://amazon.com/product-reviews/B01234",
-            "buttons": [],
-            "links": [{"text": "Next page"}],
-            "inputs": [],
-        }
-        guidance = _build_guidance(elements)
-        assert "REVIEWS" in guidance
-        assert "Next page" in guidance
-        assert "switch_tab" in guidance
+class TestDebugLog:
+    @pytest.mark.asyncio
+    async def test_entries_written_in_background(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(server_module, "_DEBUG_LOG_DIR", tmp_path)
+        monkeypatch.setattr(server_module, "_debug_log_queue", server_module.asyncio.Queue(maxsize=8))
+        monkeypatch.setattr(server_module, "_debug_log_writer", None)
+        server_module._ensure_debug_log_dir.cache_clear()
+        with patch.object(server_module.os, "open", wraps=server_module.os.open) as opened:
+            for i in range(3):
+                server_module._debug_log("read_page", {"n": i}, f"response {i}")
+            assert not opened.called  # nothing touches disk on the call path
+            await server_module._flush_debug_log()
+            assert opened.call_count == 1  # the burst is written in one batch
+
+        logs = list(tmp_path.glob("session_*.log"))
+        assert len(logs) == 1
+        text = logs[0].read_text()
+        assert text.count("TOOL: read_page") == 3
+        assert "response 2" in text
+        server_module._ensure_debug_log_dir.cache_clear()
+
+    def test_entry_timestamp_and_file_name(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(server_module, "_DEBUG_LOG_DIR", tmp_path)
+        server_module._ensure_debug_log_dir.cache_clear()
+        when = server_module.time.mktime((2026, 3, 4, 5, 6, 7, 0, 0, -1)) + 0.089
+        server_module._write_debug_entries([(when, "go_back", {}, "ok")])
+
+        text = (tmp_path / "session_2026-03-04.log").read_text()
+        assert "[05:06:07.089] TOOL: go_back" in text
+        server_module._ensure_debug_log_dir.cache_clear()
 
-    def test_search_guidance_has_workflow(self):
-        """Verify the search results guidance includes directive multi-step workflow."""
-        elements = {
-            "url": "https://amazon.com/s?k=laptop",
-            "buttons": [],
-            "links": [],
-            "inputs": [],
-        }
-        guidance = _build_guidance(elements)
-        assert "open_link" in guidance
-        assert "read_page" in guidance
-        assert "switch_tab" in guidance
-        assert "DO NOT stop" in guidance
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_entries(self, monkeypatch):
+        monkeypatch.setattr(server_module, "_debug_log_queue", server_module.asyncio.Queue(maxsize=1))
+        monkeypatch.setattr(server_module, "_debug_log_writer", None)
+        monkeypatch.setattr(server_module, "_DEBUG_LOG_DIR", Path("/nonexistent/debug"))
+        server_module._debug_log("a", {}, "")
+        server_module._debug_log("b", {}, "")  # dropped, no error
+        await server_module._flush_debug_log()
+
+
+class TestLogFormatter:
+    def test_matches_stdlib_timestamps(self):
+        fmt = "%(asctime)s %(message)s"
+        cached = server_module._CachedTimeFormatter(fmt)
+        plain = logging.Formatter(fmt)
+        for created in (1_700_000_000.123, 1_700_000_000.987, 1_700_000_001.5):
+            record = logging.makeLogRecord({"msg": "hi", "created": created, "msecs": created % 1 * 1000})
+            assert cached.format(record) == plain.format(record)